@@ -0,0 +1,53 @@
+"""map_airport_partitioning
+
+Revision ID: 002
+Revises: 001
+Create Date: 2026-10-19
+
+Scope locations, paths and walls to an airport (and optional terminal).
+Existing rows are backfilled to the default airport.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '002_map_airport_partitioning'
+down_revision: Union[str, None] = '001_initial_schema'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+DEFAULT_AIRPORT_CODE = 'TLV'
+
+
+def upgrade() -> None:
+    """Add airport/terminal scoping to the map tables."""
+    for table in ('locations', 'paths', 'walls'):
+        op.add_column(
+            table,
+            sa.Column('airport_code', sa.String(), nullable=False, server_default=DEFAULT_AIRPORT_CODE),
+        )
+        # The default only exists to backfill current rows
+        op.alter_column(table, 'airport_code', server_default=None)
+
+    op.add_column('locations', sa.Column('terminal', sa.String(), nullable=True))
+    op.add_column('walls', sa.Column('terminal', sa.String(), nullable=True))
+
+    op.create_index('ix_locations_airport_terminal', 'locations', ['airport_code', 'terminal'])
+    op.create_index('ix_paths_airport_code', 'paths', ['airport_code'])
+    op.create_index('ix_walls_airport_terminal', 'walls', ['airport_code', 'terminal'])
+
+
+def downgrade() -> None:
+    """Remove airport/terminal scoping from the map tables."""
+    op.drop_index('ix_walls_airport_terminal', 'walls')
+    op.drop_index('ix_paths_airport_code', 'paths')
+    op.drop_index('ix_locations_airport_terminal', 'locations')
+
+    op.drop_column('walls', 'terminal')
+    op.drop_column('locations', 'terminal')
+
+    for table in ('walls', 'paths', 'locations'):
+        op.drop_column(table, 'airport_code')
@@ -0,0 +1,31 @@
+"""flight_gate
+
+Revision ID: 003
+Revises: 002
+Create Date: 2026-10-19
+
+Store the departure terminal and gate of a flight for walk-time ETAs.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '003_flight_gate'
+down_revision: Union[str, None] = '002_map_airport_partitioning'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Add departure terminal and gate to flights."""
+    op.add_column('flights', sa.Column('terminal', sa.String(), nullable=True))
+    op.add_column('flights', sa.Column('gate', sa.String(), nullable=True))
+
+
+def downgrade() -> None:
+    """Remove departure terminal and gate from flights."""
+    op.drop_column('flights', 'gate')
+    op.drop_column('flights', 'terminal')
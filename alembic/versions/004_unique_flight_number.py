@@ -0,0 +1,40 @@
+"""unique_flight_number
+
+Revision ID: 004
+Revises: 003
+Create Date: 2026-10-19
+
+Make flights.flight_number unique so ingestion can upsert with
+INSERT ... ON CONFLICT (flight_number). Duplicate rows left by the old
+ingestion path are removed first, keeping the oldest row per flight number.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '004_unique_flight_number'
+down_revision: Union[str, None] = '003_flight_gate'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Deduplicate flights and replace the flight_number index with a unique one."""
+    op.execute(
+        """
+        DELETE FROM flights f
+        USING flights keep
+        WHERE f.flight_number = keep.flight_number
+          AND f.id > keep.id
+        """
+    )
+    op.drop_index('ix_flights_flight_number', 'flights')
+    op.create_index('ix_flights_flight_number', 'flights', ['flight_number'], unique=True)
+
+
+def downgrade() -> None:
+    """Restore the non-unique flight_number index."""
+    op.drop_index('ix_flights_flight_number', 'flights')
+    op.create_index('ix_flights_flight_number', 'flights', ['flight_number'])
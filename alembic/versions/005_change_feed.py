@@ -0,0 +1,40 @@
+"""change_feed
+
+Revision ID: 005
+Revises: 004
+Create Date: 2026-10-19
+
+Add updated_at to flights and messages, with (updated_at, id) indexes, so
+clients can sync only the rows changed since their last cursor.
+Existing rows are stamped with the migration time.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '005_change_feed'
+down_revision: Union[str, None] = '004_unique_flight_number'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Add updated_at columns and the change-feed indexes."""
+    for table in ('flights', 'messages'):
+        op.add_column(
+            table,
+            sa.Column('updated_at', sa.DateTime(), nullable=False, server_default=sa.text("timezone('utc', now())"))
+        )
+    op.create_index('ix_flights_updated_at', 'flights', ['updated_at', 'id'])
+    op.create_index('ix_messages_user_updated_at', 'messages', ['user_id', 'updated_at', 'id'])
+
+
+def downgrade() -> None:
+    """Drop the change-feed indexes and columns."""
+    op.drop_index('ix_messages_user_updated_at', 'messages')
+    op.drop_index('ix_flights_updated_at', 'flights')
+    op.drop_column('messages', 'updated_at')
+    op.drop_column('flights', 'updated_at')
@@ -0,0 +1,46 @@
+"""ticket_offer_key
+
+Revision ID: 006
+Revises: 005
+Create Date: 2026-10-19
+
+Key cached ticket offers on (flight_number, departure_time) so a search
+response can be cached with one INSERT ... ON CONFLICT, and allow
+tickets.user_id to be NULL for offers that have not been booked yet.
+Duplicate unbooked offers are removed first, keeping booked rows and
+otherwise the oldest row.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '006_ticket_offer_key'
+down_revision: Union[str, None] = '005_change_feed'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Make user_id nullable, deduplicate offers and add the unique key."""
+    op.alter_column('tickets', 'user_id', existing_type=sa.Integer(), nullable=True)
+    op.execute(
+        """
+        DELETE FROM tickets t
+        USING tickets keep
+        WHERE t.flight_number = keep.flight_number
+          AND t.departure_time = keep.departure_time
+          AND t.user_id IS NULL
+          AND (keep.user_id IS NOT NULL OR keep.id < t.id)
+        """
+    )
+    op.create_unique_constraint('uq_tickets_flight_departure', 'tickets', ['flight_number', 'departure_time'])
+
+
+def downgrade() -> None:
+    """Drop the unique key; unbooked offers must be removed before user_id is NOT NULL again."""
+    op.drop_constraint('uq_tickets_flight_departure', 'tickets', type_='unique')
+    op.execute("DELETE FROM tickets WHERE user_id IS NULL")
+    op.alter_column('tickets', 'user_id', existing_type=sa.Integer(), nullable=False)
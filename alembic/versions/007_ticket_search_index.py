@@ -0,0 +1,35 @@
+"""ticket_search_index
+
+Revision ID: 007
+Revises: 006
+Create Date: 2026-10-19
+
+Composite index for cached ticket search (origin, destination equality plus
+a departure_time range). Built CONCURRENTLY so large tickets tables stay
+writable while it is created.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '007_ticket_search_index'
+down_revision: Union[str, None] = '006_ticket_offer_key'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Create ix_tickets_route_departure."""
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_tickets_route_departure', 'tickets', ['origin', 'destination', 'departure_time'],
+            postgresql_concurrently=True
+        )
+
+
+def downgrade() -> None:
+    """Drop ix_tickets_route_departure."""
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_tickets_route_departure', 'tickets', postgresql_concurrently=True)
@@ -0,0 +1,37 @@
+"""ticket_route_fetches
+
+Revision ID: 008
+Revises: 007
+Create Date: 2026-10-19
+
+Per route/date record of the last upstream ticket fetch, used by the
+stale-while-revalidate ticket search.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '008_ticket_route_fetches'
+down_revision: Union[str, None] = '007_ticket_search_index'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Create ticket_route_fetches."""
+    op.create_table(
+        'ticket_route_fetches',
+        sa.Column('origin', sa.String(), primary_key=True),
+        sa.Column('destination', sa.String(), primary_key=True),
+        sa.Column('departure_date', sa.Date(), primary_key=True),
+        sa.Column('last_fetched_at', sa.DateTime(), nullable=False),
+        sa.Column('ttl_seconds', sa.Integer(), nullable=True),
+    )
+
+
+def downgrade() -> None:
+    """Drop ticket_route_fetches."""
+    op.drop_table('ticket_route_fetches')
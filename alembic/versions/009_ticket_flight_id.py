@@ -0,0 +1,43 @@
+"""ticket_flight_id
+
+Revision ID: 009
+Revises: 008
+Create Date: 2026-10-19
+
+Reference the booked flight from tickets instead of inserting a flight row
+per booking. Existing booked tickets are linked to the flight with the same
+number departing on the same day.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '009_ticket_flight_id'
+down_revision: Union[str, None] = '008_ticket_route_fetches'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Add tickets.flight_id and backfill it for booked tickets."""
+    op.add_column('tickets', sa.Column('flight_id', sa.Integer(), sa.ForeignKey('flights.id'), nullable=True))
+    op.create_index('ix_tickets_flight_id', 'tickets', ['flight_id'])
+    op.execute(
+        """
+        UPDATE tickets t
+        SET flight_id = f.id
+        FROM flights f
+        WHERE f.flight_number = t.flight_number
+          AND f.departure_time::date = t.departure_time::date
+          AND t.user_id IS NOT NULL
+        """
+    )
+
+
+def downgrade() -> None:
+    """Drop tickets.flight_id."""
+    op.drop_index('ix_tickets_flight_id', 'tickets')
+    op.drop_column('tickets', 'flight_id')
@@ -0,0 +1,43 @@
+"""luggage_events
+
+Revision ID: 010
+Revises: 009
+Create Date: 2026-10-19
+
+Append-only luggage scan log, plus luggage.last_scanned_at so the latest
+status only moves forward when scans arrive late or out of order.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '010_luggage_events'
+down_revision: Union[str, None] = '009_ticket_flight_id'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Create luggage_events and add luggage.last_scanned_at."""
+    op.create_table(
+        'luggage_events',
+        sa.Column('id', sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column('luggage_id', sa.Integer(), sa.ForeignKey('luggage.luggage_id', ondelete='CASCADE'), nullable=False),
+        sa.Column('status', sa.String(), nullable=False),
+        sa.Column('location', sa.String(), nullable=False),
+        sa.Column('scanner_id', sa.String(), nullable=True),
+        sa.Column('scanned_at', sa.DateTime(), nullable=False),
+        sa.Column('received_at', sa.DateTime(), nullable=False, server_default=sa.text("timezone('utc', now())")),
+    )
+    op.create_index('ix_luggage_events_luggage_scanned', 'luggage_events', ['luggage_id', 'scanned_at'])
+    op.add_column('luggage', sa.Column('last_scanned_at', sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    """Drop luggage_events and luggage.last_scanned_at."""
+    op.drop_column('luggage', 'last_scanned_at')
+    op.drop_index('ix_luggage_events_luggage_scanned', 'luggage_events')
+    op.drop_table('luggage_events')
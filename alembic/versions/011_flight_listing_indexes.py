@@ -0,0 +1,44 @@
+"""flight_listing_indexes
+
+Revision ID: 011
+Revises: 010
+Create Date: 2026-10-19
+
+Indexes behind the flight listing: (departure_time, id) matches the keyset
+ORDER BY, so pages are read in index order instead of sorting the table, and
+(origin, destination) serves the route filters. Both were only declared on
+the model until now. A single-column ix_flights_departure left by
+create_all is superseded and dropped. Built CONCURRENTLY so flights stay
+writable.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '011_flight_listing_indexes'
+down_revision: Union[str, None] = '010_luggage_events'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Create ix_flights_departure_id and ix_flights_origin_destination."""
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_flights_departure_id "
+            "ON flights (departure_time, id)"
+        )
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_flights_origin_destination "
+            "ON flights (origin, destination)"
+        )
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_flights_departure")
+
+
+def downgrade() -> None:
+    """Drop the flight listing indexes."""
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_flights_origin_destination")
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_flights_departure_id")
@@ -0,0 +1,56 @@
+"""flight_departure_date
+
+Revision ID: 012
+Revises: 011
+Create Date: 2026-10-19
+
+Key flights on (flight_number, departure_date) instead of flight_number
+alone, so a flight number flown every day gets one row per day. Ingestion
+and booking upsert on the new pair. Tickets that an earlier backfill linked
+to another day's row are relinked to their own day's row, or left unlinked
+when that day has none.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '012_flight_departure_date'
+down_revision: Union[str, None] = '011_flight_listing_indexes'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Add flights.departure_date, swap the unique key and fix ticket links."""
+    op.add_column('flights', sa.Column('departure_date', sa.Date(), nullable=True))
+    op.execute("UPDATE flights SET departure_date = departure_time::date")
+    op.alter_column('flights', 'departure_date', nullable=False)
+
+    op.drop_index('ix_flights_flight_number', 'flights')
+    op.create_unique_constraint(
+        'uq_flights_number_departure_date', 'flights', ['flight_number', 'departure_date']
+    )
+
+    op.execute(
+        """
+        UPDATE tickets t
+        SET flight_id = (
+            SELECT f.id FROM flights f
+            WHERE f.flight_number = t.flight_number
+              AND f.departure_date = t.departure_time::date
+        )
+        FROM flights linked
+        WHERE linked.id = t.flight_id
+          AND linked.departure_date <> t.departure_time::date
+        """
+    )
+
+
+def downgrade() -> None:
+    """Restore the unique flight_number index (fails while a number has rows on several days)."""
+    op.drop_constraint('uq_flights_number_departure_date', 'flights', type_='unique')
+    op.create_index('ix_flights_flight_number', 'flights', ['flight_number'], unique=True)
+    op.drop_column('flights', 'departure_date')
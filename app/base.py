@@ -9,7 +9,9 @@ from .models.flight import Flight
 from .models.location import Location
 from .models.path import Path
 from .models.ticket import Ticket
+from .models.ticket_route import TicketRouteFetch
 from .models.luggage import Luggage
+from .models.luggage_event import LuggageEvent
 from .models.users import User
 from .models.messages import Message
 from .models.hotel import Hotel
@@ -0,0 +1,13 @@
+"""In-memory caches backing FlyEase's hot read paths."""
+from .map_graph import map_graph_cache
+from .wait_times import wait_time_estimator
+from .flight_cache import flight_tracking_cache
+from .flight_board import flight_board_registry
+from .fare_calendar import fare_calendar_cache
+from .idempotency import idempotency_store
+from .luggage_status import luggage_status_cache
+from .singleflight import SingleFlight
+from .ttl_cache import KeyedTTLCache
+
+__all__ = ["map_graph_cache", "wait_time_estimator", "flight_tracking_cache", "flight_board_registry", "fare_calendar_cache",
+           "idempotency_store", "luggage_status_cache", "SingleFlight", "KeyedTTLCache"]
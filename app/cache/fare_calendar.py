@@ -0,0 +1,13 @@
+"""
+Cache of per-day fare aggregates for a route and month.
+
+Entries are invalidated whenever offers on the route/month are cached or
+booked in this process; the TTL only bounds staleness from other processes.
+"""
+from app.core.settings import settings
+from app.cache.ttl_cache import KeyedTTLCache
+
+# Global fare calendar cache instance: (origin, destination, year, month) -> calendar payload
+fare_calendar_cache = KeyedTTLCache(
+    settings.FARE_CALENDAR_CACHE_SIZE, settings.FARE_CALENDAR_CACHE_TTL_SECONDS
+)
@@ -0,0 +1,214 @@
+"""
+Materialized departures/arrivals boards.
+
+A board per airport holds the flights departing from or arriving at it
+within the display window. It is built from the DB once, patched in place
+whenever a flight is written, and rebuilt periodically so flights slide
+into the window as time passes. Serialized snapshots are cached with a
+content ETag, and every patch is pushed to WebSocket subscribers of
+"board:<airport>".
+"""
+import asyncio
+import hashlib
+import json
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, Optional, Set, Tuple
+
+from sqlalchemy import and_, or_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from app.core.settings import settings
+from app.models.flight import Flight
+from app.websocket.notifications import manager
+
+BOARD_FIELDS = ("flight_number", "departure_date", "airline_name", "origin", "destination",
+                "departure_time", "arrival_time", "status", "gate")
+
+
+def board_row(flight: Flight) -> dict:
+    """Board fields of an ORM flight."""
+    return {field: getattr(flight, field) for field in BOARD_FIELDS}
+
+
+def board_key(row: dict) -> tuple:
+    """A flight's identity on boards: its number and scheduled day (flights rows are unique on both)."""
+    return row["flight_number"], row["departure_date"]
+
+
+def board_topic(airport: str) -> str:
+    return f"board:{airport}"
+
+
+def _entry(row: dict, side: str) -> dict:
+    """Display entry for one side of the board."""
+    other = row["destination"] if side == "departures" else row["origin"]
+    time_field = "departure_time" if side == "departures" else "arrival_time"
+    return {
+        "flight_number": row["flight_number"],
+        "departure_date": row["departure_date"],
+        "airline_name": row["airline_name"],
+        "destination" if side == "departures" else "origin": other,
+        "scheduled_time": row[time_field],
+        "status": row["status"],
+        "gate": row["gate"] if side == "departures" else None,
+    }
+
+
+def _serialize(entry: dict) -> dict:
+    return {
+        **entry,
+        "departure_date": entry["departure_date"].isoformat(),
+        "scheduled_time": entry["scheduled_time"].isoformat(),
+    }
+
+
+class FlightBoard:
+    """Departures and arrivals of one airport, keyed by board_key."""
+
+    def __init__(self, airport: str, rows: Iterable[dict]):
+        self.airport = airport
+        self.built_at = datetime.utcnow()
+        self.version = 0
+        self.departures: Dict[tuple, dict] = {}
+        self.arrivals: Dict[tuple, dict] = {}
+        self._snapshot: Optional[Tuple[tuple, str, bytes]] = None
+        for row in rows:
+            self.apply(row)
+
+    def apply(self, row: dict) -> bool:
+        """Insert, update or drop one flight. Returns True if the board changed."""
+        changed = False
+        key = board_key(row)
+        for side, board, airport_field in (
+            ("departures", self.departures, "origin"),
+            ("arrivals", self.arrivals, "destination"),
+        ):
+            if row[airport_field] == self.airport:
+                entry = _entry(row, side)
+                if board.get(key) != entry:
+                    board[key] = entry
+                    changed = True
+            elif board.pop(key, None) is not None:
+                changed = True
+        if changed:
+            self.version += 1
+        return changed
+
+    def snapshot(self, now: Optional[datetime] = None) -> Tuple[str, bytes]:
+        """
+        (ETag, JSON body) of the flights visible now, ordered by time.
+        Serialized at most once per board version and minute of the sliding window.
+        """
+        now = now or datetime.utcnow()
+        key = (self.version, now.replace(second=0, microsecond=0))
+        if self._snapshot and self._snapshot[0] == key:
+            return self._snapshot[1], self._snapshot[2]
+
+        start = key[1] - timedelta(minutes=settings.FLIGHT_BOARD_LOOKBACK_MINUTES)
+        end = key[1] + timedelta(hours=settings.FLIGHT_BOARD_HOURS)
+
+        def visible(board: Dict[tuple, dict]):
+            entries = [e for e in board.values() if start <= e["scheduled_time"] < end]
+            entries.sort(key=lambda e: (e["scheduled_time"], e["flight_number"]))
+            return [_serialize(e) for e in entries]
+
+        body = json.dumps({
+            "airport": self.airport,
+            "departures": visible(self.departures),
+            "arrivals": visible(self.arrivals),
+        }).encode()
+        etag = f'"{hashlib.sha1(body).hexdigest()}"'
+        self._snapshot = (key, etag, body)
+        return etag, body
+
+
+class FlightBoardRegistry:
+    """Boards of every airport that has been requested, plus change fan-out."""
+
+    def __init__(self):
+        self._boards: Dict[str, FlightBoard] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+        # board_key -> airports whose boards hold the flight, so a patch only touches those boards
+        self._placements: Dict[tuple, Set[str]] = {}
+
+    async def get(self, db: AsyncSession, airport: str) -> FlightBoard:
+        """Return the airport's board, (re)building it when missing or due for a refresh."""
+        board = self._boards.get(airport)
+        if board and not self._expired(board):
+            return board
+
+        lock = self._locks.setdefault(airport, asyncio.Lock())
+        async with lock:
+            board = self._boards.get(airport)
+            if board and not self._expired(board):
+                return board
+            board = await self._build(db, airport)
+            self._boards[airport] = board
+            for key in (*board.departures, *board.arrivals):
+                self._placements.setdefault(key, set()).add(airport)
+            return board
+
+    @staticmethod
+    def _expired(board: FlightBoard) -> bool:
+        age = datetime.utcnow() - board.built_at
+        return age > timedelta(seconds=settings.FLIGHT_BOARD_REBUILD_SECONDS)
+
+    async def _build(self, db: AsyncSession, airport: str) -> FlightBoard:
+        now = datetime.utcnow()
+        start = now - timedelta(minutes=settings.FLIGHT_BOARD_LOOKBACK_MINUTES)
+        # Load past the window by one rebuild interval so flights sliding in are already present
+        end = now + timedelta(hours=settings.FLIGHT_BOARD_HOURS, seconds=settings.FLIGHT_BOARD_REBUILD_SECONDS)
+        result = await db.execute(
+            select(*(getattr(Flight, field) for field in BOARD_FIELDS)).where(or_(
+                and_(Flight.origin == airport, Flight.departure_time >= start, Flight.departure_time < end),
+                and_(Flight.destination == airport, Flight.arrival_time >= start, Flight.arrival_time < end),
+            ))
+        )
+        return FlightBoard(airport, (row._asdict() for row in result.all()))
+
+    async def apply(self, rows: Iterable[dict]):
+        """
+        Patch materialized boards with written flights and push the changes
+        to subscribed displays.
+        """
+        updates: Dict[str, list] = {}
+        for row in rows:
+            current = {row["origin"], row["destination"]}
+            # The row's airports plus the ones it was on before, in case it moved
+            placed = self._placements.pop(board_key(row), set())
+            for airport in current | placed:
+                board = self._boards.get(airport)
+                changed = board.apply(row) if board else airport in current
+                if changed:
+                    updates.setdefault(airport, []).append(row)
+            held = {airport for airport in current if airport in self._boards}
+            if held:
+                self._placements[board_key(row)] = held
+
+        for airport, changed_rows in updates.items():
+            topic = board_topic(airport)
+            if not manager.has_subscribers(topic):
+                continue
+            board = self._boards.get(airport)
+            await manager.publish(topic, json.dumps({
+                "type": "board_update",
+                "airport": airport,
+                "etag": board.snapshot()[0] if board else None,
+                "departures": [_serialize(_entry(r, "departures")) for r in changed_rows if r["origin"] == airport],
+                "arrivals": [_serialize(_entry(r, "arrivals")) for r in changed_rows if r["destination"] == airport],
+                "removed": [
+                    {"flight_number": r["flight_number"], "departure_date": r["departure_date"].isoformat()}
+                    for r in changed_rows
+                    if airport not in (r["origin"], r["destination"])
+                ],
+            }))
+
+    def clear(self):
+        self._boards.clear()
+        self._locks.clear()
+        self._placements.clear()
+
+
+# Global board registry instance
+flight_board_registry = FlightBoardRegistry()
@@ -0,0 +1,15 @@
+"""
+Read-through cache for flight tracking.
+
+Tracking responses are kept per flight number for a short TTL. Every code
+path that writes a flight (admin edits, ingestion, manual creation)
+invalidates its entry, so the TTL only bounds staleness from writers in
+other processes.
+"""
+from app.core.settings import settings
+from app.cache.ttl_cache import KeyedTTLCache
+
+# Global tracking cache instance: flight_number -> tracking payload
+flight_tracking_cache = KeyedTTLCache(
+    settings.FLIGHT_TRACK_CACHE_SIZE, settings.FLIGHT_TRACK_CACHE_TTL_SECONDS
+)
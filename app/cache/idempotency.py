@@ -0,0 +1,87 @@
+"""
+Idempotency-Key support for retried POST requests.
+
+The outcome of the first request made with a key is kept for a bounded TTL
+and replayed for retries carrying the same key, so a retry is a dictionary
+lookup instead of a second transaction or upstream call. Retries that arrive
+while the first request is still running join it. Keys are scoped by the
+caller (endpoint, user) and bound to a fingerprint of the request body, so a
+key cannot be replayed against a different request.
+
+Only successes and client errors (4xx) are stored; a server or upstream
+failure leaves the key free to be retried. The store is per process.
+"""
+import hashlib
+import json
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+
+from cachetools import TTLCache
+from fastapi import HTTPException
+
+from app.cache.singleflight import SingleFlight
+from app.core.settings import settings
+
+
+def request_fingerprint(payload: Any) -> str:
+    """Stable hash of a JSON-serialisable request body."""
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+
+
+class IdempotencyStore:
+    """TTL'd mapping of scoped idempotency key -> (fingerprint, outcome)."""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self._outcomes: TTLCache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._pending: Dict[Hashable, str] = {}
+        self._flights = SingleFlight()
+
+    async def run(self, key: Hashable, fingerprint: str, fn: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """
+        Result of `fn()` for `key`, and whether it was replayed rather than computed.
+        Stored client errors are re-raised on replay.
+        """
+        stored = self._outcomes.get(key)
+        if stored is not None:
+            stored_fingerprint, outcome = stored
+            self._check_fingerprint(stored_fingerprint, fingerprint)
+            if isinstance(outcome, HTTPException):
+                raise outcome
+            return outcome, True
+
+        pending = self._pending.get(key)
+        if pending is not None:
+            # The shared task clears _pending before it finishes, so it is still in flight here
+            self._check_fingerprint(pending, fingerprint)
+            return await self._flights.do(key, fn), True
+
+        self._pending[key] = fingerprint
+        return await self._flights.do(key, lambda: self._record(key, fingerprint, fn)), False
+
+    async def _record(self, key: Hashable, fingerprint: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Run `fn()` and store its outcome before the key is released, inside the
+        shared task: a retry sees either the running task or the stored outcome.
+        """
+        try:
+            result = await fn()
+        except HTTPException as e:
+            if e.status_code < 500:
+                self._outcomes[key] = (fingerprint, e)
+            raise
+        finally:
+            self._pending.pop(key, None)
+        self._outcomes[key] = (fingerprint, result)
+        return result
+
+    @staticmethod
+    def _check_fingerprint(stored: str, fingerprint: str):
+        if stored != fingerprint:
+            raise HTTPException(status_code=422, detail="Idempotency-Key was already used for a different request.")
+
+    def clear(self):
+        self._outcomes.clear()
+        self._pending.clear()
+
+
+# Global idempotency store instance
+idempotency_store = IdempotencyStore(settings.IDEMPOTENCY_MAX_KEYS, settings.IDEMPOTENCY_TTL_SECONDS)
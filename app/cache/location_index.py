@@ -0,0 +1,118 @@
+"""
+In-memory typeahead index over airport locations.
+
+Every word of a location's name, type, category and description is indexed
+by all of its prefixes (edge n-grams), so a prefix query is a dictionary
+lookup. Words that match no prefix fall back to trigram similarity against
+the index vocabulary to tolerate typos ("cofee" -> "coffee").
+"""
+import heapq
+import re
+from typing import Dict, List, Set
+
+from cachetools import LRUCache
+
+# Field weights used to rank matches: a hit in the name beats a hit in the description
+FIELD_WEIGHTS = {"name": 4, "type": 2, "category": 2, "description": 1}
+MAX_PREFIX_LENGTH = 20
+MIN_TRIGRAM_SIMILARITY = 0.4
+QUERY_CACHE_SIZE = 512
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text) -> List[str]:
+    """Lowercase alphanumeric words of a text."""
+    return _TOKEN_RE.findall(str(text).lower()) if text else []
+
+
+def _trigrams(word: str) -> Set[str]:
+    padded = f"  {word} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class LocationSearchIndex:
+    """Prefix + trigram index over a fixed set of location dicts."""
+
+    def __init__(self, locations: Dict[int, dict]):
+        self.locations = locations
+        self._names = {location_id: " ".join(tokenize(loc.get("name"))) for location_id, loc in locations.items()}
+        # Typeahead repeats the same short queries constantly
+        self._results: LRUCache = LRUCache(maxsize=QUERY_CACHE_SIZE)
+        # prefix -> {location_id: best field weight}
+        self._prefixes: Dict[str, Dict[int, int]] = {}
+        # full word -> {location_id: best field weight}
+        self._words: Dict[str, Dict[int, int]] = {}
+        # trigram -> words containing it
+        self._trigrams: Dict[str, Set[str]] = {}
+
+        for location_id, location in locations.items():
+            for field, weight in FIELD_WEIGHTS.items():
+                for word in tokenize(location.get(field)):
+                    self._add(self._words, word, location_id, weight)
+                    for end in range(1, min(len(word), MAX_PREFIX_LENGTH) + 1):
+                        self._add(self._prefixes, word[:end], location_id, weight)
+
+        for word in self._words:
+            for trigram in _trigrams(word):
+                self._trigrams.setdefault(trigram, set()).add(word)
+
+    @staticmethod
+    def _add(index: Dict[str, Dict[int, int]], key: str, location_id: int, weight: int):
+        hits = index.setdefault(key, {})
+        if hits.get(location_id, 0) < weight:
+            hits[location_id] = weight
+
+    def _fuzzy_hits(self, token: str) -> Dict[int, int]:
+        """Locations containing a word similar to token, weighted by similarity."""
+        grams = _trigrams(token)
+        candidates: Dict[str, int] = {}
+        for gram in grams:
+            for word in self._trigrams.get(gram, ()):
+                candidates[word] = candidates.get(word, 0) + 1
+
+        hits: Dict[int, int] = {}
+        for word, shared in candidates.items():
+            similarity = shared / len(grams | _trigrams(word))
+            if similarity < MIN_TRIGRAM_SIMILARITY:
+                continue
+            for location_id, weight in self._words[word].items():
+                # Fuzzy hits rank below exact prefix hits of the same field
+                score = max(1, int(weight * similarity))
+                if hits.get(location_id, 0) < score:
+                    hits[location_id] = score
+        return hits
+
+    def search(self, query: str, limit: int = 10) -> List[dict]:
+        """Locations matching every word of the query, best matches first."""
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+        cache_key = (" ".join(tokens), limit)
+        cached = self._results.get(cache_key)
+        if cached is not None:
+            return cached
+
+        scores: Dict[int, int] = {}
+        for position, token in enumerate(tokens):
+            hits = self._prefixes.get(token[:MAX_PREFIX_LENGTH]) or self._fuzzy_hits(token)
+            if position == 0:
+                scores = dict(hits)
+            else:
+                scores = {
+                    location_id: score + hits[location_id]
+                    for location_id, score in scores.items()
+                    if location_id in hits
+                }
+            if not scores:
+                break
+
+        phrase = cache_key[0]
+        ranked = heapq.nsmallest(
+            limit,
+            scores.items(),
+            key=lambda item: (not self._names[item[0]].startswith(phrase), -item[1], self._names[item[0]]),
+        )
+        results = [self.locations[location_id] for location_id, _ in ranked]
+        self._results[cache_key] = results
+        return results
@@ -0,0 +1,82 @@
+"""
+Latest luggage status, cached in memory and pushed to subscribers.
+
+Luggage tracking reads through this cache, so clients polling at baggage
+claim are answered from memory. Scan ingestion writes the new status through
+to cached entries and publishes it on the bag's "luggage:<id>" WebSocket
+topic; the TTL only bounds staleness from scans ingested by other processes.
+"""
+import json
+from datetime import datetime
+from typing import Iterable, Optional
+
+from cachetools import TTLCache
+
+from app.core.settings import settings
+from app.websocket.notifications import manager
+
+# Fields a scan can change
+SCAN_FIELDS = ("status", "last_location", "last_scanned_at")
+
+
+def luggage_topic(luggage_id: int) -> str:
+    return f"luggage:{luggage_id}"
+
+
+def _serialize(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+class LuggageStatusCache:
+    """TTL'd mapping of luggage_id -> tracking payload."""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self._entries: TTLCache = TTLCache(maxsize=maxsize, ttl=ttl)
+        # luggage_id -> last_scanned_at of the newest scan applied, cached or not
+        self._applied: TTLCache = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    def get(self, luggage_id: int) -> Optional[dict]:
+        return self._entries.get(luggage_id)
+
+    def set(self, luggage_id: int, payload: dict):
+        """
+        Cache a payload read from the DB, unless a newer scan was applied while
+        the read was in flight (the payload would be stale).
+        """
+        applied = self._applied.get(luggage_id)
+        scanned_at = payload.get("last_scanned_at")
+        if applied is not None and (scanned_at is None or datetime.fromisoformat(scanned_at) < applied):
+            return
+        self._entries[luggage_id] = payload
+
+    async def apply(self, rows: Iterable[dict]):
+        """
+        Write scanned bags' new state through to cached entries and push it to
+        the bags' subscribers.
+        """
+        for row in rows:
+            applied = self._applied.get(row["luggage_id"])
+            if applied is None or row["last_scanned_at"] > applied:
+                self._applied[row["luggage_id"]] = row["last_scanned_at"]
+            changes = {field: _serialize(row[field]) for field in SCAN_FIELDS}
+            cached = self._entries.get(row["luggage_id"])
+            if cached is not None:
+                self._entries[row["luggage_id"]] = {**cached, **changes}
+
+            topic = luggage_topic(row["luggage_id"])
+            if manager.has_subscribers(topic):
+                await manager.publish(topic, json.dumps({
+                    "type": "luggage_status",
+                    "luggage_id": row["luggage_id"],
+                    **changes,
+                }))
+
+    def clear(self):
+        self._entries.clear()
+        self._applied.clear()
+
+
+# Global luggage status cache instance
+luggage_status_cache = LuggageStatusCache(
+    settings.LUGGAGE_STATUS_CACHE_SIZE, settings.LUGGAGE_STATUS_CACHE_TTL_SECONDS
+)
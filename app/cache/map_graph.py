@@ -0,0 +1,384 @@
+"""
+Per-airport navigation graph cache.
+
+Each airport (optionally narrowed to a terminal) is loaded once into a
+MapPartition holding its locations and a wall-filtered adjacency list.
+Partitions are kept in an LRU cache bounded by an approximate memory budget,
+so hot airports stay resident and cold ones are evicted.
+"""
+import asyncio
+import heapq
+import logging
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from cachetools import Cache, LRUCache
+from sqlalchemy import or_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from app.cache.location_index import LocationSearchIndex
+from app.core.settings import settings
+from app.models.location import Location
+from app.models.path import Path
+from app.models.wall import Wall
+
+logger = logging.getLogger(__name__)
+
+PartitionKey = Tuple[str, Optional[str]]
+
+# Rough per-object footprints used to size partitions against the memory budget
+# (a location's share includes its entries in the search index)
+_LOCATION_BYTES = 1500
+_EDGE_BYTES = 160
+_WALL_BYTES = 120
+
+# Each congestion level above 1 makes an edge this much slower to walk (10 -> 1.9x)
+CONGESTION_PENALTY = 0.1
+# Memoized single-source searches kept per partition (one per polled start location)
+DISTANCE_CACHE_SIZE = 256
+# Heatmap resolutions kept per partition for the current congestion epoch
+HEATMAP_CACHE_SIZE = 8
+MAX_HEATMAP_CELLS = 1_000_000
+
+
+def line_segments_intersect(p1, q1, p2, q2):
+    """Check if two line segments (p1q1 and p2q2) intersect."""
+
+    def orientation(a, b, c):
+        val = (b[1] - a[1]) * (c[0] - b[0]) - (b[0] - a[0]) * (c[1] - b[1])
+        if val == 0:
+            return 0  # Collinear
+        return 1 if val > 0 else 2  # Clockwise or counterclockwise
+
+    def on_segment(a, b, c):
+        return (
+            min(a[0], b[0]) <= c[0] <= max(a[0], b[0])
+            and min(a[1], b[1]) <= c[1] <= max(a[1], b[1])
+        )
+
+    o1 = orientation(p1, q1, p2)
+    o2 = orientation(p1, q1, q2)
+    o3 = orientation(p2, q2, p1)
+    o4 = orientation(p2, q2, q1)
+
+    if o1 != o2 and o3 != o4:
+        return True
+
+    # Special cases
+    if o1 == 0 and on_segment(p1, q1, p2):
+        return True
+    if o2 == 0 and on_segment(p1, q1, q2):
+        return True
+    if o3 == 0 and on_segment(p2, q2, p1):
+        return True
+    if o4 == 0 and on_segment(p2, q2, q1):
+        return True
+
+    return False
+
+
+class MapPartition:
+    """
+    Immutable snapshot of one airport (or terminal) map, ready for routing.
+    Edges crossing a wall are dropped once at build time instead of on every search.
+    """
+
+    def __init__(self, airport_code: str, terminal: Optional[str], version: int,
+                 locations: list, paths: list, walls: list):
+        self.airport_code = airport_code
+        self.terminal = terminal
+        self.version = version
+        self.locations: Dict[int, dict] = {
+            loc.id: {
+                "id": loc.id,
+                "name": loc.name,
+                "type": loc.type,
+                "category": loc.category,
+                "description": loc.description,
+                "terminal": loc.terminal,
+                "coordinates": loc.coordinates,
+            }
+            for loc in locations
+        }
+        self.wall_segments = [((w.x1, w.y1), (w.x2, w.y2)) for w in walls]
+
+        # adjacency: node -> [(neighbor, distance, path_id)]
+        self.adjacency: Dict[int, List[Tuple[int, float, int]]] = {}
+        self.congestion: Dict[int, int] = {}
+        # path_id -> midpoint of the edge, used to bin congestion spatially
+        self.edge_midpoints: Dict[int, Tuple[float, float]] = {}
+        # location_id -> ids of paths leading into it
+        self.inbound: Dict[int, List[int]] = {}
+        edge_count = 0
+        for path in paths:
+            source = self.locations.get(path.source_id)
+            destination = self.locations.get(path.destination_id)
+            if not source or not destination:
+                continue
+            a = (source["coordinates"]["x"], source["coordinates"]["y"])
+            b = (destination["coordinates"]["x"], destination["coordinates"]["y"])
+            if self._intersects_wall(a, b):
+                continue
+            self.adjacency.setdefault(path.source_id, []).append((path.destination_id, path.distance, path.id))
+            self.adjacency.setdefault(path.destination_id, []).append((path.source_id, path.distance, path.id))
+            self.congestion[path.id] = path.congestion or 1
+            self.edge_midpoints[path.id] = ((a[0] + b[0]) / 2, (a[1] + b[1]) / 2)
+            self.inbound.setdefault(path.destination_id, []).append(path.id)
+            edge_count += 2
+
+        self.estimated_bytes = (
+            _LOCATION_BYTES * len(self.locations)
+            + _EDGE_BYTES * edge_count
+            + _WALL_BYTES * len(self.wall_segments)
+        ) or 1
+        self._search_index: Optional[LocationSearchIndex] = None
+        self._gates: Optional[Dict[str, int]] = None
+        # Bumped whenever edge congestion changes; derived results are keyed on it
+        self.congestion_epoch = 0
+        self._distances: LRUCache = LRUCache(maxsize=DISTANCE_CACHE_SIZE)
+        self._heatmaps: LRUCache = LRUCache(maxsize=HEATMAP_CACHE_SIZE)
+        self._edge_ids = np.fromiter(self.edge_midpoints.keys(), dtype=np.int64, count=len(self.edge_midpoints))
+        self._edge_xy = np.array(list(self.edge_midpoints.values()), dtype=np.float64).reshape(-1, 2)
+
+    @property
+    def search_index(self) -> LocationSearchIndex:
+        """Typeahead index over this partition's locations, built on first use."""
+        if self._search_index is None:
+            self._search_index = LocationSearchIndex(self.locations)
+        return self._search_index
+
+    def find_gate(self, gate: Optional[str]) -> Optional[int]:
+        """Location id of a gate given as "B2" or "Gate B2"."""
+        if not gate:
+            return None
+        if self._gates is None:
+            self._gates = {}
+            for location in self.locations.values():
+                if location["type"] != "gate":
+                    continue
+                name = " ".join(location["name"].lower().split())
+                self._gates[name] = location["id"]
+                self._gates.setdefault(name.removeprefix("gate "), location["id"])
+        name = " ".join(gate.lower().split())
+        return self._gates.get(name) or self._gates.get(name.removeprefix("gate "))
+
+    def apply_congestion(self, congestion: Dict[int, int]) -> bool:
+        """Patch edge congestion in place. Returns True if any edge of this partition changed."""
+        changed = False
+        for path_id, value in congestion.items():
+            if path_id in self.congestion and self.congestion[path_id] != value:
+                self.congestion[path_id] = value
+                changed = True
+        if changed:
+            self.congestion_epoch += 1
+            self._distances.clear()
+            self._heatmaps.clear()
+        return changed
+
+    def congestion_heatmap(self, cell_size: float) -> dict:
+        """
+        Average edge congestion binned into square cells of cell_size map units.
+        Computed with numpy in one pass over all edges and cached until the next
+        congestion change. Only non-empty cells are returned.
+        """
+        cached = self._heatmaps.get(cell_size)
+        if cached is not None:
+            return cached
+
+        heatmap = {
+            "airport_code": self.airport_code,
+            "terminal": self.terminal,
+            "congestion_epoch": self.congestion_epoch,
+            "cell_size": cell_size,
+            "origin": None,
+            "width": 0,
+            "height": 0,
+            "cells": [],
+        }
+        if len(self._edge_ids):
+            origin = self._edge_xy.min(axis=0)
+            cells_xy = np.floor((self._edge_xy - origin) / cell_size).astype(np.int64)
+            width, height = (cells_xy.max(axis=0) + 1).tolist()
+            if width * height > MAX_HEATMAP_CELLS:
+                raise ValueError("cell_size is too small for this map")
+
+            congestion = np.fromiter(
+                (self.congestion[path_id] for path_id in self._edge_ids.tolist()),
+                dtype=np.float64, count=len(self._edge_ids)
+            )
+            flat = cells_xy[:, 1] * width + cells_xy[:, 0]
+            counts = np.bincount(flat, minlength=width * height)
+            totals = np.bincount(flat, weights=congestion, minlength=width * height)
+            peaks = np.zeros(width * height)
+            np.maximum.at(peaks, flat, congestion)
+
+            occupied = np.nonzero(counts)[0]
+            averages = totals[occupied] / counts[occupied]
+            heatmap.update({
+                "origin": {"x": float(origin[0]), "y": float(origin[1])},
+                "width": width,
+                "height": height,
+                "cells": [
+                    {"x": x, "y": y, "edges": n, "avg_congestion": round(avg, 2), "max_congestion": int(peak)}
+                    for x, y, n, avg, peak in zip(
+                        (occupied % width).tolist(),
+                        (occupied // width).tolist(),
+                        counts[occupied].tolist(),
+                        averages.tolist(),
+                        peaks[occupied].tolist(),
+                    )
+                ],
+            })
+
+        self._heatmaps[cell_size] = heatmap
+        return heatmap
+
+    def distances_from(self, source_id: int) -> Dict[int, float]:
+        """
+        Congestion-adjusted walking cost from one location to every reachable location.
+        One Dijkstra pass answers any number of destinations; results are memoized
+        until the next congestion change.
+        """
+        cached = self._distances.get(source_id)
+        if cached is not None:
+            return cached
+
+        dist = {source_id: 0.0}
+        pq = [(0.0, source_id)]
+        visited = set()
+        while pq:
+            cost, node = heapq.heappop(pq)
+            if node in visited:
+                continue
+            visited.add(node)
+            for neighbor, weight, path_id in self.adjacency.get(node, []):
+                penalty = 1 + CONGESTION_PENALTY * (self.congestion[path_id] - 1)
+                new_cost = cost + weight * penalty
+                if new_cost < dist.get(neighbor, float("inf")):
+                    dist[neighbor] = new_cost
+                    heapq.heappush(pq, (new_cost, neighbor))
+
+        self._distances[source_id] = dist
+        return dist
+
+    def _intersects_wall(self, a, b) -> bool:
+        for start, end in self.wall_segments:
+            if line_segments_intersect(a, b, start, end):
+                return True
+        return False
+
+    def shortest_path(self, source_id: int, destination_id: int):
+        """Dijkstra over the prebuilt adjacency list. Returns (path, cost) or (None, inf)."""
+        dist = {source_id: 0.0}
+        previous: Dict[int, int] = {}
+        pq = [(0.0, source_id)]
+        visited = set()
+
+        while pq:
+            cost, node = heapq.heappop(pq)
+            if node in visited:
+                continue
+            if node == destination_id:
+                path = [node]
+                while node in previous:
+                    node = previous[node]
+                    path.append(node)
+                return path[::-1], cost
+            visited.add(node)
+            for neighbor, weight, _ in self.adjacency.get(node, []):
+                new_cost = cost + weight
+                if new_cost < dist.get(neighbor, float("inf")):
+                    dist[neighbor] = new_cost
+                    previous[neighbor] = node
+                    heapq.heappush(pq, (new_cost, neighbor))
+
+        return None, float("inf")  # No path found
+
+
+class MapGraphCache:
+    """
+    LRU cache of MapPartitions keyed by (airport_code, terminal).
+    The cache is sized in approximate bytes; partitions larger than the
+    whole budget are served but never retained.
+    """
+
+    def __init__(self, max_bytes: int):
+        self._partitions: LRUCache = LRUCache(maxsize=max_bytes, getsizeof=lambda p: p.estimated_bytes)
+        self._versions: Dict[str, int] = {}
+        self._locks: Dict[PartitionKey, asyncio.Lock] = {}
+
+    def version(self, airport_code: str) -> int:
+        """Current map version of an airport; bumped whenever its map is edited."""
+        return self._versions.get(airport_code, 0)
+
+    async def get(self, db: AsyncSession, airport_code: Optional[str] = None,
+                  terminal: Optional[str] = None) -> MapPartition:
+        """Return the cached partition for an airport/terminal, loading it on a miss."""
+        key = (airport_code or settings.DEFAULT_AIRPORT_CODE, terminal)
+        partition = self._partitions.get(key)
+        if partition is not None:
+            return partition
+
+        # One loader per key so a cold airport is not built by every concurrent request
+        lock = self._locks.setdefault(key, asyncio.Lock())
+        async with lock:
+            partition = self._partitions.get(key)
+            if partition is not None:
+                return partition
+            partition = await self._load(db, *key)
+            if partition.version == self.version(key[0]):
+                try:
+                    self._partitions[key] = partition
+                except ValueError:
+                    logger.warning(f"Map partition {key} exceeds the graph cache budget; not cached")
+            return partition
+
+    async def _load(self, db: AsyncSession, airport_code: str, terminal: Optional[str]) -> MapPartition:
+        version = self.version(airport_code)
+
+        location_query = select(Location).where(Location.airport_code == airport_code)
+        wall_query = select(Wall).where(Wall.airport_code == airport_code)
+        if terminal is not None:
+            location_query = location_query.where(Location.terminal == terminal)
+            wall_query = wall_query.where(or_(Wall.terminal == terminal, Wall.terminal.is_(None)))
+
+        locations = (await db.execute(location_query)).scalars().all()
+        paths = (await db.execute(select(Path).where(Path.airport_code == airport_code))).scalars().all()
+        walls = (await db.execute(wall_query)).scalars().all()
+
+        logger.info(f"Built map partition {airport_code}/{terminal or '*'}: {len(locations)} locations")
+        return MapPartition(airport_code, terminal, version, locations, paths, walls)
+
+    def invalidate(self, airport_code: str):
+        """Drop every cached partition of an airport and bump its map version."""
+        self._versions[airport_code] = self.version(airport_code) + 1
+        for key in [k for k in self._partitions.keys() if k[0] == airport_code]:
+            self._partitions.pop(key, None)
+
+    def peek(self, airport_code: str, terminal: Optional[str] = None) -> Optional[MapPartition]:
+        """Cached partition without loading it or marking it recently used."""
+        key = (airport_code, terminal)
+        return Cache.__getitem__(self._partitions, key) if key in self._partitions else None
+
+    def peek_all(self) -> List[MapPartition]:
+        """Every cached partition, without touching LRU order (for background jobs)."""
+        return [Cache.__getitem__(self._partitions, key) for key in list(self._partitions.keys())]
+
+    def cached_airports(self) -> List[str]:
+        """Airports with at least one partition currently in memory."""
+        return sorted({key[0] for key in self._partitions.keys()})
+
+    def apply_congestion(self, congestion: Dict[int, int]):
+        """Push new per-path congestion values into every cached partition."""
+        for partition in self.peek_all():
+            partition.apply_congestion(congestion)
+
+    def clear(self):
+        """Drop all cached partitions."""
+        self._partitions.clear()
+        self._locks.clear()
+
+
+# Global graph cache instance
+map_graph_cache = MapGraphCache(settings.MAP_GRAPH_CACHE_MAX_BYTES)
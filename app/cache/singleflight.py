@@ -0,0 +1,38 @@
+"""
+Request coalescing ("single flight") for expensive upstream calls.
+
+Concurrent callers asking for the same key share one in-flight task and all
+receive its result or exception. The key is forgotten as soon as the task
+finishes, so nothing is cached beyond the lifetime of the call itself.
+"""
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+
+class SingleFlight:
+    """Runs at most one call per key at a time; later callers await the same task."""
+
+    def __init__(self):
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Await `fn()` for `key`, joining the call already in flight if there is one.
+        The shared task is shielded: a caller that goes away (e.g. a client
+        disconnect) does not cancel the work other callers are waiting on, so
+        `fn` must not depend on a request-scoped resource.
+        """
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+            # Mark the exception retrieved even if every caller has gone away
+            task.add_done_callback(lambda t: t.cancelled() or t.exception())
+        return await asyncio.shield(task)
+
+    def in_flight(self, key: Hashable) -> bool:
+        return key in self._inflight
+
+    def clear(self):
+        self._inflight.clear()
@@ -0,0 +1,30 @@
+"""
+Keyed TTL cache with explicit invalidation.
+
+Writers drop the entries they make stale, so the TTL only bounds staleness
+from writers in other processes.
+"""
+from typing import Hashable, Iterable, Optional
+
+from cachetools import TTLCache
+
+
+class KeyedTTLCache:
+    """TTL'd mapping of key -> payload, bounded to `maxsize` entries."""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self._entries: TTLCache = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    def get(self, key: Hashable) -> Optional[dict]:
+        return self._entries.get(key)
+
+    def set(self, key: Hashable, payload: dict):
+        self._entries[key] = payload
+
+    def invalidate(self, keys: Iterable[Hashable]):
+        """Drop the cached entries of keys whose data was written."""
+        for key in keys:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        self._entries.clear()
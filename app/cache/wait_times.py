@@ -0,0 +1,148 @@
+"""
+Security and check-in wait-time estimates.
+
+Each checkpoint is modelled as an M/M/c queue: c open lanes, each serving
+CHECKPOINT_SERVICE_RATE_PER_MIN passengers per minute. The arrival rate is
+derived from the smoothed congestion history of the paths leading into the
+checkpoint. Estimates are recomputed on a background cadence and served
+straight from memory.
+"""
+import asyncio
+import logging
+import math
+from collections import deque
+from datetime import datetime
+from typing import Deque, Dict, Optional, Tuple
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.cache.map_graph import map_graph_cache
+from app.core.settings import settings
+
+logger = logging.getLogger(__name__)
+
+CHECKPOINT_TYPES = ("security", "checkin")
+# Utilization is capped below 1 so a saturated checkpoint has a long but finite queue
+MAX_UTILIZATION = 0.95
+# Weight of the newest congestion sample in the exponential moving average
+SMOOTHING = 0.3
+
+
+def erlang_c_wait(lanes: int, service_rate: float, arrival_rate: float) -> float:
+    """Expected time in queue (minutes) for an M/M/c system."""
+    if arrival_rate <= 0:
+        return 0.0
+    offered = arrival_rate / service_rate  # Erlangs
+    utilization = offered / lanes
+    term = 1.0
+    below = 0.0
+    for k in range(lanes):
+        below += term
+        term *= offered / (k + 1)
+    # term is now offered**lanes / lanes!
+    queued = term / (1 - utilization)
+    probability_wait = queued / (below + queued)
+    return probability_wait / (lanes * service_rate - arrival_rate)
+
+
+def congestion_level(value: float) -> str:
+    """Low/Medium/High label matching calculate_overall_congestion."""
+    if value <= 3:
+        return "Low"
+    elif value <= 6:
+        return "Medium"
+    return "High"
+
+
+class WaitTimeEstimator:
+    """Keeps congestion history per checkpoint and the latest estimates per airport."""
+
+    def __init__(self):
+        self._history: Dict[Tuple[str, int], Deque[float]] = {}
+        self._estimates: Dict[str, dict] = {}
+
+    def get(self, airport_code: Optional[str] = None) -> dict:
+        """Latest precomputed estimates for an airport (no computation)."""
+        airport_code = airport_code or settings.DEFAULT_AIRPORT_CODE
+        return self._estimates.get(
+            airport_code, {"airport_code": airport_code, "computed_at": None, "checkpoints": []}
+        )
+
+    async def refresh(self, db: AsyncSession):
+        """
+        Sample congestion and recompute estimates for the default and all hot airports.
+        Only the default airport is loaded; other airports use their already cached
+        whole-airport partition, peeked without promoting it, so this periodic job
+        does not keep every partition "recently used" and defeat the LRU.
+        """
+        default = await map_graph_cache.get(db, settings.DEFAULT_AIRPORT_CODE)
+        self._estimates[default.airport_code] = self._estimate(default)
+        for partition in map_graph_cache.peek_all():
+            if partition.terminal is None and partition.airport_code != default.airport_code:
+                self._estimates[partition.airport_code] = self._estimate(partition)
+
+    def _estimate(self, partition) -> dict:
+        lanes = settings.CHECKPOINT_LANES
+        service_rate = settings.CHECKPOINT_SERVICE_RATE_PER_MIN
+        checkpoints = []
+
+        for location in partition.locations.values():
+            if location["type"] not in CHECKPOINT_TYPES:
+                continue
+            path_ids = partition.inbound.get(location["id"], [])
+            sample = (
+                sum(partition.congestion[path_id] for path_id in path_ids) / len(path_ids)
+                if path_ids else 1.0
+            )
+            history = self._history.setdefault(
+                (partition.airport_code, location["id"]),
+                deque(maxlen=settings.WAIT_TIME_HISTORY_SIZE)
+            )
+            history.append(sample)
+
+            smoothed = history[0]
+            for value in list(history)[1:]:
+                smoothed = SMOOTHING * value + (1 - SMOOTHING) * smoothed
+
+            utilization = min(smoothed / 10, MAX_UTILIZATION)
+            arrival_rate = utilization * lanes * service_rate
+            wait = erlang_c_wait(lanes, service_rate, arrival_rate) + 1 / service_rate
+
+            checkpoints.append({
+                "location_id": location["id"],
+                "name": location["name"],
+                "type": location["type"],
+                "congestion": round(smoothed, 2),
+                "level": congestion_level(smoothed),
+                "utilization": round(utilization, 2),
+                "wait_minutes": math.ceil(wait),
+            })
+
+        return {
+            "airport_code": partition.airport_code,
+            "computed_at": datetime.utcnow().isoformat(),
+            "checkpoints": checkpoints,
+        }
+
+    def clear(self):
+        """Forget all history and estimates."""
+        self._history.clear()
+        self._estimates.clear()
+
+
+# Global estimator instance
+wait_time_estimator = WaitTimeEstimator()
+
+
+async def run_wait_time_refresher(session_factory, interval: Optional[int] = None):
+    """Background loop recomputing wait times every interval seconds until cancelled."""
+    interval = interval or settings.WAIT_TIME_REFRESH_SECONDS
+    while True:
+        try:
+            async with session_factory() as db:
+                await wait_time_estimator.refresh(db)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Wait-time refresh failed: {e}")
+        await asyncio.sleep(interval)
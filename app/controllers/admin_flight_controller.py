@@ -1,11 +1,14 @@
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import tuple_
 from sqlalchemy.future import select
 from fastapi import HTTPException
 from datetime import datetime
-from app.models.ticket import Ticket 
+from app.models.ticket import Ticket, ticket_flight_join
 from app.models.messages import Message
-from app.models.flight import Flight
+from app.models.flight import Flight, select_current_flight
 from app.websocket.notifications import broadcast_message
+from app.cache.flight_cache import flight_tracking_cache
+from app.cache.flight_board import flight_board_registry, board_row
 
 async def get_all_flights_admin(db: AsyncSession):
     """
@@ -27,10 +30,12 @@ async def create_flight_admin(db: AsyncSession, flight_data: dict):
         if isinstance(flight_data.get("arrival_time"), str):
             flight_data["arrival_time"] = datetime.fromisoformat(flight_data["arrival_time"])
 
-        new_flight = Ticket(**flight_data)
+        new_flight = Flight(**flight_data)
         db.add(new_flight)
         await db.commit()
         await db.refresh(new_flight)
+        flight_tracking_cache.invalidate([new_flight.flight_number])
+        await flight_board_registry.apply([board_row(new_flight)])
         return new_flight.to_dict()
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error saving flight: {str(e)}")
@@ -41,8 +46,8 @@ async def update_flight_admin(db: AsyncSession, flight_number: str, updated_data
     Update an existing flight's details using flight_number (Admin Functionality).
     """
     try:
-        # Fetch the flight record using flight_number
-        result = await db.execute(select(Flight).where(Flight.flight_number == flight_number))
+        # Fetch the current flight record using flight_number
+        result = await db.execute(select_current_flight(flight_number))
         flight = result.scalar_one_or_none()
 
         if not flight:
@@ -60,11 +65,13 @@ async def update_flight_admin(db: AsyncSession, flight_number: str, updated_data
 
         await db.commit()
         await db.refresh(flight)
+        flight_tracking_cache.invalidate({flight_number, flight.flight_number})
+        await flight_board_registry.apply([board_row(flight)])
 
         # Notify users and save to database
         if "status" in updated_data:
             message_content = f"Flight {flight_number} status changed to: {updated_data['status']}"
-            await notify_users_about_flight(flight_number, message_content, db)
+            await notify_users_about_flight((flight.flight_number, flight.departure_date), message_content, db)
 
             # Broadcast WebSocket message
             await broadcast_message(message_content)
@@ -75,17 +82,35 @@ async def update_flight_admin(db: AsyncSession, flight_number: str, updated_data
         raise HTTPException(status_code=500, detail=f"Error updating flight: {str(e)}")
 
 
-async def notify_users_about_flight(flight_number: str, content: str, db: AsyncSession):
+async def notify_users_about_flight(flight_key: tuple, content: str, db: AsyncSession):
     """
-    Notify all users who booked the flight by creating messages.
+    Notify all users who booked the flight, keyed by (flight_number, departure_date), by creating messages.
     """
-    # Get all users with tickets for this flight
-    result = await db.execute(select(Ticket.user_id).where(Ticket.flight_number == flight_number))
-    user_ids = result.scalars().all()
+    await notify_users_about_flights({flight_key: content}, db)
+
+
+async def notify_users_about_flights(contents: dict, db: AsyncSession):
+    """
+    Notify the ticket holders of several flights at once: one query finds the
+    users of every flight in the mapping ((flight_number, departure_date) ->
+    message content), and all messages are committed together.
+    """
+    if not contents:
+        return
+
+    # Get all users with tickets for these flights
+    result = await db.execute(
+        select(Flight.flight_number, Flight.departure_date, Ticket.user_id)
+        .join(Flight, ticket_flight_join())
+        .where(
+            tuple_(Flight.flight_number, Flight.departure_date).in_(list(contents)),
+            Ticket.user_id.isnot(None),  # Cached offers nobody has booked
+        )
+    )
 
     # Create a message for each user
-    for user_id in user_ids:
-        new_message = Message(user_id=user_id, content=content, status="unread")
+    for flight_number, departure_date, user_id in result.all():
+        new_message = Message(user_id=user_id, content=contents[flight_number, departure_date], status="unread")
         db.add(new_message)
 
-    await db.commit()  # Commit the messages
\ No newline at end of file
+    await db.commit()  # Commit the messages
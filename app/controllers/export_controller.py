@@ -0,0 +1,76 @@
+"""
+Streaming exports of flights and tickets.
+
+Rows are read through a server-side cursor in chunks of EXPORT_CHUNK_SIZE
+and encoded chunk by chunk as NDJSON or CSV, so memory stays flat no
+matter how large the table is.
+"""
+import csv
+import io
+import json
+from datetime import datetime
+from typing import AsyncIterator, Sequence
+
+from fastapi import HTTPException
+from sqlalchemy.future import select
+
+from app.models.flight import Flight
+from app.models.ticket import Ticket
+
+EXPORT_CHUNK_SIZE = 1000
+EXPORT_FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+FLIGHT_EXPORT_COLUMNS = (
+    Flight.id, Flight.airline_name, Flight.flight_number, Flight.origin, Flight.destination,
+    Flight.departure_time, Flight.arrival_time, Flight.status, Flight.terminal, Flight.gate,
+)
+TICKET_EXPORT_COLUMNS = (
+    Ticket.id, Ticket.airline_name, Ticket.flight_number, Ticket.origin, Ticket.destination,
+    Ticket.departure_time, Ticket.arrival_time, Ticket.price, Ticket.user_id, Ticket.luggage_id,
+)
+
+
+def _json_value(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+def _encode_ndjson(names: Sequence[str], rows) -> bytes:
+    return "".join(
+        json.dumps({name: _json_value(value) for name, value in zip(names, row)}) + "\n"
+        for row in rows
+    ).encode()
+
+
+def _encode_csv(rows) -> bytes:
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(
+        [value.isoformat() if isinstance(value, datetime) else value for value in row]
+        for row in rows
+    )
+    return buffer.getvalue().encode()
+
+
+async def stream_export(session_factory, columns: Sequence, fmt: str) -> AsyncIterator[bytes]:
+    """
+    Yield encoded chunks of the selected columns, ordered by primary key.
+    Opens its own session: the request-scoped one is closed before a streaming body is sent.
+    """
+    names = [column.key for column in columns]
+    if fmt == "csv":
+        yield _encode_csv([names])
+
+    stmt = select(*columns).order_by(columns[0]).execution_options(yield_per=EXPORT_CHUNK_SIZE)
+    async with session_factory() as db:
+        result = await db.stream(stmt)
+        async for rows in result.partitions():
+            yield _encode_csv(rows) if fmt == "csv" else _encode_ndjson(names, rows)
+
+
+def export_media_type(fmt: str) -> str:
+    """Content type of an export format, rejecting unknown formats."""
+    if fmt not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unsupported format. Use one of: {', '.join(EXPORT_FORMATS)}")
+    return EXPORT_FORMATS[fmt]
@@ -1,19 +1,94 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from ..models.flight import Flight
-import requests
-import os
+from sqlalchemy import or_, tuple_
+from ..models.flight import Flight, select_current_flight
+from ..db.database import dialect_insert
+from ..db.change_feed import changes_since, db_utcnow
+from ..db.cursor import decode_cursor, encode_cursor
+from .admin_flight_controller import notify_users_about_flights
+from ..websocket.notifications import broadcast_message
+from ..cache.flight_cache import flight_tracking_cache
+from ..cache.flight_board import flight_board_registry, board_row
+from ..core.settings import settings
+from ..core.http_client import get_http_client
 from datetime import datetime
 from fastapi import HTTPException
-API_KEY = os.getenv("FLIGHTS_API_KEY") 
+from typing import List, Optional
+import asyncio
+import httpx
+import logging
+
+logger = logging.getLogger(__name__)
+
 BASE_URL = "http://api.aviationstack.com/v1/flights"
+# Flights per SELECT / INSERT statement (keeps bind parameters well under driver limits)
+UPSERT_CHUNK_SIZE = 1000
+# A stored flight is only rewritten when one of these differs from the upstream record
+CHANGE_TRACKED_FIELDS = ("status", "departure_time", "arrival_time", "gate")
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+# Columns returned by the flight listing
+LISTING_COLUMNS = (
+    Flight.id,
+    Flight.airline_name,
+    Flight.flight_number,
+    Flight.origin,
+    Flight.destination,
+    Flight.departure_time,
+    Flight.arrival_time,
+    Flight.status,
+    Flight.gate,
+)
 
-async def get_all_flights(db: AsyncSession):
+
+async def get_all_flights(
+    db: AsyncSession,
+    origin: Optional[str] = None,
+    destination: Optional[str] = None,
+    status: Optional[str] = None,
+    departure_from: Optional[datetime] = None,
+    departure_to: Optional[datetime] = None,
+    cursor: Optional[str] = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+):
     """
-    Retrieve all flights from the database.
+    List flights ordered by departure time, one keyset page at a time.
+    Filters map onto ix_flights_origin_destination and ix_flights_departure_id,
+    and only the listed columns are selected (no ORM hydration).
     """
-    result = await db.execute(select(Flight))
-    return result.scalars().all()
+    stmt = select(*LISTING_COLUMNS)
+    if origin:
+        stmt = stmt.where(Flight.origin == origin)
+    if destination:
+        stmt = stmt.where(Flight.destination == destination)
+    if status:
+        stmt = stmt.where(Flight.status == status)
+    if departure_from:
+        stmt = stmt.where(Flight.departure_time >= departure_from)
+    if departure_to:
+        stmt = stmt.where(Flight.departure_time < departure_to)
+    if cursor:
+        after_time, after_id = decode_cursor(cursor)
+        stmt = stmt.where(tuple_(Flight.departure_time, Flight.id) > tuple_(after_time, after_id))
+
+    # Read one extra row to know whether another page exists
+    stmt = stmt.order_by(Flight.departure_time, Flight.id).limit(limit + 1)
+    rows = (await db.execute(stmt)).all()
+
+    flights = [
+        {
+            **row._asdict(),
+            "departure_time": row.departure_time.isoformat(),
+            "arrival_time": row.arrival_time.isoformat(),
+        }
+        for row in rows[:limit]
+    ]
+    next_cursor = None
+    if len(rows) > limit:
+        last = rows[limit - 1]
+        next_cursor = encode_cursor(last.departure_time, last.id)
+
+    return {"flights": flights, "next_cursor": next_cursor}
 
 async def create_flight(db: AsyncSession, flight_data: dict):
     """
@@ -23,66 +98,269 @@ async def create_flight(db: AsyncSession, flight_data: dict):
     db.add(new_flight)
     await db.commit()
     await db.refresh(new_flight)
+    flight_tracking_cache.invalidate([new_flight.flight_number])
+    await flight_board_registry.apply([board_row(new_flight)])
     return new_flight
 
-async def fetch_and_save_flights(db: AsyncSession, dep_iata: str = "TLV", limit: int = 30):
-    """
-    Fetch live flight data from the AviationStack API and save it to the database.
-    """
+async def _fetch_flight_page(client: httpx.AsyncClient, semaphore: asyncio.Semaphore,
+                             dep_iata: str, offset: int, limit: int) -> dict:
+    """Fetch one page of departures from AviationStack, bounded by the shared semaphore."""
     params = {
-        "access_key": API_KEY,
-        "dep_iata": dep_iata,  
+        "access_key": settings.FLIGHTS_API_KEY,
+        "dep_iata": dep_iata,
         "limit": limit,
+        "offset": offset,
     }
+    async with semaphore:
+        try:
+            response = await client.get(BASE_URL, params=params)
+            response.raise_for_status()
+        except httpx.TimeoutException:
+            logger.error(f"Timeout fetching flights for {dep_iata} (offset {offset})")
+            raise HTTPException(status_code=504, detail="Flight data service timed out. Please try again.")
+        except httpx.HTTPStatusError as e:
+            logger.error(f"AviationStack error: {e.response.status_code} - {e.response.text}")
+            raise HTTPException(status_code=502, detail=f"Failed to fetch flights: {e.response.status_code}")
+        except httpx.RequestError as e:
+            logger.error(f"Network error fetching flights: {e}")
+            raise HTTPException(status_code=503, detail="Flight data service unavailable. Please try again later.")
 
-    response = requests.get(BASE_URL, params=params)
-    if response.status_code != 200:
-        raise Exception(f"Failed to fetch flights: {response.status_code}")
+    try:
+        return response.json()
+    except ValueError:
+        raise HTTPException(status_code=502, detail="Invalid response from flight data API")
 
-    data = response.json().get("data", [])
-    for flight in data:
-        departure_time = flight["departure"]["scheduled"]
-        arrival_time = flight["arrival"]["scheduled"]
 
-        # Skip flights with missing data
-        if not departure_time or not arrival_time:
-            continue
+async def _fetch_airport_departures(client: httpx.AsyncClient, semaphore: asyncio.Semaphore,
+                                    dep_iata: str, page_size: int, max_pages: int) -> list:
+    """
+    Fetch all departures of one airport: the first page reveals the total,
+    the remaining pages are requested concurrently.
+    """
+    first = await _fetch_flight_page(client, semaphore, dep_iata, 0, page_size)
+    flights = list(first.get("data") or [])
+
+    total = (first.get("pagination") or {}).get("total", len(flights))
+    offsets = range(page_size, min(total, page_size * max_pages), page_size)
+    pages = await asyncio.gather(
+        *(_fetch_flight_page(client, semaphore, dep_iata, offset, page_size) for offset in offsets)
+    )
+    for page in pages:
+        flights.extend(page.get("data") or [])
+    return flights
+
+
+def _parse_flight(flight: dict) -> Optional[dict]:
+    """Map an AviationStack record to Flight columns, or None if it lacks schedule data."""
+    departure_time = flight["departure"]["scheduled"]
+    arrival_time = flight["arrival"]["scheduled"]
+
+    # Skip flights with missing data
+    if not departure_time or not arrival_time or not flight["flight"]["iata"]:
+        return None
 
-        # Convert ISO timestamps to Python datetime objects
-        departure_time = datetime.fromisoformat(departure_time).replace(tzinfo=None)  
-        arrival_time = datetime.fromisoformat(arrival_time).replace(tzinfo=None)      
+    return {
+        "airline_name": flight["airline"]["name"],
+        "flight_number": flight["flight"]["iata"],
+        # IATA codes, the same airport keys boards, tickets and filters use
+        "origin": flight["departure"]["iata"],
+        "destination": flight["arrival"]["iata"],
+        # Convert ISO timestamps to naive Python datetime objects
+        "departure_time": datetime.fromisoformat(departure_time).replace(tzinfo=None),
+        "arrival_time": datetime.fromisoformat(arrival_time).replace(tzinfo=None),
+        "status": flight["flight_status"],
+        "terminal": flight["departure"].get("terminal"),
+        "gate": flight["departure"].get("gate"),
+    }
+
+
+async def fetch_departures(airports: Optional[List[str]] = None, page_size: Optional[int] = None,
+                             max_pages: Optional[int] = None) -> List[dict]:
+    """
+    Fetch departures for one or more airports from AviationStack without blocking the event loop.
+    All airports and pages share the pooled HTTP client and one concurrency limit.
+    """
+    if not settings.FLIGHTS_API_KEY:
+        raise HTTPException(status_code=503, detail="Flight data API key is not configured.")
+
+    airports = airports or [settings.DEFAULT_AIRPORT_CODE]
+    client = get_http_client()
+    semaphore = asyncio.Semaphore(settings.FLIGHTS_API_CONCURRENCY)
+    results = await asyncio.gather(*(
+        _fetch_airport_departures(
+            client, semaphore, dep_iata,
+            page_size or settings.FLIGHTS_API_PAGE_SIZE,
+            max_pages or settings.FLIGHTS_API_MAX_PAGES,
+        )
+        for dep_iata in airports
+    ))
+
+    parsed = []
+    for raw_flights in results:
+        for raw in raw_flights:
+            try:
+                flight = _parse_flight(raw)
+            except (KeyError, TypeError, ValueError) as e:
+                logger.warning(f"Error processing flight record: {e}")
+                continue
+            if flight:
+                parsed.append(flight)
+    return parsed
+
+
+async def upsert_flights(db: AsyncSession, flights: List[dict]) -> dict:
+    """
+    Set-based upsert of ingested flights keyed by (flight_number, departure_date).
+    One SELECT reads the stored state of the batch, then a single
+    INSERT ... ON CONFLICT (flight_number, departure_date) DO UPDATE writes only
+    new rows and rows whose status, times or gate changed. Returns per-outcome
+    counts and the changed flights (with their previous status) for downstream consumers.
+    """
+    # Last record wins when the upstream repeats a flight within a batch
+    batch = {
+        (flight["flight_number"], flight["departure_time"].date()): {
+            **flight, "departure_date": flight["departure_time"].date()
+        }
+        for flight in flights
+    }
+    counts = {"inserted": 0, "updated": 0, "unchanged": 0}
+    changes = []
 
-        existing_flight = await db.execute(
-            select(Flight).where(Flight.flight_number == flight["flight"]["iata"])
+    keys = list(batch)
+    for start in range(0, len(keys), UPSERT_CHUNK_SIZE):
+        chunk = keys[start:start + UPSERT_CHUNK_SIZE]
+        result = await db.execute(
+            select(Flight.flight_number, Flight.departure_date,
+                   *(getattr(Flight, field) for field in CHANGE_TRACKED_FIELDS))
+            .where(tuple_(Flight.flight_number, Flight.departure_date).in_(chunk))
         )
-        if existing_flight.scalar():
+        stored = {tuple(row[:2]): dict(zip(CHANGE_TRACKED_FIELDS, row[2:])) for row in result.all()}
+
+        rows = []
+        for key in chunk:
+            flight = batch[key]
+            previous = stored.get(key)
+            if previous is None:
+                counts["inserted"] += 1
+            elif any(previous[field] != flight.get(field) for field in CHANGE_TRACKED_FIELDS):
+                counts["updated"] += 1
+            else:
+                counts["unchanged"] += 1
+                continue
+            rows.append(flight)
+            changes.append({**flight, "previous_status": previous["status"] if previous else None})
+
+        if not rows:
             continue
 
-        new_flight = Flight(
-            airline_name=flight["airline"]["name"],
-            flight_number=flight["flight"]["iata"],
-            origin=flight["departure"]["airport"],
-            destination=flight["arrival"]["airport"],
-            departure_time=departure_time,
-            arrival_time=arrival_time,
-            status=flight["flight_status"],
+        stmt = dialect_insert(db, Flight).values(rows)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["flight_number", "departure_date"],
+            # ON CONFLICT updates skip the column's onupdate, so stamp updated_at explicitly
+            set_={
+                **{
+                    column: stmt.excluded[column]
+                    for column in rows[0]
+                    if column not in ("flight_number", "departure_date")
+                },
+                "updated_at": db_utcnow(),
+            },
+            # Guards against rewriting rows that changed concurrently to the same values
+            where=or_(*(
+                getattr(Flight, field).is_distinct_from(stmt.excluded[field])
+                for field in CHANGE_TRACKED_FIELDS
+            )),
         )
-        db.add(new_flight)
+        await db.execute(stmt)
 
     await db.commit()
+    flight_tracking_cache.invalidate(change["flight_number"] for change in changes)
+    await flight_board_registry.apply(changes)
+    logger.info(f"Flight upsert: {counts}")
+    return {**counts, "changes": changes}
+
+
+async def get_flight_changes(db: AsyncSession, cursor: Optional[str] = None, limit: int = DEFAULT_PAGE_SIZE):
+    """
+    Flights created or modified since `cursor` (delta sync for clients holding a local copy).
+    """
+    return await changes_since(db, Flight, LISTING_COLUMNS, cursor=cursor, limit=limit)
+
+
+async def fetch_and_save_flights(db: AsyncSession, airports: Optional[List[str]] = None):
+    """
+    Fetch live flight data from the AviationStack API and upsert it into the database.
+    """
+    flights = await fetch_departures(airports)
+    return await upsert_flights(db, flights)
+
+
+async def get_flight_board(db: AsyncSession, airport: str):
+    """
+    (ETag, JSON body) of an airport's departures/arrivals board, served from memory.
+    """
+    board = await flight_board_registry.get(db, airport)
+    return board.snapshot()
+
+
+async def poll_flight_statuses(db: AsyncSession, airports: Optional[List[str]] = None) -> dict:
+    """
+    One incremental poll: ingest the airports' departures, then notify ticket
+    holders and WebSocket clients only about flights whose status changed.
+    """
+    result = await fetch_and_save_flights(db, airports)
+
+    status_changes = {
+        (change["flight_number"], change["departure_date"]):
+            f"Flight {change['flight_number']} status changed to: {change['status']}"
+        for change in result["changes"]
+        if change["previous_status"] is not None and change["previous_status"] != change["status"]
+    }
+    await notify_users_about_flights(status_changes, db)
+    for content in status_changes.values():
+        await broadcast_message(content)
+
+    return {
+        "inserted": result["inserted"],
+        "updated": result["updated"],
+        "unchanged": result["unchanged"],
+        "status_changes": len(status_changes),
+    }
+
+
+async def run_flight_status_poller(session_factory, airports: Optional[List[str]] = None,
+                                   interval: Optional[int] = None):
+    """Background loop polling flight statuses every interval seconds until cancelled."""
+    airports = airports or settings.FLIGHT_POLL_AIRPORTS
+    interval = interval or settings.FLIGHT_POLL_INTERVAL_SECONDS
+    while True:
+        try:
+            async with session_factory() as db:
+                summary = await poll_flight_statuses(db, airports)
+            logger.info(f"Flight poll for {airports}: {summary}")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Flight poll failed: {e}")
+        await asyncio.sleep(interval)
 
 
 async def track_flight_by_number(flight_number: str, db: AsyncSession):
     """
     Fetch flight details using the flight number.
+    Read-through: repeated polls are served from the tracking cache.
     """
-    flight_result = await db.execute(select(Flight).where(Flight.flight_number == flight_number))
+    cached = flight_tracking_cache.get(flight_number)
+    if cached is not None:
+        return cached
+
+    flight_result = await db.execute(select_current_flight(flight_number))
     flight = flight_result.scalar_one_or_none()
 
     if not flight:
         raise HTTPException(status_code=404, detail="Flight not found.")
 
-    return {
+    payload = {
         "flight_number": flight.flight_number,
         "airline_name": flight.airline_name,
         "origin": flight.origin,
@@ -90,5 +368,8 @@ async def track_flight_by_number(flight_number: str, db: AsyncSession):
         "departure_time": flight.departure_time,
         "arrival_time": flight.arrival_time,
         "status": flight.status,
+        "terminal": flight.terminal,
+        "gate": flight.gate,
     }
-
+    flight_tracking_cache.set(flight_number, payload)
+    return payload
@@ -0,0 +1,75 @@
+"""
+Luggage scan ingestion.
+
+Belt scanners post batches of scan events. Each batch is appended to the
+luggage_events log with one bulk INSERT, and the bags' latest status and
+location are moved forward with one set-based UPDATE. The new state is then
+written through to the luggage status cache and pushed to subscribers.
+"""
+from datetime import timezone
+from typing import List
+
+from sqlalchemy import case, insert, or_, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from app.models.luggage import Luggage
+from app.models.luggage_event import LuggageEvent
+from app.cache.luggage_status import luggage_status_cache
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Largest accepted batch; keeps the CASE-based UPDATE well under driver bind-parameter limits
+MAX_SCAN_BATCH = 2000
+
+
+def _naive_utc(value):
+    return value.astimezone(timezone.utc).replace(tzinfo=None) if value.tzinfo else value
+
+
+async def ingest_luggage_scans(db: AsyncSession, events: List[dict]) -> dict:
+    """
+    Record a batch of scan events and update each scanned bag's latest state.
+    Events for unknown luggage ids are rejected individually rather than failing the batch.
+    A bag's status only moves forward: the newest event in the batch is applied when it is
+    newer than the stored last_scanned_at, so late or replayed batches do not roll it back.
+    Returns counts plus the latest state of every bag that changed (also pushed
+    on the bags' "luggage:<id>" topics).
+    """
+    events = [{**event, "scanned_at": _naive_utc(event["scanned_at"])} for event in events]
+    ids = {event["luggage_id"] for event in events}
+    known = set((await db.scalars(select(Luggage.luggage_id).where(Luggage.luggage_id.in_(ids)))).all())
+    accepted = [event for event in events if event["luggage_id"] in known]
+    rejected = sorted(ids - known)
+
+    if not accepted:
+        return {"accepted": 0, "rejected": rejected, "updated": []}
+
+    await db.execute(insert(LuggageEvent), accepted)
+
+    latest = {}
+    for event in accepted:
+        current = latest.get(event["luggage_id"])
+        if current is None or event["scanned_at"] >= current["scanned_at"]:
+            latest[event["luggage_id"]] = event
+
+    def per_bag(field):
+        return case({luggage_id: event[field] for luggage_id, event in latest.items()}, value=Luggage.luggage_id)
+
+    result = await db.execute(
+        update(Luggage)
+        .where(
+            Luggage.luggage_id.in_(list(latest)),
+            or_(Luggage.last_scanned_at.is_(None), Luggage.last_scanned_at < per_bag("scanned_at")),
+        )
+        .values(status=per_bag("status"), last_location=per_bag("location"), last_scanned_at=per_bag("scanned_at"))
+        .returning(Luggage.luggage_id, Luggage.status, Luggage.last_location, Luggage.last_scanned_at)
+        .execution_options(synchronize_session=False)
+    )
+    updated = [row._asdict() for row in result.all()]
+    await db.commit()
+    await luggage_status_cache.apply(updated)
+
+    logger.info(f"Luggage scans: {len(accepted)} accepted, {len(rejected)} unknown bags, {len(updated)} bags updated")
+    return {"accepted": len(accepted), "rejected": rejected, "updated": updated}
@@ -1,31 +1,39 @@
-import heapq    
 from sqlalchemy.future import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.models.location import Location
 from app.models.path import Path
-from ..db.database import get_db
 from fastapi import HTTPException
+from typing import Optional
 from ..models.wall import Wall
+from ..cache.map_graph import map_graph_cache
+from ..cache.wait_times import wait_time_estimator
+from ..core.settings import settings
 import random
 
 SECURITY_AND_CHECKIN_IDS = [59, 39, 38, 60, 61, 37, 34, 33, 32, 31, 30, 29] #for simulating congestion
 
-async def get_map_data(db: AsyncSession):
+async def get_map_data(db: AsyncSession, airport_code: Optional[str] = None, terminal: Optional[str] = None):
+    airport_code = airport_code or settings.DEFAULT_AIRPORT_CODE
+
     # Fetch locations
-    locations_query = await db.execute(select(Location))
+    location_query = select(Location).where(Location.airport_code == airport_code)
+    if terminal is not None:
+        location_query = location_query.where(Location.terminal == terminal)
+    locations_query = await db.execute(location_query)
     locations = [
         {
             "id": loc.id,
             "name": loc.name,
             "type": loc.type,
             "category": loc.category,
+            "terminal": loc.terminal,
             "coordinates": loc.coordinates,
         }
         for loc in locations_query.scalars()
     ]
 
     # Fetch paths
-    paths_query = await db.execute(select(Path))
+    paths_query = await db.execute(select(Path).where(Path.airport_code == airport_code))
     paths = [
         {
             "id": path.id,
@@ -37,117 +45,55 @@ async def get_map_data(db: AsyncSession):
     ]
 
     # Fetch walls
-    walls = await get_walls(db)
-
-    return {"locations": locations, "paths": paths, "walls": walls}
-
-#utility func for walls
-def line_segments_intersect(p1, q1, p2, q2):
-    """Check if two line segments (p1q1 and p2q2) intersect."""
+    walls = await get_walls(db, airport_code)
 
-    def orientation(a, b, c):
-        val = (b[1] - a[1]) * (c[0] - b[0]) - (b[0] - a[0]) * (c[1] - b[1])
-        if val == 0:
-            return 0  # Collinear
-        return 1 if val > 0 else 2  # Clockwise or counterclockwise
+    return {"airport_code": airport_code, "locations": locations, "paths": paths, "walls": walls}
 
-    def on_segment(a, b, c):
-        return (
-            min(a[0], b[0]) <= c[0] <= max(a[0], b[0])
-            and min(a[1], b[1]) <= c[1] <= max(a[1], b[1])
-        )
+async def calculate_shortest_path(source_id: int, destination_id: int, db: AsyncSession,
+                                  airport_code: Optional[str] = None, terminal: Optional[str] = None):
+    """
+    Shortest walking route between two locations, served from the airport's cached graph.
+    """
+    partition = await map_graph_cache.get(db, airport_code, terminal)
 
-    o1 = orientation(p1, q1, p2)
-    o2 = orientation(p1, q1, q2)
-    o3 = orientation(p2, q2, p1)
-    o4 = orientation(p2, q2, q1)
-
-    if o1 != o2 and o3 != o4:
-        return True
-
-    # Special cases
-    if o1 == 0 and on_segment(p1, q1, p2):
-        return True
-    if o2 == 0 and on_segment(p1, q1, q2):
-        return True
-    if o3 == 0 and on_segment(p2, q2, p1):
-        return True
-    if o4 == 0 and on_segment(p2, q2, q1):
-        return True
-
-    return False
+    path, total_distance = partition.shortest_path(source_id, destination_id)
+    if not path:
+        return {"error": "No path found"}
 
+    return {"path": path, "total_distance": total_distance}
 
-async def calculate_shortest_path(source_id: int, destination_id: int, db: AsyncSession):
-    
 
-    # Fetch all paths and build the graph
-    result = await db.execute(select(Path))
-    paths = result.scalars().all()
-    graph = {}
+async def search_locations(query: str, db: AsyncSession, airport_code: Optional[str] = None,
+                           terminal: Optional[str] = None, limit: int = 10):
+    """
+    Typeahead search over an airport's locations by name, type, category and description.
+    Served from the partition's in-memory index; the DB is only read when the partition is cold.
+    """
+    partition = await map_graph_cache.get(db, airport_code, terminal)
+    return {
+        "airport_code": partition.airport_code,
+        "results": partition.search_index.search(query, limit),
+    }
 
-    for path in paths:
-        graph.setdefault(path.source_id, []).append((path.destination_id, path.distance))
-        graph.setdefault(path.destination_id, []).append((path.source_id, path.distance))
-
-    # Fetch all walls
-    walls_query = await db.execute(select(Wall))
-    walls = walls_query.scalars().all()
-
-    # Utility function to check if a line intersects any wall
-    def intersects_wall(x1, y1, x2, y2):
-        for wall in walls:
-            if line_segments_intersect(
-                (x1, y1), (x2, y2), (wall.x1, wall.y1), (wall.x2, wall.y2)
-            ):
-                return True
-        return False
-
-    # Implement Dijkstra's Algorithm
-    def dijkstra(graph, start, end):
-        pq = [(0, start, [])]  # Priority queue: (cost, current_node, path)
-        visited = set()
-
-        while pq:
-            cost, node, path = heapq.heappop(pq)
-            if node in visited:
-                continue
-            path = path + [node]
-            if node == end:
-                return path, cost
-            visited.add(node)
-            for neighbor, weight in graph.get(node, []):
-                # Get coordinates of the current and neighbor nodes
-                curr_location = next(
-                    (loc for loc in locations if loc.id == node), None
-                )
-                neighbor_location = next(
-                    (loc for loc in locations if loc.id == neighbor), None
-                )
-                if curr_location and neighbor_location:
-                    x1, y1 = curr_location.coordinates["x"], curr_location.coordinates["y"]
-                    x2, y2 = neighbor_location.coordinates["x"], neighbor_location.coordinates["y"]
-                    if not intersects_wall(x1, y1, x2, y2):  # Skip paths intersecting walls
-                        heapq.heappush(pq, (cost + weight, neighbor, path))
-
-        return None, float("inf")  # No path found
-
-    # Fetch all locations
-    locations_query = await db.execute(select(Location))
-    locations = locations_query.scalars().all()
-
-    # Calculate shortest path
-    path, total_distance = dijkstra(graph, source_id, destination_id)
-    if not path:
-        return {"error": "No path found"}
 
-    # Fetch human-readable location names
-    location_query = await db.execute(select(Location).filter(Location.id.in_(path)))
-    location_mapping = {loc.id: loc.name for loc in location_query.scalars()}
+async def get_congestion_heatmap(db: AsyncSession, cell_size: float, airport_code: Optional[str] = None,
+                                 terminal: Optional[str] = None):
+    """
+    Per-edge congestion aggregated into a spatial grid, cached per congestion epoch.
+    """
+    partition = await map_graph_cache.get(db, airport_code, terminal)
+    try:
+        return partition.congestion_heatmap(cell_size)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
-    #readable_path = [location_mapping[loc_id] for loc_id in path]
 
-    return {"path": path, "total_distance": total_distance}
+def get_wait_times(airport_code: Optional[str] = None):
+    """
+    Latest security/check-in wait estimates. These are precomputed by the
+    background refresher, so serving them does no work.
+    """
+    return wait_time_estimator.get(airport_code)
 
 
 """ (class) AsyncSession
@@ -164,17 +110,24 @@ _asyncio.AsyncSession.sync_session_class parameter. """
 
 #admin permission
 async def add_location(location_data: dict, db: AsyncSession):
+    location_data.setdefault("airport_code", settings.DEFAULT_AIRPORT_CODE)
     new_location = Location(**location_data)
     db.add(new_location)
     await db.commit()
     await db.refresh(new_location)
+    map_graph_cache.invalidate(new_location.airport_code)
     return new_location
 
 async def add_path(path_data: dict, db: AsyncSession):
+    if "airport_code" not in path_data:
+        # A path belongs to the same airport as the location it starts from
+        source = await db.get(Location, path_data.get("source_id"))
+        path_data["airport_code"] = source.airport_code if source else settings.DEFAULT_AIRPORT_CODE
     new_path = Path(**path_data)
     db.add(new_path)
     await db.commit()
     await db.refresh(new_path)
+    map_graph_cache.invalidate(new_path.airport_code)
     return new_path
 
 async def update_location(location_id: int, location_data: dict, db: AsyncSession):
@@ -182,11 +135,14 @@ async def update_location(location_id: int, location_data: dict, db: AsyncSessio
     location = query.scalar_one_or_none()
     if not location:
         raise HTTPException(status_code=404, detail="Location not found.")
+    previous_airport = location.airport_code
     for key, value in location_data.items():
         setattr(location, key, value)
     db.add(location)
     await db.commit()
     await db.refresh(location)
+    map_graph_cache.invalidate(previous_airport)
+    map_graph_cache.invalidate(location.airport_code)
     return location
 
 async def delete_location(location_id: int, db: AsyncSession):
@@ -194,13 +150,17 @@ async def delete_location(location_id: int, db: AsyncSession):
     location = query.scalar_one_or_none()
     if not location:
         raise HTTPException(status_code=404, detail="Location not found.")
+    airport_code = location.airport_code
     await db.delete(location)
     await db.commit()
+    map_graph_cache.invalidate(airport_code)
     return {"message": "Location deleted successfully."}
 
-async def get_walls(db: AsyncSession):
-    # Fetch all walls from the database
-    walls_query = await db.execute(select(Wall))
+async def get_walls(db: AsyncSession, airport_code: Optional[str] = None):
+    # Fetch the walls of one airport from the database
+    walls_query = await db.execute(
+        select(Wall).where(Wall.airport_code == (airport_code or settings.DEFAULT_AIRPORT_CODE))
+    )
     walls = [
         {
             "id": wall.id,
@@ -226,6 +186,7 @@ async def update_congestion(db: AsyncSession):
         db.add(path)  # Add to session
 
     await db.commit()
+    map_graph_cache.apply_congestion({path.id: path.congestion for path in paths})
 
 async def calculate_overall_congestion(db: AsyncSession):
     # Calculate the overall congestion level
@@ -257,6 +218,7 @@ async def update_and_fetch_congestion(db: AsyncSession):
         db.add(path)  # Add path back to session for update
 
     await db.commit()  # Commit changes to the database
+    map_graph_cache.apply_congestion({path.id: path.congestion for path in paths})
 
     # Step 2: Calculate overall congestion level
     total_congestion = sum(path.congestion for path in paths)
@@ -6,13 +6,22 @@ import httpx
 from fastapi import HTTPException
 from sqlalchemy.future import select
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import func, cast, Date
-from app.models.ticket import Ticket
+from sqlalchemy import func, or_, update, insert, case, tuple_
+from app.models.ticket import Ticket, ticket_flight_join
+from app.models.ticket_route import TicketRouteFetch
 from app.models.luggage import Luggage
 from app.models.flight import Flight
 from ..models.users import User
 from ..core.settings import settings
-from datetime import datetime, date
+from ..db.database import dialect_insert
+from ..cache.map_graph import map_graph_cache
+from ..cache.flight_board import flight_board_registry
+from ..cache.singleflight import SingleFlight
+from ..cache.fare_calendar import fare_calendar_cache
+from ..cache.luggage_status import luggage_status_cache
+from datetime import datetime, date, time, timedelta, timezone
+from typing import List, Optional
+import asyncio
 import logging
 
 logger = logging.getLogger(__name__)
@@ -20,6 +29,16 @@ logger = logging.getLogger(__name__)
 # API Configuration
 API_URL = "https://sky-scanner3.p.rapidapi.com/flights/search-multi-city"
 REQUEST_TIMEOUT = 30.0  # seconds
+# Offers per INSERT statement (keeps bind parameters well under driver limits)
+TICKET_UPSERT_CHUNK_SIZE = 1000
+
+# Largest party booked in one request
+PARTY_BOOKING_MAX_TICKETS = 9
+
+# Identical concurrent searches share one upstream call and one DB write
+ticket_search_flights = SingleFlight()
+# Stale-while-revalidate refreshes still running (strong refs keep the tasks alive)
+_background_refreshes = set()
 
 # Demo mode stub data
 DEMO_TICKETS = [
@@ -56,13 +75,25 @@ DEMO_TICKETS = [
 async def fetch_and_cache_tickets(origin: str, destination: str, departure_date: str, db: AsyncSession):
     """
     Fetch tickets from SkyScanner API or return demo data if API key is missing.
-    Uses async HTTP with timeout and proper error handling.
+    Offers and the route's last-fetched time are written in one transaction.
     """
     # Check for demo mode
     if settings.is_demo_mode or not settings.BOOKING_API_KEY:
         logger.info("Demo mode: returning stub ticket data")
         return _get_demo_tickets(origin, destination, departure_date)
-    
+
+    target_date = _parse_departure_date(departure_date)
+    offers = await search_upstream_offers(origin, destination, departure_date)
+    await _mark_route_fetched(db, origin, destination, target_date)
+    cached = await cache_ticket_offers(db, offers)
+    logger.info(f"Cached {cached} ticket offers for {origin} -> {destination} on {departure_date}")
+
+
+async def search_upstream_offers(origin: str, destination: str, departure_date: str) -> list:
+    """
+    Search SkyScanner for one route and date and return the parsed offers.
+    Uses async HTTP with timeout and proper error handling.
+    """
     headers = {
         "Content-Type": "application/json",
         "X-RapidAPI-Key": settings.BOOKING_API_KEY,
@@ -111,43 +142,294 @@ async def fetch_and_cache_tickets(origin: str, destination: str, departure_date:
         logger.warning(f"Unexpected API response structure: {ticket_data}")
         raise HTTPException(status_code=500, detail="Invalid response structure from flight search")
 
-    # Process and cache itineraries
-    itineraries = ticket_data["data"]["itineraries"]
-    added_count = 0
-    
+    return _parse_itineraries(ticket_data["data"]["itineraries"])
+
+
+async def _mark_route_fetched(db: AsyncSession, origin: str, destination: str, departure_date: date):
+    stmt = dialect_insert(db, TicketRouteFetch).values(
+        origin=origin, destination=destination, departure_date=departure_date,
+        last_fetched_at=datetime.utcnow(),
+    )
+    await db.execute(stmt.on_conflict_do_update(
+        index_elements=["origin", "destination", "departure_date"],
+        set_={"last_fetched_at": stmt.excluded.last_fetched_at},
+    ))
+
+
+async def search_and_cache_tickets(origin: str, destination: str, departure_date: str, session_factory):
+    """
+    Coalesced fetch_and_cache_tickets: concurrent requests for the same route and
+    date await a single upstream search, run in its own session.
+    """
+    async def search():
+        async with session_factory() as db:
+            return await fetch_and_cache_tickets(origin, destination, departure_date, db)
+
+    return await ticket_search_flights.do((origin, destination, departure_date), search)
+
+
+async def _refresh_in_background(origin: str, destination: str, departure_date: str, session_factory):
+    try:
+        await search_and_cache_tickets(origin, destination, departure_date, session_factory)
+    except Exception as e:
+        detail = e.detail if isinstance(e, HTTPException) else e
+        logger.warning(f"Background refresh of {origin} -> {destination} on {departure_date} failed: {detail}")
+
+
+def _schedule_refresh(origin: str, destination: str, departure_date: str, session_factory):
+    """Start a background refresh unless one for the same search is already running."""
+    if ticket_search_flights.in_flight((origin, destination, departure_date)):
+        return
+    task = asyncio.create_task(_refresh_in_background(origin, destination, departure_date, session_factory))
+    _background_refreshes.add(task)
+    task.add_done_callback(_background_refreshes.discard)
+
+
+async def search_tickets(origin: str, destination: str, departure_date: str, db: AsyncSession, session_factory):
+    """
+    Unified ticket search with stale-while-revalidate.
+    Offers fetched within the route's TTL are served from the cache as-is. Stale
+    offers are served immediately while a background refresh runs. A route that
+    was never fetched is fetched upstream first.
+    """
+    if settings.is_demo_mode or not settings.BOOKING_API_KEY:
+        return {"tickets": _get_demo_tickets(origin, destination, departure_date), "freshness": "demo", "last_fetched_at": None}
+
+    target_date = _parse_departure_date(departure_date)
+    route = (
+        TicketRouteFetch.origin == origin,
+        TicketRouteFetch.destination == destination,
+        TicketRouteFetch.departure_date == target_date,
+    )
+    state = (await db.execute(
+        select(TicketRouteFetch.last_fetched_at, TicketRouteFetch.ttl_seconds).where(*route)
+    )).first()
+
+    if state is None:
+        freshness = "miss"
+        await search_and_cache_tickets(origin, destination, departure_date, session_factory)
+        state = (await db.execute(
+            select(TicketRouteFetch.last_fetched_at, TicketRouteFetch.ttl_seconds).where(*route)
+        )).first()
+    else:
+        ttl = timedelta(seconds=state.ttl_seconds or settings.TICKET_SEARCH_TTL_SECONDS)
+        if datetime.utcnow() - state.last_fetched_at <= ttl:
+            freshness = "fresh"
+        else:
+            freshness = "stale"
+            _schedule_refresh(origin, destination, departure_date, session_factory)
+
+    return {
+        "tickets": await get_cached_tickets(origin, destination, departure_date, db),
+        "freshness": freshness,
+        "last_fetched_at": state.last_fetched_at.isoformat() if state else None,
+    }
+
+
+async def _search_day(semaphore: asyncio.Semaphore, origin: str, destination: str, day: date, session_factory):
+    async with semaphore:
+        await search_and_cache_tickets(origin, destination, day.isoformat(), session_factory)
+
+
+async def search_flexible_dates(origin: str, destination: str, departure_date: str, days: int,
+                                db: AsyncSession, session_factory):
+    """
+    Cheapest offers over departure_date +/- `days`.
+    Days fetched within their TTL are answered from the ticket cache. The remaining
+    days, closest to the requested date first and up to FLEX_SEARCH_UPSTREAM_BUDGET,
+    are searched upstream concurrently (at most FLEX_SEARCH_CONCURRENCY at a time),
+    each through search_and_cache_tickets so a day already being searched by another
+    request is joined rather than fetched twice. Every day is then read back with a
+    single range query.
+    """
+    center = _parse_departure_date(departure_date)
+    today = datetime.utcnow().date()
+    window = [
+        center + timedelta(days=offset)
+        for offset in sorted(range(-days, days + 1), key=abs)
+        if center + timedelta(days=offset) >= today
+    ]
+    if not window:
+        raise HTTPException(status_code=400, detail="All requested dates are in the past.")
+
+    if settings.is_demo_mode or not settings.BOOKING_API_KEY:
+        calendar = [
+            {"date": day.isoformat(), "source": "demo", "tickets": _get_demo_tickets(origin, destination, day.isoformat())}
+            for day in sorted(window)
+        ]
+        return _flexible_result(calendar, upstream_searches=0)
+
+    result = await db.execute(
+        select(TicketRouteFetch.departure_date, TicketRouteFetch.last_fetched_at, TicketRouteFetch.ttl_seconds)
+        .where(
+            TicketRouteFetch.origin == origin,
+            TicketRouteFetch.destination == destination,
+            TicketRouteFetch.departure_date.in_(window),
+        )
+    )
+    now = datetime.utcnow()
+    sources = {}
+    for day, last_fetched_at, ttl_seconds in result.all():
+        ttl = timedelta(seconds=ttl_seconds or settings.TICKET_SEARCH_TTL_SECONDS)
+        sources[day] = "cache" if now - last_fetched_at <= ttl else "stale"
+
+    to_fetch = [day for day in window if sources.get(day) != "cache"][:settings.FLEX_SEARCH_UPSTREAM_BUDGET]
+    semaphore = asyncio.Semaphore(settings.FLEX_SEARCH_CONCURRENCY)
+    fetched = await asyncio.gather(
+        *(_search_day(semaphore, origin, destination, day, session_factory) for day in to_fetch),
+        return_exceptions=True,
+    )
+
+    for day, outcome in zip(to_fetch, fetched):
+        if isinstance(outcome, Exception):
+            logger.warning(f"Flexible search for {origin} -> {destination} on {day} failed: {outcome}")
+            sources[day] = "error" if day in sources else "unavailable"
+        else:
+            sources[day] = "upstream"
+
+    first, last = min(window), max(window)
+    result = await db.execute(
+        select(Ticket)
+        .where(
+            Ticket.origin == origin,
+            Ticket.destination == destination,
+            Ticket.departure_time >= datetime.combine(first, time.min),
+            Ticket.departure_time < datetime.combine(last + timedelta(days=1), time.min),
+        )
+        .order_by(Ticket.price)
+    )
+    by_day = {}
+    for ticket in result.scalars().all():
+        by_day.setdefault(ticket.departure_time.date(), []).append(ticket.to_dict())
+
+    calendar = [
+        {"date": day.isoformat(), "source": sources.get(day, "skipped"), "tickets": by_day.get(day, [])}
+        for day in sorted(window)
+    ]
+    return _flexible_result(calendar, upstream_searches=len(to_fetch))
+
+
+def _flexible_result(calendar: list, upstream_searches: int) -> dict:
+    """Add each day's cheapest price and the cheapest offer overall to a flexible-date calendar."""
+    cheapest = None
+    for entry in calendar:
+        day_cheapest = min(entry["tickets"], key=lambda ticket: ticket["price"], default=None)
+        entry["cheapest_price"] = day_cheapest["price"] if day_cheapest else None
+        if day_cheapest and (cheapest is None or day_cheapest["price"] < cheapest["price"]):
+            cheapest = day_cheapest
+    return {"days": calendar, "cheapest": cheapest, "upstream_searches": upstream_searches}
+
+
+def _parse_api_time(value: str) -> datetime:
+    """Parse an API timestamp into the naive UTC datetimes stored in the tickets table."""
+    parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+def _parse_itineraries(itineraries: list) -> list:
+    """
+    Map SkyScanner itineraries onto ticket rows, one per (flight_number, departure_time).
+    Results arrive cheapest first, so the first offer seen for a flight is kept.
+    """
+    offers = {}
     for itinerary in itineraries:
         try:
             leg = itinerary["legs"][0]
-            flight_number = leg["segments"][0]["flightNumber"]
-            dep_time = datetime.fromisoformat(leg["departure"].replace("Z", "+00:00"))
-            
-            # Check for existing ticket to avoid duplicates
-            existing = await db.execute(
-                select(Ticket).where(
-                    Ticket.flight_number == flight_number,
-                    cast(Ticket.departure_time, Date) == dep_time.date()
-                )
-            )
-            if existing.scalar_one_or_none():
-                continue  # Skip duplicate
-            
-            new_ticket = Ticket(
-                airline_name=leg["carriers"]["marketing"][0]["name"],
-                flight_number=flight_number,
-                origin=leg["origin"]["id"],
-                destination=leg["destination"]["id"],
-                departure_time=dep_time,
-                arrival_time=datetime.fromisoformat(leg["arrival"].replace("Z", "+00:00")),
-                price=itinerary["price"]["raw"],
-            )
-            db.add(new_ticket)
-            added_count += 1
+            offer = {
+                "airline_name": leg["carriers"]["marketing"][0]["name"],
+                "flight_number": leg["segments"][0]["flightNumber"],
+                "origin": leg["origin"]["id"],
+                "destination": leg["destination"]["id"],
+                "departure_time": _parse_api_time(leg["departure"]),
+                "arrival_time": _parse_api_time(leg["arrival"]),
+                "price": itinerary["price"]["raw"],
+            }
         except (KeyError, IndexError) as e:
             logger.warning(f"Error processing itinerary: {e}")
             continue
+        offers.setdefault((offer["flight_number"], offer["departure_time"]), offer)
+    return list(offers.values())
+
+
+async def cache_ticket_offers(db: AsyncSession, offers: list) -> int:
+    """
+    Bulk-cache ticket offers with INSERT ... ON CONFLICT (flight_number, departure_time).
+    New offers are inserted and the price of cached, still unbooked offers is refreshed
+    in the same statement; booked tickets are left untouched.
+    """
+    for start in range(0, len(offers), TICKET_UPSERT_CHUNK_SIZE):
+        stmt = dialect_insert(db, Ticket).values(offers[start:start + TICKET_UPSERT_CHUNK_SIZE])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["flight_number", "departure_time"],
+            set_={"price": stmt.excluded.price, "arrival_time": stmt.excluded.arrival_time},
+            where=Ticket.user_id.is_(None) & or_(
+                Ticket.price != stmt.excluded.price,
+                Ticket.arrival_time != stmt.excluded.arrival_time,
+            ),
+        )
+        await db.execute(stmt)
 
     await db.commit()
-    logger.info(f"Cached {added_count} new tickets for {origin} -> {destination} on {departure_date}")
+    fare_calendar_cache.invalidate({_calendar_key(offer) for offer in offers})
+    return len(offers)
+
+
+def _calendar_key(offer) -> tuple:
+    """Fare calendar cache key of an offer (dict row, Ticket or result row)."""
+    get = offer.get if isinstance(offer, dict) else lambda field: getattr(offer, field)
+    departure = get("departure_time")
+    return (get("origin"), get("destination"), departure.year, departure.month)
+
+
+async def get_fare_calendar(origin: str, destination: str, month: str, db: AsyncSession) -> dict:
+    """
+    Per-day min/avg price and offer count of unbooked offers on a route for one month (YYYY-MM).
+    Computed by one grouped query over the month's departure_time range and cached
+    per route-month until offers on it are cached or booked.
+    """
+    try:
+        first = datetime.strptime(month, "%Y-%m")
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid month format. Use YYYY-MM")
+
+    key = (origin, destination, first.year, first.month)
+    cached = fare_calendar_cache.get(key)
+    if cached is not None:
+        return cached
+
+    next_month = (first + timedelta(days=32)).replace(day=1)
+    day = func.date(Ticket.departure_time)
+    result = await db.execute(
+        select(day, func.min(Ticket.price), func.avg(Ticket.price), func.count())
+        .where(
+            Ticket.origin == origin,
+            Ticket.destination == destination,
+            Ticket.departure_time >= first,
+            Ticket.departure_time < next_month,
+            Ticket.user_id.is_(None),
+        )
+        .group_by(day)
+    )
+    # date() comes back as a date on Postgres and as a string on SQLite
+    aggregates = {str(row[0]): row[1:] for row in result.all()}
+
+    days = []
+    current = first.date()
+    while current < next_month.date():
+        min_price, avg_price, offers = aggregates.get(current.isoformat(), (None, None, 0))
+        days.append({
+            "date": current.isoformat(),
+            "min_price": min_price,
+            "avg_price": round(avg_price, 2) if avg_price is not None else None,
+            "offers": offers,
+        })
+        current += timedelta(days=1)
+
+    payload = {"origin": origin, "destination": destination, "month": first.strftime("%Y-%m"), "days": days}
+    fare_calendar_cache.set(key, payload)
+    return payload
 
 
 def _get_demo_tickets(origin: str, destination: str, departure_date: str) -> list:
@@ -163,18 +445,35 @@ def _get_demo_tickets(origin: str, destination: str, departure_date: str) -> lis
         for ticket in DEMO_TICKETS
     ]
 
-async def get_cached_tickets(origin: str, destination: str, departure_date: str, db: AsyncSession):
-    """Get cached tickets with proper date filtering."""
+def cached_tickets_query(origin: str, destination: str, target_date: date):
+    """
+    Cached offers on a route departing on `target_date`.
+    The day is a half-open [00:00, next day 00:00) range on departure_time, so the
+    query is a range scan on ix_tickets_route_departure instead of a cast per row.
+    """
+    day_start = datetime.combine(target_date, time.min)
+    return (
+        select(Ticket)
+        .where(
+            Ticket.origin == origin,
+            Ticket.destination == destination,
+            Ticket.departure_time >= day_start,
+            Ticket.departure_time < day_start + timedelta(days=1),
+        )
+        .order_by(Ticket.departure_time)
+    )
+
+def _parse_departure_date(departure_date: str) -> date:
     try:
-        target_date = datetime.strptime(departure_date, "%Y-%m-%d").date()
+        return datetime.strptime(departure_date, "%Y-%m-%d").date()
     except ValueError:
         raise HTTPException(status_code=400, detail="Invalid date format. Use YYYY-MM-DD")
+
+async def get_cached_tickets(origin: str, destination: str, departure_date: str, db: AsyncSession):
+    """Get cached tickets departing on the given date."""
+    target_date = _parse_departure_date(departure_date)
     
-    stmt = select(Ticket).where(
-        Ticket.origin == origin,
-        Ticket.destination == destination,
-        cast(Ticket.departure_time, Date) == target_date
-    )
+    stmt = cached_tickets_query(origin, destination, target_date)
     result = await db.execute(stmt)
     tickets = result.scalars().all()
     
@@ -192,18 +491,82 @@ async def get_cached_tickets(origin: str, destination: str, departure_date: str,
         for t in tickets
     ]
 
-async def book_ticket(ticket_id: int, db: AsyncSession, current_user: User):
+def _flight_key(ticket) -> tuple:
+    """(flight_number, departure_date) of the flight a ticket departs on."""
+    return ticket.flight_number, ticket.departure_time.date()
+
+
+async def _ensure_flights(db: AsyncSession, tickets) -> tuple:
     """
-    Book a ticket, assign a luggage entry, and save flight details to the flights table.
+    Flight ids of the booked tickets' flights (one row per flight number and departure
+    date), inserting the flights that do not exist yet. Flights already in the table (the
+    common case) cost one SELECT; missing ones are added with
+    INSERT ... ON CONFLICT (flight_number, departure_date) DO NOTHING, so concurrent first
+    bookings of a flight neither fail nor wait on each other.
+    Returns ({(flight_number, departure_date): id}, inserted board rows).
     """
-    # Fetch the ticket
-    ticket_result = await db.execute(select(Ticket).where(Ticket.id == ticket_id))
-    ticket = ticket_result.scalar_one_or_none()
+    rows = {
+        _flight_key(ticket): {
+            "airline_name": ticket.airline_name,
+            "flight_number": ticket.flight_number,
+            "origin": ticket.origin,
+            "destination": ticket.destination,
+            "departure_time": ticket.departure_time,
+            "departure_date": ticket.departure_time.date(),
+            "arrival_time": ticket.arrival_time,
+            "status": "Booked",
+        }
+        for ticket in tickets
+    }
+    lookup = (
+        select(Flight.flight_number, Flight.departure_date, Flight.id)
+        .where(tuple_(Flight.flight_number, Flight.departure_date).in_(list(rows)))
+    )
+
+    async def read_ids(stmt) -> dict:
+        return {(number, day): flight_id for number, day, flight_id in (await db.execute(stmt)).all()}
+
+    flight_ids = await read_ids(lookup)
+    missing = [row for key, row in rows.items() if key not in flight_ids]
+    if not missing:
+        return flight_ids, []
 
-    if not ticket:
-        raise HTTPException(status_code=404, detail="Ticket not found.")
+    stmt = dialect_insert(db, Flight).values(missing).on_conflict_do_nothing(
+        index_elements=["flight_number", "departure_date"]
+    )
+    inserted = await read_ids(stmt.returning(Flight.flight_number, Flight.departure_date, Flight.id))
+    flight_ids.update(inserted)
+    if len(flight_ids) < len(rows):
+        # Lost an insert race to a concurrent booking; its row is committed by now
+        flight_ids = await read_ids(lookup)
+    return flight_ids, [{**rows[key], "gate": None} for key in inserted]
+
+
+async def book_ticket(ticket_id: int, db: AsyncSession, current_user: User):
+    """
+    Book a ticket, assign a luggage entry, and link it to its flight (created on first booking).
+    The ticket is claimed with one conditional UPDATE ... WHERE user_id IS NULL, so of
+    any number of concurrent bookings exactly one succeeds without locking the table;
+    the claim, the luggage and the flight row are committed in a single transaction.
+    """
+    claim = await db.execute(
+        update(Ticket)
+        .where(Ticket.id == ticket_id, Ticket.user_id.is_(None))
+        .values(user_id=current_user.id)
+        .returning(
+            Ticket.airline_name, Ticket.flight_number, Ticket.origin, Ticket.destination,
+            Ticket.departure_time, Ticket.arrival_time,
+        )
+        .execution_options(synchronize_session=False)
+    )
+    ticket = claim.first()
 
-    if ticket.user_id:
+    if ticket is None:
+        # Nothing claimed: tell a missing ticket apart from one that is already booked
+        exists = await db.scalar(select(Ticket.id).where(Ticket.id == ticket_id))
+        await db.rollback()
+        if exists is None:
+            raise HTTPException(status_code=404, detail="Ticket not found.")
         raise HTTPException(status_code=400, detail="Ticket already booked.")
 
     # Assign a luggage entry
@@ -215,25 +578,19 @@ async def book_ticket(ticket_id: int, db: AsyncSession, current_user: User):
     db.add(new_luggage)
     await db.flush()  # Ensures luggage ID is generated
 
-    # Update the ticket's user_id and luggage_id
-    ticket.user_id = current_user.id
-    ticket.luggage_id = new_luggage.luggage_id
-
-    # Save flight details to the flights table
-    new_flight = Flight(
-        airline_name=ticket.airline_name,
-        flight_number=ticket.flight_number,
-        origin=ticket.origin,
-        destination=ticket.destination,
-        departure_time=ticket.departure_time,
-        arrival_time=ticket.arrival_time,
-        status="Booked"
+    flight_ids, new_flights = await _ensure_flights(db, [ticket])
+
+    await db.execute(
+        update(Ticket)
+        .where(Ticket.id == ticket_id)
+        .values(luggage_id=new_luggage.luggage_id, flight_id=flight_ids[_flight_key(ticket)])
+        .execution_options(synchronize_session=False)
     )
-    db.add(new_flight)
 
     # Commit the changes
     await db.commit()
-    await db.refresh(ticket)
+    fare_calendar_cache.invalidate([_calendar_key(ticket)])
+    await flight_board_registry.apply(new_flights)
 
     return {
         "message": "Ticket booked successfully.",
@@ -242,22 +599,92 @@ async def book_ticket(ticket_id: int, db: AsyncSession, current_user: User):
     }
 
 
+async def book_tickets(ticket_ids: List[int], db: AsyncSession, current_user: User):
+    """
+    Book several tickets (a party) all-or-nothing, in a constant number of round trips:
+    one conditional UPDATE ... RETURNING claims every ticket, one multi-row INSERT creates
+    the luggage, the flights are resolved in bulk (_ensure_flights), one UPDATE links
+    luggage and flights, and a single commit.
+    If any ticket is missing (404) or already booked (400), nothing is booked.
+    """
+    ticket_ids = list(dict.fromkeys(ticket_ids))
+    claimed = (await db.execute(
+        update(Ticket)
+        .where(Ticket.id.in_(ticket_ids), Ticket.user_id.is_(None))
+        .values(user_id=current_user.id)
+        .returning(
+            Ticket.id, Ticket.airline_name, Ticket.flight_number, Ticket.origin, Ticket.destination,
+            Ticket.departure_time, Ticket.arrival_time,
+        )
+        .execution_options(synchronize_session=False)
+    )).all()
+
+    if len(claimed) < len(ticket_ids):
+        existing = set((await db.scalars(select(Ticket.id).where(Ticket.id.in_(ticket_ids)))).all())
+        await db.rollback()
+        missing = [ticket_id for ticket_id in ticket_ids if ticket_id not in existing]
+        if missing:
+            raise HTTPException(status_code=404, detail=f"Tickets not found: {missing}")
+        claimed_ids = {ticket.id for ticket in claimed}
+        booked = [ticket_id for ticket_id in ticket_ids if ticket_id not in claimed_ids]
+        raise HTTPException(status_code=400, detail=f"Tickets already booked: {booked}")
+
+    luggage_ids = (await db.execute(
+        insert(Luggage)
+        .values([{"weight": 20.0, "status": "Checked-in", "last_location": "Unknown"} for _ in claimed])
+        .returning(Luggage.luggage_id)
+    )).scalars().all()
+    luggage_by_ticket = dict(zip((ticket.id for ticket in claimed), luggage_ids))
+
+    flight_ids, new_flights = await _ensure_flights(db, claimed)
+
+    await db.execute(
+        update(Ticket)
+        .where(Ticket.id.in_(ticket_ids))
+        .values(
+            luggage_id=case(luggage_by_ticket, value=Ticket.id),
+            flight_id=case({ticket.id: flight_ids[_flight_key(ticket)] for ticket in claimed}, value=Ticket.id),
+        )
+        .execution_options(synchronize_session=False)
+    )
+
+    await db.commit()
+    fare_calendar_cache.invalidate({_calendar_key(ticket) for ticket in claimed})
+    await flight_board_registry.apply(new_flights)
+
+    return {
+        "message": f"{len(claimed)} tickets booked successfully.",
+        "bookings": [
+            {"ticket_id": ticket.id, "flight_number": ticket.flight_number, "luggage_id": luggage_by_ticket[ticket.id]}
+            for ticket in sorted(claimed, key=lambda ticket: ticket_ids.index(ticket.id))
+        ],
+    }
+
+
 async def track_luggage_by_id(luggage_id: int, db: AsyncSession):
     """
     Fetch luggage details using the luggage ID.
+    Read-through cached; scan ingestion keeps cached entries current.
     """
+    cached = luggage_status_cache.get(luggage_id)
+    if cached is not None:
+        return cached
+
     luggage_result = await db.execute(select(Luggage).where(Luggage.luggage_id == luggage_id))
     luggage = luggage_result.scalar_one_or_none()
 
     if not luggage:
         raise HTTPException(status_code=404, detail="Luggage not found.")
 
-    return {
+    payload = {
         "luggage_id": luggage.luggage_id,
         "weight": luggage.weight,
         "status": luggage.status,
         "last_location": luggage.last_location,
+        "last_scanned_at": luggage.last_scanned_at.isoformat() if luggage.last_scanned_at else None,
     }
+    luggage_status_cache.set(luggage_id, payload)
+    return payload
 
 async def fetch_user_tickets(db: AsyncSession, user_id: int):
     """
@@ -273,4 +700,61 @@ async def fetch_user_tickets(db: AsyncSession, user_id: int):
     if not tickets:
         return {"message": "No tickets found for the current user"}
     
-    return {"tickets": [ticket.to_dict() for ticket in tickets]}
\ No newline at end of file
+    return {"tickets": [ticket.to_dict() for ticket in tickets]}
+
+async def compute_gate_etas(db: AsyncSession, user_id: int, location_id: int, airport_code: Optional[str] = None):
+    """
+    Walk-time-to-gate ETAs for all of a user's upcoming flights departing from this airport.
+    One query loads the tickets with their gates, and one congestion-adjusted Dijkstra pass
+    from the user's location (memoized until congestion changes) prices every gate at once.
+    """
+    partition = await map_graph_cache.get(db, airport_code)
+    if location_id not in partition.locations:
+        raise HTTPException(status_code=404, detail="Location not found in this airport.")
+
+    now = datetime.utcnow()
+    result = await db.execute(
+        select(Ticket.id, Ticket.flight_number, Ticket.departure_time, Flight.gate)
+        .outerjoin(Flight, ticket_flight_join())
+        .where(
+            Ticket.user_id == user_id,
+            Ticket.origin == partition.airport_code,
+            Ticket.departure_time > now,
+        )
+        .order_by(Ticket.departure_time)
+    )
+    rows = result.all()
+
+    distances = partition.distances_from(location_id) if rows else {}
+    boarding_close = timedelta(minutes=settings.BOARDING_CLOSE_MINUTES)
+
+    etas = []
+    for ticket_id, flight_number, departure_time, gate in rows:
+        gate_location_id = partition.find_gate(gate)
+        distance = distances.get(gate_location_id)
+        eta = {
+            "ticket_id": ticket_id,
+            "flight_number": flight_number,
+            "departure_time": departure_time.isoformat(),
+            "gate": gate,
+            "gate_location_id": gate_location_id,
+            "walk_minutes": None,
+            "leave_by": None,
+            "leave_now": False,
+        }
+        if distance is not None:
+            walk_minutes = distance / settings.WALKING_SPEED_M_PER_MIN
+            leave_by = departure_time - boarding_close - timedelta(minutes=walk_minutes)
+            eta.update({
+                "walk_minutes": round(walk_minutes, 1),
+                "leave_by": leave_by.isoformat(),
+                "leave_now": leave_by <= now,
+            })
+        etas.append(eta)
+
+    return {
+        "airport_code": partition.airport_code,
+        "location_id": location_id,
+        "congestion_epoch": partition.congestion_epoch,
+        "etas": etas,
+    }
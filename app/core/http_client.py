@@ -0,0 +1,36 @@
+"""
+Shared async HTTP client.
+
+One pooled httpx.AsyncClient is created lazily and reused by outbound
+integrations, so upstream calls reuse keep-alive connections instead of
+opening a new one per request. The client is closed on app shutdown.
+"""
+from typing import Optional
+
+import httpx
+
+from .settings import settings
+
+_client: Optional[httpx.AsyncClient] = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Return the process-wide pooled HTTP client, creating it on first use."""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(
+            timeout=httpx.Timeout(settings.HTTP_TIMEOUT_SECONDS),
+            limits=httpx.Limits(
+                max_connections=settings.HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.HTTP_MAX_CONNECTIONS,
+            ),
+        )
+    return _client
+
+
+async def close_http_client():
+    """Close the shared client (called from the app lifespan)."""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
@@ -30,9 +30,75 @@ class Settings(BaseSettings):
     BOOKING_API_KEY: Optional[str] = Field(None, description="SkyScanner/RapidAPI key")
     GOOGLE_API_KEY: Optional[str] = Field(None, description="Google Places API key")
     
+    # Outbound HTTP
+    HTTP_TIMEOUT_SECONDS: float = Field(30.0, description="Timeout for outbound API calls")
+    HTTP_MAX_CONNECTIONS: int = Field(20, description="Connection pool size of the shared HTTP client")
+
+    # AviationStack ingestion
+    FLIGHTS_API_PAGE_SIZE: int = Field(100, description="Flights requested per AviationStack page")
+    FLIGHTS_API_MAX_PAGES: int = Field(5, description="Maximum pages fetched per airport per refresh")
+    FLIGHTS_API_CONCURRENCY: int = Field(4, description="Maximum concurrent AviationStack requests")
+    FLIGHT_POLL_AIRPORTS: List[str] = Field(
+        default=[],
+        description="Departure airports polled in the background (empty disables the poller)"
+    )
+    FLIGHT_POLL_INTERVAL_SECONDS: int = Field(300, description="Seconds between background flight polls")
+    FLIGHT_TRACK_CACHE_TTL_SECONDS: float = Field(30.0, description="Lifetime of cached flight tracking responses")
+    FLIGHT_TRACK_CACHE_SIZE: int = Field(10000, description="Maximum flights held in the tracking cache")
+
+    # Ticket search freshness
+    TICKET_SEARCH_TTL_SECONDS: int = Field(
+        900,
+        description="Cached offers for a route/date older than this are served stale and refreshed in the background"
+    )
+
+    FLEX_SEARCH_MAX_DAYS: int = Field(3, description="Largest +/- day window a flexible-date search may request")
+    FLEX_SEARCH_CONCURRENCY: int = Field(4, description="Concurrent upstream searches per flexible-date request")
+    FLEX_SEARCH_UPSTREAM_BUDGET: int = Field(
+        7,
+        description="Upstream searches one flexible-date request may spend; other uncached days are skipped"
+    )
+
+    FARE_CALENDAR_CACHE_TTL_SECONDS: float = Field(600.0, description="Lifetime of cached fare calendars")
+    FARE_CALENDAR_CACHE_SIZE: int = Field(5000, description="Maximum route-months held in the fare calendar cache")
+
+    # Luggage tracking
+    LUGGAGE_STATUS_CACHE_TTL_SECONDS: float = Field(30.0, description="Lifetime of cached luggage tracking responses")
+    LUGGAGE_STATUS_CACHE_SIZE: int = Field(50000, description="Maximum bags held in the luggage status cache")
+
+    # Departures/arrivals boards
+    FLIGHT_BOARD_HOURS: int = Field(12, description="Hours ahead shown on departures/arrivals boards")
+    FLIGHT_BOARD_LOOKBACK_MINUTES: int = Field(60, description="Minutes a past flight stays on the board")
+    FLIGHT_BOARD_REBUILD_SECONDS: int = Field(300, description="How often a board is rebuilt from the database")
+
+    # Delta sync
+    CHANGE_FEED_SETTLE_SECONDS: float = Field(
+        2.0,
+        description="Rows changed more recently than this (by the database clock) are held back from change feeds; must exceed the longest write-to-commit delay"
+    )
+
+    # Idempotency-Key handling for retried POSTs
+    IDEMPOTENCY_TTL_SECONDS: float = Field(86400.0, description="How long a stored response is replayed for its Idempotency-Key")
+    IDEMPOTENCY_MAX_KEYS: int = Field(10000, description="Maximum idempotency keys remembered per process")
+
     # Feature flags
     DEMO_MODE: bool = Field(False, description="Return stub data when API keys missing")
-    
+
+    # Airport maps
+    DEFAULT_AIRPORT_CODE: str = Field("TLV", description="Airport used when a map request does not name one")
+    MAP_GRAPH_CACHE_MAX_BYTES: int = Field(
+        64 * 1024 * 1024,
+        description="Approximate memory budget for cached navigation graphs (LRU evicted)"
+    )
+    WALKING_SPEED_M_PER_MIN: float = Field(80.0, description="Walking speed used for gate ETAs (map units per minute)")
+    BOARDING_CLOSE_MINUTES: int = Field(20, description="Minutes before departure that the gate closes")
+
+    # Security/check-in wait times
+    WAIT_TIME_REFRESH_SECONDS: int = Field(30, description="How often checkpoint wait times are recomputed")
+    WAIT_TIME_HISTORY_SIZE: int = Field(20, description="Congestion samples kept per checkpoint")
+    CHECKPOINT_LANES: int = Field(4, description="Open lanes assumed per security/check-in checkpoint")
+    CHECKPOINT_SERVICE_RATE_PER_MIN: float = Field(2.0, description="Passengers one lane processes per minute")
+
     class Config:
         env_file = ".env"
         env_file_encoding = "utf-8"
@@ -0,0 +1,25 @@
+"""
+Opaque keyset cursors.
+
+A cursor is the (timestamp, id) sort key of the last row a client has seen,
+JSON-encoded and base64url'd so clients treat it as an opaque token.
+"""
+import base64
+import json
+from datetime import datetime
+from typing import Tuple
+
+from fastapi import HTTPException
+
+
+def encode_cursor(position: datetime, row_id: int) -> str:
+    raw = json.dumps([position.isoformat(), row_id])
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        position, row_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return datetime.fromisoformat(position), int(row_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor.")
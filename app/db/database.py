@@ -1,5 +1,6 @@
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.dialects import postgresql, sqlite
 from ..base import Base  # Ensure this imports all models and remains intact
 from ..core.settings import settings
 
@@ -27,6 +28,22 @@ async def get_db():
     async with SessionLocal() as session:
         yield session
 
+def get_session_factory():
+    """
+    Dependency returning the session factory itself, for handlers whose work
+    outlives the request-scoped session (e.g. streaming responses).
+    """
+    return SessionLocal
+
+def dialect_insert(db: AsyncSession, table):
+    """
+    INSERT construct with ON CONFLICT support for the session's dialect
+    (PostgreSQL in production, SQLite in tests).
+    """
+    if db.bind.dialect.name == "sqlite":
+        return sqlite.insert(table)
+    return postgresql.insert(table)
+
 # Function to create missing tables
 async def create_tables():
     async with engine.begin() as conn:
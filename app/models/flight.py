@@ -1,24 +1,39 @@
 # app/models/flight.py
-from sqlalchemy import Column, Integer, String, DateTime, Index
+from datetime import datetime
+from sqlalchemy import Column, Integer, String, Date, DateTime, Index, UniqueConstraint, case, select
 from ..base import Base
+from ..db.change_feed import db_utcnow
+
+
+def _scheduled_date(context):
+    return context.get_current_parameters()["departure_time"].date()
+
 
 class Flight(Base):
     __tablename__ = "flights"
     
     # Add composite index for common queries
     __table_args__ = (
+        # One row per flight number and scheduled day (upsert key for ingestion and booking)
+        UniqueConstraint('flight_number', 'departure_date', name='uq_flights_number_departure_date'),
         Index('ix_flights_origin_destination', 'origin', 'destination'),
-        Index('ix_flights_departure', 'departure_time'),
+        Index('ix_flights_departure_id', 'departure_time', 'id'),  # Keyset order of the flight listing
+        Index('ix_flights_updated_at', 'updated_at', 'id'),  # Delta-sync feed
     )
 
     id = Column(Integer, primary_key=True, index=True)
     airline_name = Column(String, nullable=False)
-    flight_number = Column(String, nullable=False, unique=True, index=True)
+    flight_number = Column(String, nullable=False)
     origin = Column(String, nullable=False)
     destination = Column(String, nullable=False)
     departure_time = Column(DateTime, nullable=False)
+    # Day the flight was scheduled to depart; not moved by delays
+    departure_date = Column(Date, nullable=False, default=_scheduled_date)
     arrival_time = Column(DateTime, nullable=False)
     status = Column(String, nullable=False)
+    terminal = Column(String, nullable=True)  # Departure terminal, when known
+    gate = Column(String, nullable=True)  # Departure gate, e.g. "B2"
+    updated_at = Column(DateTime, nullable=False, default=db_utcnow(), onupdate=db_utcnow())
 
     def to_dict(self):
         """
@@ -33,4 +48,19 @@ class Flight(Base):
             "departure_time": self.departure_time.isoformat() if self.departure_time else None,
             "arrival_time": self.arrival_time.isoformat() if self.arrival_time else None,
             "status": self.status,
-        }
\ No newline at end of file
+            "terminal": self.terminal,
+            "gate": self.gate,
+        }
+
+def select_current_flight(flight_number: str):
+    """
+    The flight_number's row that tracking and admin edits refer to: the earliest
+    one that has not landed yet, or else the most recent one.
+    """
+    landed = Flight.arrival_time < datetime.utcnow()
+    return (
+        select(Flight)
+        .where(Flight.flight_number == flight_number)
+        .order_by(landed, case((landed, None), else_=Flight.departure_time), Flight.departure_time.desc())
+        .limit(1)
+    )
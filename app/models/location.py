@@ -1,10 +1,17 @@
-from sqlalchemy import Column, Integer, String, JSON, Text
+from sqlalchemy import Column, Integer, String, JSON, Text, Index
 from ..base import Base
 
 class Location(Base):
     __tablename__ = "locations"
 
+    # Maps are partitioned per airport (and optionally per terminal)
+    __table_args__ = (
+        Index('ix_locations_airport_terminal', 'airport_code', 'terminal'),
+    )
+
     id = Column(Integer, primary_key=True, index=True)
+    airport_code = Column(String, nullable=False)  # IATA code of the airport this location belongs to
+    terminal = Column(String, nullable=True)  # Optional terminal within the airport
     name = Column(String, nullable=False)
     type = Column(String, nullable=False)
     category = Column(String, nullable=True)  # Optional category for grouping
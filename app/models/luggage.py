@@ -13,6 +13,7 @@ class Luggage(Base):
     weight = Column(Float, nullable=True)
     status = Column(String, nullable=True)
     last_location = Column(String, nullable=True)
+    last_scanned_at = Column(DateTime, nullable=True)  # scanned_at of the event status/last_location come from
     created_at = Column(DateTime, server_default=func.now(), nullable=False)
     updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now(), nullable=False)
 
@@ -0,0 +1,18 @@
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Index
+from datetime import datetime
+from ..base import Base
+
+class LuggageEvent(Base):
+    """Append-only log of belt scanner readings for a bag."""
+    __tablename__ = "luggage_events"
+    __table_args__ = (
+        Index('ix_luggage_events_luggage_scanned', 'luggage_id', 'scanned_at'),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    luggage_id = Column(Integer, ForeignKey("luggage.luggage_id", ondelete="CASCADE"), nullable=False)
+    status = Column(String, nullable=False)
+    location = Column(String, nullable=False)
+    scanner_id = Column(String, nullable=True)
+    scanned_at = Column(DateTime, nullable=False)  # Scanner clock (UTC)
+    received_at = Column(DateTime, nullable=False, default=datetime.utcnow)
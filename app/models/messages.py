@@ -1,15 +1,20 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, Text, DateTime
+from sqlalchemy import Column, Integer, String, ForeignKey, Text, DateTime, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from ..base import Base
+from ..db.change_feed import db_utcnow
 
 class Message(Base):
     __tablename__ = "messages"
+    __table_args__ = (
+        Index('ix_messages_user_updated_at', 'user_id', 'updated_at', 'id'),  # Delta-sync feed
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"))
     content = Column(Text, nullable=False)
     status = Column(String, default="unread")
     created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, nullable=False, default=db_utcnow(), onupdate=db_utcnow())
 
     user = relationship("User", back_populates="messages")
@@ -1,9 +1,16 @@
-from sqlalchemy import Column, Integer, String, DateTime, Float, ForeignKey
+from sqlalchemy import Column, Integer, String, DateTime, Float, ForeignKey, UniqueConstraint, Index, and_, func, or_
 from sqlalchemy.orm import relationship
 from ..base import Base
+from .flight import Flight
 
 class Ticket(Base):
     __tablename__ = "tickets"
+    __table_args__ = (
+        # One cached offer per flight departure (upsert key for fetched offers)
+        UniqueConstraint('flight_number', 'departure_time', name='uq_tickets_flight_departure'),
+        # Cached ticket search: route equality + departure_time range
+        Index('ix_tickets_route_departure', 'origin', 'destination', 'departure_time'),
+    )
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     airline_name = Column(String, nullable=False)
@@ -14,12 +21,14 @@ class Ticket(Base):
     arrival_time = Column(DateTime, nullable=False)
     price = Column(Float, nullable=False)
 
-    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=True)  # NULL until booked
 
     user = relationship("User", back_populates="tickets")
 
     luggage_id = Column(Integer, ForeignKey("luggage.luggage_id"), unique=True, nullable=True)
 
+    flight_id = Column(Integer, ForeignKey("flights.id"), nullable=True, index=True)  # Set when booked
+
     luggage = relationship("Luggage", back_populates="ticket", uselist=False)
 
     def to_dict(self):
@@ -33,4 +42,20 @@ class Ticket(Base):
             "arrival_time": self.arrival_time.isoformat(),
             "price": self.price,
             "luggage_id": self.luggage_id,
-        }
\ No newline at end of file
+            "flight_id": self.flight_id,
+        }
+
+
+def ticket_flight_join():
+    """
+    Join condition from a ticket to its flight row: the linked flight, or for a
+    ticket not linked yet, the flight with its number departing on its day.
+    """
+    return or_(
+        Ticket.flight_id == Flight.id,
+        and_(
+            Ticket.flight_id.is_(None),
+            Flight.flight_number == Ticket.flight_number,
+            Flight.departure_date == func.date(Ticket.departure_time),
+        ),
+    )
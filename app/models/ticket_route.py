@@ -0,0 +1,15 @@
+from sqlalchemy import Column, Integer, String, Date, DateTime
+from ..base import Base
+
+class TicketRouteFetch(Base):
+    """
+    When offers for a route and departure date were last fetched from upstream.
+    Drives the stale-while-revalidate ticket search.
+    """
+    __tablename__ = "ticket_route_fetches"
+
+    origin = Column(String, primary_key=True)
+    destination = Column(String, primary_key=True)
+    departure_date = Column(Date, primary_key=True)
+    last_fetched_at = Column(DateTime, nullable=False)
+    ttl_seconds = Column(Integer, nullable=True)  # Overrides TICKET_SEARCH_TTL_SECONDS for this route
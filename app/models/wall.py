@@ -1,10 +1,16 @@
-from sqlalchemy import Column, Integer, Float
+from sqlalchemy import Column, Integer, String, Float, Index
 from ..base import Base
 
 class Wall(Base):
     __tablename__ = "walls"
 
+    __table_args__ = (
+        Index('ix_walls_airport_terminal', 'airport_code', 'terminal'),
+    )
+
     id = Column(Integer, primary_key=True, index=True)
+    airport_code = Column(String, nullable=False)
+    terminal = Column(String, nullable=True)  # NULL means the wall applies to the whole airport
     x1 = Column(Float, nullable=False)
     y1 = Column(Float, nullable=False)
     x2 = Column(Float, nullable=False)
@@ -30,6 +30,8 @@ class FlightUpdateRequest(BaseModel):
     departure_time: Optional[datetime] = None
     arrival_time: Optional[datetime] = None
     status: Optional[str] = None
+    terminal: Optional[str] = None
+    gate: Optional[str] = None
 
 @router.get("/admin/flights", dependencies=[Depends(admin_only)])
 async def admin_get_flights(db: AsyncSession = Depends(get_db)):
@@ -0,0 +1,37 @@
+from fastapi import APIRouter, Depends
+from fastapi.responses import StreamingResponse
+from app.db.database import get_session_factory
+from app.controllers.export_controller import (
+    stream_export,
+    export_media_type,
+    FLIGHT_EXPORT_COLUMNS,
+    TICKET_EXPORT_COLUMNS,
+)
+from app.auth.auth_utils import admin_only
+
+router = APIRouter()
+
+
+def _export_response(name: str, columns, format: str, session_factory) -> StreamingResponse:
+    media_type = export_media_type(format)
+    return StreamingResponse(
+        stream_export(session_factory, columns, format),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{name}.{format}"'},
+    )
+
+
+@router.get("/admin/export/flights", dependencies=[Depends(admin_only)])
+async def export_flights(format: str = "ndjson", session_factory=Depends(get_session_factory)):
+    """
+    Stream every flight as NDJSON or CSV.
+    """
+    return _export_response("flights", FLIGHT_EXPORT_COLUMNS, format, session_factory)
+
+
+@router.get("/admin/export/tickets", dependencies=[Depends(admin_only)])
+async def export_tickets(format: str = "ndjson", session_factory=Depends(get_session_factory)):
+    """
+    Stream every ticket as NDJSON or CSV.
+    """
+    return _export_response("tickets", TICKET_EXPORT_COLUMNS, format, session_factory)
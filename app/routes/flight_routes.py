@@ -1,25 +1,76 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+from datetime import datetime
 from ..db.database import get_db
-from ..controllers.flight_controller import get_all_flights, create_flight, fetch_and_save_flights,track_flight_by_number
+from ..db.change_feed import DEFAULT_CHANGES_LIMIT, MAX_CHANGES_LIMIT
+from ..controllers.flight_controller import get_all_flights, create_flight, fetch_and_save_flights,track_flight_by_number, get_flight_board, get_flight_changes, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
 
 router = APIRouter()
 
 @router.get("/flights")
-async def fetch_flights(db: AsyncSession = Depends(get_db)):
+async def fetch_flights(
+    origin: Optional[str] = None,
+    destination: Optional[str] = None,
+    status: Optional[str] = None,
+    departure_from: Optional[datetime] = None,
+    departure_to: Optional[datetime] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_db)
+):
     """
-    Fetch all flights from the database and return them.
+    List flights by departure time with optional filters.
+    Pass the returned next_cursor to get the following page.
     """
-    return await get_all_flights(db)
+    return await get_all_flights(
+        db, origin=origin, destination=destination, status=status,
+        departure_from=departure_from, departure_to=departure_to,
+        cursor=cursor, limit=limit
+    )
+
+@router.get("/flights/changes")
+async def fetch_flight_changes(
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_CHANGES_LIMIT, ge=1, le=MAX_CHANGES_LIMIT),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Flights created or modified since the cursor, oldest change first.
+    Omit the cursor for a full sync; keep the returned cursor for the next poll.
+    """
+    return await get_flight_changes(db, cursor=cursor, limit=limit)
+
+
+@router.get("/flights/board/{airport}")
+async def flight_board(airport: str, request: Request, db: AsyncSession = Depends(get_db)):
+    """
+    Departures/arrivals board for an airport. Supports If-None-Match; live
+    updates are pushed over /ws/notifications to subscribers of "board:<airport>".
+    """
+    etag, body = await get_flight_board(db, airport)
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+    return Response(content=body, media_type="application/json", headers={"ETag": etag})
 
 @router.post("/flights/fetch")
-async def fetch_live_flights(db: AsyncSession = Depends(get_db)):
+async def fetch_live_flights(
+    airports: Optional[List[str]] = Query(None, description="Departure airport IATA codes"),
+    db: AsyncSession = Depends(get_db)
+):
     """
     Fetch live flights from the AviationStack API and save them to the database.
     """
     try:
-        await fetch_and_save_flights(db)
-        return {"message": "Live flights fetched and saved successfully."}
+        result = await fetch_and_save_flights(db, airports)
+        return {
+            "message": "Live flights fetched and saved successfully.",
+            "inserted": result["inserted"],
+            "updated": result["updated"],
+            "unchanged": result["unchanged"],
+        }
+    except HTTPException as e:
+        raise e
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -0,0 +1,32 @@
+from fastapi import APIRouter, Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.database import get_db
+from app.controllers.luggage_controller import ingest_luggage_scans, MAX_SCAN_BATCH
+from app.auth.auth_utils import admin_only
+from pydantic import BaseModel, Field
+from typing import List, Optional
+from datetime import datetime
+
+router = APIRouter()
+
+class LuggageScan(BaseModel):
+    luggage_id: int
+    status: str
+    location: str
+    scanned_at: datetime
+    scanner_id: Optional[str] = None
+
+class LuggageScanBatch(BaseModel):
+    events: List[LuggageScan] = Field(..., min_length=1, max_length=MAX_SCAN_BATCH)
+
+@router.post("/admin/luggage/scans", dependencies=[Depends(admin_only)])
+async def ingest_scans(batch: LuggageScanBatch, db: AsyncSession = Depends(get_db)):
+    """
+    Ingest a batch of belt scanner events (admin/scanner accounts only).
+    """
+    result = await ingest_luggage_scans(db, [event.model_dump() for event in batch.events])
+    return {
+        "accepted": result["accepted"],
+        "rejected_luggage_ids": result["rejected"],
+        "updated": len(result["updated"]),
+    }
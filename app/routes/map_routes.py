@@ -1,5 +1,6 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Query
 from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional
 from app.db.database import get_db
 from app.controllers.map_controller import (
     add_location,
@@ -8,7 +9,10 @@ from app.controllers.map_controller import (
     delete_location,
     get_map_data,
     calculate_shortest_path,
-    update_and_fetch_congestion
+    search_locations,
+    update_and_fetch_congestion,
+    get_congestion_heatmap,
+    get_wait_times
 )
 
 from ..auth.auth_utils import admin_only
@@ -17,6 +21,8 @@ from pydantic import BaseModel
 class NavigationRequest(BaseModel):
     source_id: int
     destination_id: int
+    airport_code: Optional[str] = None  # Defaults to settings.DEFAULT_AIRPORT_CODE
+    terminal: Optional[str] = None
 
 router = APIRouter()
 
@@ -26,14 +32,32 @@ router = APIRouter()
 #     return {"message": "Mock map data populated successfully"}
 
 @router.get("/map")
-async def fetch_map(db: AsyncSession = Depends(get_db)):
+async def fetch_map(
+    airport_code: Optional[str] = None,
+    terminal: Optional[str] = None,
+    db: AsyncSession = Depends(get_db)
+):
     # Call the controller function to get map data
-    return await get_map_data(db)
+    return await get_map_data(db, airport_code, terminal)
+
+@router.get("/map/search")
+async def search_map_locations(
+    q: str = Query(..., min_length=1, max_length=100),
+    airport_code: Optional[str] = None,
+    terminal: Optional[str] = None,
+    limit: int = Query(10, ge=1, le=50),
+    db: AsyncSession = Depends(get_db)
+):
+    # Typeahead over location names, types, categories and descriptions
+    return await search_locations(q, db, airport_code, terminal, limit)
 
 @router.post("/map/navigate")
 async def navigate(request: NavigationRequest, db: AsyncSession = Depends(get_db)):
-    # Extract source_id and destination_id from the request
-    return await calculate_shortest_path(request.source_id, request.destination_id, db)
+    # Route within the requested airport's cached graph
+    return await calculate_shortest_path(
+        request.source_id, request.destination_id, db,
+        airport_code=request.airport_code, terminal=request.terminal
+    )
 
 #admin
 @router.post("/admin/map/location", dependencies=[Depends(admin_only)])
@@ -68,6 +92,21 @@ async def remove_location(
     return await delete_location(location_id, db)
 
 
+@router.get("/map/congestion/heatmap")
+async def congestion_heatmap(
+    cell_size: float = Query(50.0, gt=0),
+    airport_code: Optional[str] = None,
+    terminal: Optional[str] = None,
+    db: AsyncSession = Depends(get_db)
+):
+    # Grid of average path congestion for ops dashboards
+    return await get_congestion_heatmap(db, cell_size, airport_code, terminal)
+
+@router.get("/map/wait-times")
+async def checkpoint_wait_times(airport_code: Optional[str] = None):
+    # Precomputed minute estimates for security and check-in queues
+    return get_wait_times(airport_code)
+
 @router.post("/map/update-congestion")
 async def update_and_fetch_congestion_route(db: AsyncSession = Depends(get_db)):
     return await update_and_fetch_congestion(db)
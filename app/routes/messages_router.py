@@ -1,10 +1,12 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
+from typing import Optional
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from app.auth.auth_utils import get_current_user
 from app.models.messages import Message
 from app.models.users import User
 from ..db.database import get_db
+from ..db.change_feed import changes_since, DEFAULT_CHANGES_LIMIT, MAX_CHANGES_LIMIT
 
 router = APIRouter()
 
@@ -23,6 +25,22 @@ async def get_messages(
     return {"messages": [{"id": m.id, "content": m.content, "status": m.status, "created_at": m.created_at} for m in messages]}
 
 
+@router.get("/messages/changes", tags=["Messages"])
+async def get_message_changes(
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_CHANGES_LIMIT, ge=1, le=MAX_CHANGES_LIMIT),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Messages of the logged-in user created or modified since the cursor.
+    """
+    return await changes_since(
+        db, Message, (Message.id, Message.content, Message.status, Message.created_at),
+        cursor=cursor, limit=limit, filters=(Message.user_id == current_user.id,)
+    )
+
+
 @router.put("/messages/{message_id}", tags=["Messages"])
 async def mark_message_as_read(
     message_id: int,
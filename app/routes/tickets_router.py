@@ -1,8 +1,11 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Query, Header, Response
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.db.database import get_db
-from app.controllers.tickets_controller import fetch_and_cache_tickets, get_cached_tickets, book_ticket, track_luggage_by_id, fetch_user_tickets
-from pydantic import BaseModel
+from app.db.database import get_db, get_session_factory
+from app.controllers.tickets_controller import search_and_cache_tickets, search_tickets, search_flexible_dates, get_fare_calendar, get_cached_tickets, book_ticket, book_tickets, PARTY_BOOKING_MAX_TICKETS, track_luggage_by_id, fetch_user_tickets, compute_gate_etas
+from pydantic import BaseModel, Field
+from typing import List, Optional
+from app.core.settings import settings
+from app.cache.idempotency import idempotency_store, request_fingerprint
 from app.models.ticket import Ticket
 from app.models.users import User
 from ..auth.auth_utils import get_current_user
@@ -25,38 +28,129 @@ class FetchTicketsRequest(BaseModel):
     destination: str
     departure_date: str
 
+async def _idempotent(scope: tuple, idempotency_key: Optional[str], payload: BaseModel, response: Response, fn):
+    """Run `fn` once per Idempotency-Key; retries get the stored outcome."""
+    if not idempotency_key:
+        return await fn()
+    result, replayed = await idempotency_store.run(
+        (*scope, idempotency_key), request_fingerprint(payload.model_dump()), fn
+    )
+    if replayed:
+        response.headers["Idempotent-Replayed"] = "true"
+    return result
+
 @router.post("/tickets/fetch")
-async def fetch_tickets_route(request: FetchTicketsRequest, db: AsyncSession = Depends(get_db)):
+async def fetch_tickets_route(
+    request: FetchTicketsRequest,
+    response: Response,
+    idempotency_key: Optional[str] = Header(None),
+    session_factory=Depends(get_session_factory)
+):
     """
     Endpoint to fetch tickets from the external API and save them to the database.
+    Concurrent identical searches share one upstream call; retries sent with the
+    same Idempotency-Key get the first response back.
     """
-    try:
-        await fetch_and_cache_tickets(
+    async def fetch():
+        await search_and_cache_tickets(
             origin=request.origin,
             destination=request.destination,
             departure_date=request.departure_date,
-            db=db,
+            session_factory=session_factory,
         )
         return {"message": "Tickets fetched and saved successfully."}
+
+    try:
+        return await _idempotent(("fetch",), idempotency_key, request, response, fetch)
+    except HTTPException as e:
+        raise e
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get("/tickets/search")
+async def search_tickets_route(
+    origin: str,
+    destination: str,
+    departure_date: str,
+    db: AsyncSession = Depends(get_db),
+    session_factory=Depends(get_session_factory)
+):
+    """
+    Search offers for a route and date (YYYY-MM-DD).
+    Cached offers are returned straight away; stale ones are refreshed in the background.
+    """
+    return await search_tickets(origin, destination, departure_date, db, session_factory)
+
+@router.get("/tickets/search/flexible")
+async def search_flexible_dates_route(
+    origin: str,
+    destination: str,
+    departure_date: str,
+    days: int = Query(settings.FLEX_SEARCH_MAX_DAYS, ge=0, le=settings.FLEX_SEARCH_MAX_DAYS),
+    db: AsyncSession = Depends(get_db),
+    session_factory=Depends(get_session_factory)
+):
+    """
+    Offers for departure_date +/- days, grouped per day, with the cheapest overall.
+    """
+    return await search_flexible_dates(origin, destination, departure_date, days, db, session_factory)
+
+@router.get("/tickets/calendar")
+async def fare_calendar_route(origin: str, destination: str, month: str, db: AsyncSession = Depends(get_db)):
+    """
+    Cheapest and average fare plus offer count per day of a month (YYYY-MM) on a route.
+    """
+    return await get_fare_calendar(origin, destination, month, db)
+
 class BookTicketRequest(BaseModel):
     ticket_id: int
 
 @router.post("/tickets/book")
 async def book_ticket_route(
     request: BookTicketRequest,
-    db: AsyncSession = Depends(get_db),
+    response: Response,
+    idempotency_key: Optional[str] = Header(None),
+    session_factory=Depends(get_session_factory),
     current_user: User = Depends(get_current_user)  # Add current_user dependency
 ):
     """
     Book a ticket and assign a luggage entry, associating it with the logged-in user.
+    Retries sent with the same Idempotency-Key get the first response back instead
+    of booking again.
     """
+    async def book():
+        # Own session: a coalesced retry may outlive the request that started the booking
+        async with session_factory() as db:
+            return await book_ticket(ticket_id=request.ticket_id, db=db, current_user=current_user)
+
     try:
-        # Pass current_user to associate the ticket with the logged-in user
-        booking_info = await book_ticket(ticket_id=request.ticket_id, db=db, current_user=current_user)
-        return booking_info
+        return await _idempotent(("book", current_user.id), idempotency_key, request, response, book)
+    except HTTPException as e:
+        raise e
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"An error occurred: {str(e)}")
+
+
+class BookTicketsRequest(BaseModel):
+    ticket_ids: List[int] = Field(..., min_length=1, max_length=PARTY_BOOKING_MAX_TICKETS)
+
+@router.post("/tickets/book/batch")
+async def book_tickets_route(
+    request: BookTicketsRequest,
+    response: Response,
+    idempotency_key: Optional[str] = Header(None),
+    session_factory=Depends(get_session_factory),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Book several tickets for the logged-in user in one all-or-nothing transaction.
+    """
+    async def book():
+        async with session_factory() as db:
+            return await book_tickets(ticket_ids=request.ticket_ids, db=db, current_user=current_user)
+
+    try:
+        return await _idempotent(("book-batch", current_user.id), idempotency_key, request, response, book)
     except HTTPException as e:
         raise e
     except Exception as e:
@@ -68,6 +162,7 @@ async def book_ticket_route(
 async def track_luggage(luggage_id: int, db: AsyncSession = Depends(get_db)):
     """
     Track luggage by its ID.
+    For live updates, subscribe to the "luggage:<id>" topic on the WebSocket instead of polling.
     """
     try:
         return await track_luggage_by_id(luggage_id, db)
@@ -93,4 +188,17 @@ async def get_my_tickets(
         tickets = result.scalars().all()
         return {"tickets": [ticket.to_dict() for ticket in tickets]}
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error fetching tickets: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Error fetching tickets: {str(e)}")
+
+
+@router.get("/my-tickets/eta", tags=["Tickets"])
+async def get_my_gate_etas(
+    location_id: int,
+    airport_code: Optional[str] = None,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Walk-time-to-gate ETAs for the current user's upcoming flights, from the given map location.
+    """
+    return await compute_gate_etas(db, current_user.id, location_id, airport_code)
@@ -71,12 +71,16 @@ class FlightUpdate(BaseModel):
     departure_time: Optional[datetime] = None
     arrival_time: Optional[datetime] = None
     status: Optional[str] = None
+    terminal: Optional[str] = None
+    gate: Optional[str] = None
 
 
 class FlightResponse(FlightBase):
     """Response schema for flight details."""
     id: int
     status: str
+    terminal: Optional[str] = None
+    gate: Optional[str] = None
     
     class Config:
         from_attributes = True
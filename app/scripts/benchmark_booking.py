@@ -0,0 +1,138 @@
+"""
+Concurrency benchmark for ticket booking.
+Run with: python -m app.scripts.benchmark_booking --workers 50 --tickets 500
+
+Seeds benchmark users and unbooked tickets into the configured database, then
+  1. hammers one ticket with --workers simultaneous bookings, and
+  2. books --tickets distinct tickets with --workers concurrent bookers,
+checking that every ticket is booked exactly once (one owner, one luggage row,
+one flight row) and printing booking throughput. The seeded rows are deleted
+afterwards. Point DATABASE_URL at a scratch database.
+"""
+import argparse
+import asyncio
+import time
+import uuid
+from collections import Counter
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+from fastapi import HTTPException
+from sqlalchemy import delete, func, insert
+from sqlalchemy.future import select
+
+from app.db.database import SessionLocal, engine
+from app.base import Base
+from app.models.flight import Flight
+from app.models.luggage import Luggage
+from app.models.ticket import Ticket
+from app.models.users import User
+from app.controllers.tickets_controller import book_ticket
+
+
+async def seed(run: str, users: int, tickets: int):
+    """Insert benchmark users and tickets; returns (user ids, ticket ids)."""
+    departure = datetime(2030, 1, 1, 8)
+    async with SessionLocal() as db:
+        await db.execute(insert(User), [
+            {"username": f"bench-{run}-{i}", "email": f"bench-{run}-{i}@example.com",
+             "password_hash": "x", "role": "user"}
+            for i in range(users)
+        ])
+        await db.execute(insert(Ticket), [
+            {"airline_name": "BENCHMARK", "flight_number": f"BK-{run}-{i}", "origin": "TLV",
+             "destination": "JFK", "departure_time": departure + timedelta(minutes=i),
+             "arrival_time": departure + timedelta(minutes=i, hours=12), "price": 100.0}
+            for i in range(tickets)
+        ])
+        await db.commit()
+        user_ids = (await db.scalars(select(User.id).where(User.username.like(f"bench-{run}-%")))).all()
+        ticket_ids = (await db.scalars(
+            select(Ticket.id).where(Ticket.flight_number.like(f"BK-{run}-%")).order_by(Ticket.id)
+        )).all()
+    return list(user_ids), list(ticket_ids)
+
+
+async def attempt(ticket_id: int, user_id: int) -> int:
+    """Book in a fresh session, like a request would; returns the HTTP status."""
+    async with SessionLocal() as db:
+        try:
+            await book_ticket(ticket_id, db, SimpleNamespace(id=user_id))
+            return 200
+        except HTTPException as e:
+            return e.status_code
+
+
+async def run_bookings(pairs, workers: int):
+    semaphore = asyncio.Semaphore(workers)
+
+    async def bounded(ticket_id, user_id):
+        async with semaphore:
+            return await attempt(ticket_id, user_id)
+
+    started = time.perf_counter()
+    statuses = await asyncio.gather(*(bounded(t, u) for t, u in pairs), return_exceptions=True)
+    elapsed = time.perf_counter() - started
+    return Counter(s if isinstance(s, int) else type(s).__name__ for s in statuses), elapsed
+
+
+async def verify(ticket_ids) -> dict:
+    """Owners, luggage rows and flight rows of the given tickets."""
+    async with SessionLocal() as db:
+        rows = (await db.execute(
+            select(Ticket.user_id, Ticket.luggage_id, Ticket.flight_number).where(Ticket.id.in_(ticket_ids))
+        )).all()
+        flight_numbers = [row.flight_number for row in rows]
+        flights = await db.scalar(select(func.count()).select_from(Flight).where(Flight.flight_number.in_(flight_numbers)))
+    return {
+        "booked": sum(1 for row in rows if row.user_id is not None),
+        "with_luggage": len({row.luggage_id for row in rows if row.luggage_id is not None}),
+        "flights": flights,
+    }
+
+
+async def cleanup(run: str):
+    async with SessionLocal() as db:
+        tickets = select(Ticket.luggage_id).where(Ticket.flight_number.like(f"BK-{run}-%"))
+        luggage_ids = [i for i in (await db.scalars(tickets)).all() if i is not None]
+        await db.execute(delete(Ticket).where(Ticket.flight_number.like(f"BK-{run}-%")))
+        await db.execute(delete(Flight).where(Flight.flight_number.like(f"BK-{run}-%")))
+        await db.execute(delete(Luggage).where(Luggage.luggage_id.in_(luggage_ids)))
+        await db.execute(delete(User).where(User.username.like(f"bench-{run}-%")))
+        await db.commit()
+
+
+async def main(workers: int, tickets: int):
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    run = uuid.uuid4().hex[:8]
+    user_ids, ticket_ids = await seed(run, max(workers, tickets), tickets + 1)
+    contested, spread = ticket_ids[0], ticket_ids[1:]
+    ok = True
+    try:
+        statuses, elapsed = await run_bookings([(contested, u) for u in user_ids[:workers]], workers)
+        state = await verify([contested])
+        exactly_once = statuses == Counter({200: 1, 400: workers - 1}) and state == {"booked": 1, "with_luggage": 1, "flights": 1}
+        ok &= exactly_once
+        print(f"One ticket, {workers} concurrent bookings: {dict(statuses)} in {elapsed * 1000:.0f} ms "
+              f"-> {'exactly once' if exactly_once else f'FAILED {state}'}")
+
+        statuses, elapsed = await run_bookings(list(zip(spread, user_ids)), workers)
+        state = await verify(spread)
+        all_once = statuses == Counter({200: tickets}) and state == {"booked": tickets, "with_luggage": tickets, "flights": tickets}
+        ok &= all_once
+        print(f"{tickets} tickets, {workers} concurrent bookers: {dict(statuses)} in {elapsed:.2f} s "
+              f"({tickets / elapsed:.0f} bookings/s) -> {'all booked once' if all_once else f'FAILED {state}'}")
+    finally:
+        await cleanup(run)
+    if not ok:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--workers", type=int, default=50, help="Concurrent booking attempts")
+    parser.add_argument("--tickets", type=int, default=500, help="Distinct tickets booked in the throughput run")
+    args = parser.parse_args()
+    asyncio.run(main(args.workers, args.tickets))
@@ -0,0 +1,124 @@
+"""
+Benchmark cached ticket search: per-row date cast vs half-open range.
+Run with: python -m app.scripts.benchmark_ticket_search --rows 2000000
+
+Seeds synthetic unbooked offers (airline "BENCHMARK") into the configured
+database, times both query shapes, prints the query plans on Postgres and
+deletes the seeded rows again. Point DATABASE_URL at a scratch database.
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import time
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import cast, Date, delete, func, insert, text
+from sqlalchemy.future import select
+
+from app.db.database import SessionLocal, engine
+from app.base import Base
+from app.models.ticket import Ticket
+from app.controllers.tickets_controller import cached_tickets_query
+
+AIRPORTS = ["TLV", "JFK", "LHR", "CDG", "FRA", "AMS", "MAD", "FCO", "IST", "DXB", "ATH", "VIE"]
+BENCHMARK_AIRLINE = "BENCHMARK"
+START_DATE = date(2030, 1, 1)
+DAYS = 365
+INSERT_BATCH = 10000
+
+
+def _offer(i: int, rng: random.Random) -> dict:
+    origin, destination = rng.sample(AIRPORTS, 2)
+    departure = datetime.combine(START_DATE, datetime.min.time()) + timedelta(minutes=rng.randrange(DAYS * 24 * 60))
+    return {
+        "airline_name": BENCHMARK_AIRLINE,
+        "flight_number": f"BM{i}",
+        "origin": origin,
+        "destination": destination,
+        "departure_time": departure,
+        "arrival_time": departure + timedelta(hours=rng.randint(1, 14)),
+        "price": round(rng.uniform(50, 1500), 2),
+    }
+
+
+def legacy_query(origin: str, destination: str, target_date: date):
+    """The previous predicate: a function of departure_time compared per row."""
+    if engine.dialect.name == "sqlite":
+        # SQLite has no DATE type; date() is the equivalent non-sargable expression
+        day = func.date(Ticket.departure_time) == target_date.isoformat()
+    else:
+        day = cast(Ticket.departure_time, Date) == target_date
+    return select(Ticket).where(Ticket.origin == origin, Ticket.destination == destination, day)
+
+
+async def seed(rows: int, seed_value: int):
+    rng = random.Random(seed_value)
+    async with SessionLocal() as db:
+        for start in range(0, rows, INSERT_BATCH):
+            batch = [_offer(i, rng) for i in range(start, min(start + INSERT_BATCH, rows))]
+            await db.execute(insert(Ticket), batch)
+            await db.commit()
+            print(f"  seeded {start + len(batch)}/{rows}", end="\r")
+    print()
+    if engine.dialect.name == "postgresql":
+        async with engine.begin() as conn:
+            await conn.execute(text("ANALYZE tickets"))
+
+
+async def time_query(build, searches, repeat: int):
+    """Median latency (ms) and total rows over the search sample."""
+    latencies, total_rows = [], 0
+    async with SessionLocal() as db:
+        for _ in range(repeat):
+            for origin, destination, day in searches:
+                started = time.perf_counter()
+                result = await db.execute(build(origin, destination, day))
+                total_rows += len(result.scalars().all())
+                latencies.append((time.perf_counter() - started) * 1000)
+    return statistics.median(latencies), total_rows // repeat
+
+
+async def explain(build, search):
+    if engine.dialect.name != "postgresql":
+        return
+    stmt = build(*search).compile(engine.sync_engine, compile_kwargs={"literal_binds": True})
+    async with engine.connect() as conn:
+        plan = await conn.execute(text(f"EXPLAIN (ANALYZE, BUFFERS) {stmt}"))
+        print("\n".join(f"    {line}" for (line,) in plan))
+
+
+async def main(rows: int, searches: int, repeat: int, keep: bool):
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    print(f"Seeding {rows} offers on {engine.dialect.name}...")
+    started = time.perf_counter()
+    await seed(rows, seed_value=42)
+    print(f"Seeded in {time.perf_counter() - started:.1f}s")
+
+    rng = random.Random(7)
+    sample = [
+        (*rng.sample(AIRPORTS, 2), START_DATE + timedelta(days=rng.randrange(DAYS)))
+        for _ in range(searches)
+    ]
+    try:
+        for label, build in (("date cast", legacy_query), ("half-open range", cached_tickets_query)):
+            median_ms, found = await time_query(build, sample, repeat)
+            print(f"{label:>16}: median {median_ms:.2f} ms/search, {found} rows over {searches} searches")
+            await explain(build, sample[0])
+    finally:
+        if not keep:
+            async with SessionLocal() as db:
+                await db.execute(delete(Ticket).where(Ticket.airline_name == BENCHMARK_AIRLINE))
+                await db.commit()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--rows", type=int, default=1_000_000, help="Synthetic offers to seed")
+    parser.add_argument("--searches", type=int, default=50, help="Distinct route/date searches timed")
+    parser.add_argument("--repeat", type=int, default=3, help="Times each search is repeated")
+    parser.add_argument("--keep", action="store_true", help="Keep the seeded rows afterwards")
+    args = parser.parse_args()
+    asyncio.run(main(args.rows, args.searches, args.repeat, args.keep))
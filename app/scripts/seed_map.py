@@ -9,6 +9,7 @@ from app.base import Base
 from app.models.location import Location
 from app.models.path import Path
 from app.models.wall import Wall
+from app.core.settings import settings
 
 
 # Airport locations - realistic airport layout
@@ -96,18 +97,18 @@ WALLS = [
 ]
 
 
-async def seed_map_data():
-    """Seed the map with locations, paths, and walls."""
+async def seed_map_data(airport_code: str = settings.DEFAULT_AIRPORT_CODE):
+    """Seed an airport's map with locations, paths, and walls."""
     async with SessionLocal() as db:
-        # Clear existing data
-        await db.execute(Path.__table__.delete())
-        await db.execute(Location.__table__.delete())
-        await db.execute(Wall.__table__.delete())
+        # Clear existing data for this airport
+        await db.execute(Path.__table__.delete().where(Path.airport_code == airport_code))
+        await db.execute(Location.__table__.delete().where(Location.airport_code == airport_code))
+        await db.execute(Wall.__table__.delete().where(Wall.airport_code == airport_code))
         await db.commit()
         
         # Add locations
         for loc_data in LOCATIONS:
-            location = Location(**loc_data)
+            location = Location(**loc_data, airport_code=airport_code)
             db.add(location)
         
         await db.commit()
@@ -117,9 +118,10 @@ async def seed_map_data():
         path_count = 0
         for path_data in PATHS:
             # Forward path
-            db.add(Path(**path_data))
+            db.add(Path(**path_data, airport_code=airport_code))
             # Reverse path
             db.add(Path(
+                airport_code=airport_code,
                 source_id=path_data["destination_id"],
                 destination_id=path_data["source_id"],
                 distance=path_data["distance"],
@@ -132,7 +134,7 @@ async def seed_map_data():
         
         # Add walls
         for wall_data in WALLS:
-            db.add(Wall(**wall_data))
+            db.add(Wall(**wall_data, airport_code=airport_code))
         
         await db.commit()
         print(f"✅ Added {len(WALLS)} walls")
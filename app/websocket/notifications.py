@@ -3,12 +3,16 @@ WebSocket notification management for FlyEase.
 Provides ConnectionManager for robust connection handling.
 """
 from fastapi import WebSocket, WebSocketDisconnect
-from typing import Dict, Optional
+from typing import Dict, Optional, Set
 import logging
 import asyncio
+import json
 
 logger = logging.getLogger(__name__)
 
+# Topic prefixes clients may subscribe to, e.g. "board:TLV" or "luggage:42"
+SUBSCRIBABLE_TOPICS = ("board:", "luggage:")
+
 
 class ConnectionManager:
     """
@@ -21,6 +25,8 @@ class ConnectionManager:
         self.active_connections: Dict[int, WebSocket] = {}
         # Anonymous connections (no user_id)
         self.anonymous_connections: list[WebSocket] = []
+        # Topic -> connections subscribed to it
+        self.subscriptions: Dict[str, Set[WebSocket]] = {}
     
     async def connect(self, websocket: WebSocket, user_id: Optional[int] = None):
         """Accept a WebSocket connection."""
@@ -38,9 +44,12 @@ class ConnectionManager:
     
     async def disconnect(self, websocket: WebSocket = None, user_id: Optional[int] = None):
         """Remove a WebSocket connection."""
+        if websocket:
+            self.unsubscribe_all(websocket)
         try:
             if user_id and user_id in self.active_connections:
                 ws = self.active_connections.pop(user_id)
+                self.unsubscribe_all(ws)
                 await ws.close()
                 logger.info(f"WebSocket disconnected: user {user_id}")
             elif websocket and websocket in self.anonymous_connections:
@@ -88,6 +97,34 @@ class ConnectionManager:
                 except ValueError:
                     pass
     
+    def subscribe(self, websocket: WebSocket, topic: str):
+        """Subscribe a connection to a topic."""
+        self.subscriptions.setdefault(topic, set()).add(websocket)
+
+    def unsubscribe(self, websocket: WebSocket, topic: str):
+        """Remove a connection from one topic."""
+        subscribers = self.subscriptions.get(topic)
+        if subscribers is not None:
+            subscribers.discard(websocket)
+            if not subscribers:
+                del self.subscriptions[topic]
+
+    def unsubscribe_all(self, websocket: WebSocket):
+        """Remove a connection from every topic."""
+        for topic in [t for t, subscribers in self.subscriptions.items() if websocket in subscribers]:
+            self.unsubscribe(websocket, topic)
+
+    def has_subscribers(self, topic: str) -> bool:
+        return bool(self.subscriptions.get(topic))
+
+    async def publish(self, topic: str, message: str):
+        """Send a message to the subscribers of a topic only."""
+        for websocket in list(self.subscriptions.get(topic, ())):
+            try:
+                await websocket.send_text(message)
+            except Exception:
+                self.unsubscribe_all(websocket)
+
     @property
     def connection_count(self) -> int:
         """Get total number of active connections."""
@@ -114,6 +151,30 @@ async def broadcast_message(message: str):
     await manager.broadcast(message)
 
 
+async def handle_client_command(websocket: WebSocket, data: str):
+    """
+    Handle a JSON command from a client, e.g.
+    {"action": "subscribe", "topic": "board:TLV"} or {"action": "unsubscribe", "topic": "board:TLV"}.
+    """
+    try:
+        command = json.loads(data)
+        action, topic = command["action"], command["topic"]
+    except (ValueError, KeyError, TypeError):
+        await websocket.send_text(json.dumps({"error": "Invalid command"}))
+        return
+
+    if not isinstance(topic, str) or not topic.startswith(SUBSCRIBABLE_TOPICS):
+        await websocket.send_text(json.dumps({"error": f"Unknown topic: {topic}"}))
+    elif action == "subscribe":
+        manager.subscribe(websocket, topic)
+        await websocket.send_text(json.dumps({"subscribed": topic}))
+    elif action == "unsubscribe":
+        manager.unsubscribe(websocket, topic)
+        await websocket.send_text(json.dumps({"unsubscribed": topic}))
+    else:
+        await websocket.send_text(json.dumps({"error": f"Unknown action: {action}"}))
+
+
 # WebSocket endpoint
 async def websocket_endpoint(websocket: WebSocket):
     """Handle WebSocket connections for notifications."""
@@ -125,6 +186,8 @@ async def websocket_endpoint(websocket: WebSocket):
             # Echo back for ping/pong or handle commands
             if data == "ping":
                 await websocket.send_text("pong")
+            else:
+                await handle_client_command(websocket, data)
     except WebSocketDisconnect:
         await manager.disconnect(websocket=websocket)
     except Exception as e:
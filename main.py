@@ -1,6 +1,7 @@
 from fastapi import FastAPI, WebSocket
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
+import asyncio
 from app.routes.flight_routes import router as flight_router
 from app.auth.auth_routes import router as auth_router
 from app.routes.map_routes import router as map_router
@@ -9,8 +10,14 @@ from app.routes.hotel_router import router as hotel_router
 from app.routes.user_routes import router as user_router
 from app.routes.messages_router import router as messages_router
 from app.routes.admin_flight_router import router as admin_flight_router
+from app.routes.export_router import router as export_router
+from app.routes.luggage_router import router as luggage_router
 from app.websocket.notifications import websocket_endpoint
 from app.core.settings import settings
+from app.db.database import SessionLocal
+from app.core.http_client import close_http_client
+from app.cache.wait_times import run_wait_time_refresher
+from app.controllers.flight_controller import run_flight_status_poller
 
 
 # Initialize FastAPI app
@@ -18,8 +25,17 @@ from app.core.settings import settings
 async def lifespan(app: FastAPI):
     # Startup logic
     # Note: Database tables are now managed by Alembic migrations
+    background_tasks = [
+        asyncio.create_task(run_wait_time_refresher(SessionLocal)),
+    ]
+    if settings.FLIGHT_POLL_AIRPORTS and settings.FLIGHTS_API_KEY:
+        background_tasks.append(asyncio.create_task(run_flight_status_poller(SessionLocal)))
     yield
-    # Shutdown logic (if needed) goes here
+    # Shutdown logic: stop background loops
+    for task in background_tasks:
+        task.cancel()
+    await asyncio.gather(*background_tasks, return_exceptions=True)
+    await close_http_client()
 
 # Use the lifespan function directly in FastAPI
 app = FastAPI(
@@ -45,6 +61,8 @@ app.include_router(map_router, prefix="/api")
 app.include_router(ticket_router, prefix="/api")
 app.include_router(hotel_router, prefix="/api")        
 app.include_router(admin_flight_router, prefix="/api")
+app.include_router(export_router, prefix="/api")
+app.include_router(luggage_router, prefix="/api")
 app.include_router(user_router, prefix="/api")
 app.include_router(messages_router, prefix="/api")
 
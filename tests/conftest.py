@@ -1,15 +1,26 @@
 """
 Test configuration and fixtures for FlyEase Backend tests.
 """
+import asyncio
+import json
 import pytest
 import pytest_asyncio
+from contextlib import asynccontextmanager
 from httpx import AsyncClient, ASGITransport
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker
 
 from main import app
 from app.base import Base
-from app.db.database import get_db
+from app.db.database import get_db, get_session_factory
+from app.cache.map_graph import map_graph_cache
+from app.cache.wait_times import wait_time_estimator
+from app.cache.flight_cache import flight_tracking_cache
+from app.cache.flight_board import flight_board_registry
+from app.cache.fare_calendar import fare_calendar_cache
+from app.cache.idempotency import idempotency_store
+from app.cache.luggage_status import luggage_status_cache
+from app.websocket.notifications import manager
 
 
 # Use SQLite for testing (in-memory database)
@@ -46,10 +57,80 @@ async def client(test_db):
     async def override_get_db():
         yield test_db
     
+    session_lock = asyncio.Lock()
+    
+    @asynccontextmanager
+    async def test_session_factory():
+        # Every "new" session is the one test session, so concurrent users take turns
+        async with session_lock:
+            yield test_db
+    
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_session_factory] = lambda: test_session_factory
+    # In-memory caches outlive the per-test database
+    map_graph_cache.clear()
+    wait_time_estimator.clear()
+    flight_tracking_cache.clear()
+    flight_board_registry.clear()
+    fare_calendar_cache.clear()
+    idempotency_store.clear()
+    luggage_status_cache.clear()
     
     transport = ASGITransport(app=app)
     async with AsyncClient(transport=transport, base_url="http://test") as ac:
         yield ac
     
     app.dependency_overrides.clear()
+
+
+@pytest.fixture
+def signup(client):
+    """Factory signing up a user by name; returns its id and auth headers."""
+    async def create(username: str, role: str = "user"):
+        response = await client.post(
+            "/api/auth/signup",
+            json={
+                "username": username,
+                "password": "TestPass123!",
+                "email": f"{username}@example.com",
+                "role": role
+            }
+        )
+        user = response.json()
+        return user["id"], {"Authorization": f"Bearer {user['access_token']}"}
+    
+    return create
+
+
+@pytest_asyncio.fixture
+async def admin_headers(signup):
+    """Sign up an admin user and return its auth headers."""
+    _, headers = await signup("testadmin", role="admin")
+    return headers
+
+
+class FakeWebSocket:
+    """WebSocket stand-in that records the decoded messages sent to it."""
+    
+    def __init__(self):
+        self.sent = []
+    
+    async def send_text(self, message: str):
+        self.sent.append(json.loads(message))
+
+
+@pytest.fixture
+def fake_websocket():
+    """Factory of FakeWebSockets whose subscriptions are dropped after the test, even if it fails."""
+    sockets = []
+    
+    def connect() -> FakeWebSocket:
+        socket = FakeWebSocket()
+        sockets.append(socket)
+        return socket
+    
+    try:
+        yield connect
+    finally:
+        for socket in sockets:
+            manager.unsubscribe_all(socket)
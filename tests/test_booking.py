@@ -2,8 +2,28 @@
 Tests for booking functionality.
 Tests: ticket booking, luggage creation, booking validation.
 """
+import asyncio
+import json
+from datetime import date, datetime, timedelta
+
 import pytest
+from fastapi import HTTPException
 from httpx import AsyncClient
+from sqlalchemy import func, select, update
+
+from app.cache.idempotency import IdempotencyStore
+from app.cache.luggage_status import LuggageStatusCache
+from app.controllers import tickets_controller
+from app.controllers.tickets_controller import cache_ticket_offers, get_cached_tickets, _parse_itineraries
+from app.core.settings import settings
+from app.models.flight import Flight
+from app.models.location import Location
+from app.models.luggage import Luggage
+from app.models.luggage_event import LuggageEvent
+from app.models.path import Path
+from app.models.ticket import Ticket
+from app.models.ticket_route import TicketRouteFetch
+from app.websocket.notifications import handle_client_command
 
 
 class TestTicketBooking:
@@ -44,6 +64,94 @@ class TestTicketBooking:
         assert "not found" in response.json()["detail"].lower()
 
 
+    @pytest.mark.asyncio
+    async def test_ticket_booked_exactly_once(self, client: AsyncClient, test_db, signup):
+        """Test a second booking of the same ticket is rejected and leaves the first intact."""
+        ticket = Ticket(
+            airline_name="FlyEase", flight_number="FE1", origin="TLV", destination="JFK",
+            departure_time=datetime(2026, 5, 1, 8), arrival_time=datetime(2026, 5, 1, 20), price=300.0
+        )
+        test_db.add(ticket)
+        await test_db.commit()
+        
+        users = [await signup(name) for name in ("first", "second")]
+        
+        responses = [
+            await client.post("/api/tickets/book", json={"ticket_id": ticket.id}, headers=headers)
+            for _, headers in users
+        ]
+        assert [r.status_code for r in responses] == [200, 400]
+        
+        await test_db.refresh(ticket)
+        assert ticket.user_id == users[0][0]
+        assert ticket.luggage_id == responses[0].json()["luggage_id"]
+        assert await test_db.scalar(select(func.count()).select_from(Luggage)) == 1
+
+
+    @pytest.mark.asyncio
+    async def test_party_booking_is_all_or_nothing(self, client: AsyncClient, test_db, signup):
+        """Test a batch booking claims every ticket or none of them."""
+        for i in range(5):
+            test_db.add(Ticket(
+                airline_name="FlyEase", flight_number=f"FE{i}", origin="TLV", destination="JFK",
+                departure_time=datetime(2026, 5, 1, 8 + i), arrival_time=datetime(2026, 5, 1, 20), price=300.0
+            ))
+        await test_db.commit()
+        _, headers = await signup("family")
+        
+        response = await client.post("/api/tickets/book/batch", json={"ticket_ids": [3, 1, 2]}, headers=headers)
+        assert response.status_code == 200
+        bookings = response.json()["bookings"]
+        assert [b["ticket_id"] for b in bookings] == [3, 1, 2]
+        assert len({b["luggage_id"] for b in bookings}) == 3
+        
+        response = await client.post("/api/tickets/book/batch", json={"ticket_ids": [4, 1]}, headers=headers)
+        assert response.status_code == 400
+        response = await client.post("/api/tickets/book/batch", json={"ticket_ids": [4, 99]}, headers=headers)
+        assert response.status_code == 404
+        response = await client.post("/api/tickets/book/batch", json={"ticket_ids": []}, headers=headers)
+        assert response.status_code == 422
+        
+        test_db.expire_all()
+        owners = dict((await test_db.execute(select(Ticket.id, Ticket.luggage_id))).all())
+        assert owners[4] is None and owners[5] is None
+        assert sorted(b["luggage_id"] for b in bookings) == sorted(owners[i] for i in (1, 2, 3))
+        assert await test_db.scalar(select(func.count()).select_from(Luggage)) == 3
+        assert await test_db.scalar(select(func.count()).select_from(Flight)) == 3
+
+
+    @pytest.mark.asyncio
+    async def test_bookings_share_one_flight_row(self, client: AsyncClient, test_db, signup):
+        """Test bookings on the same flight and day reference one flight row and reuse an ingested one."""
+        ingested = Flight(
+            airline_name="FlyEase", flight_number="FE9", origin="TLV", destination="JFK",
+            departure_time=datetime(2026, 5, 1, 6), arrival_time=datetime(2026, 5, 1, 18), status="scheduled"
+        )
+        test_db.add(ingested)
+        for number, day, hour in (("FE1", 1, 8), ("FE1", 1, 9), ("FE9", 1, 6), ("FE9", 2, 6)):
+            test_db.add(Ticket(
+                airline_name="FlyEase", flight_number=number, origin="TLV", destination="JFK",
+                departure_time=datetime(2026, 5, day, hour), arrival_time=datetime(2026, 5, day, 20), price=300.0
+            ))
+        await test_db.commit()
+        
+        for i, ticket_id in enumerate((1, 2, 3, 4)):
+            _, headers = await signup(f"flyer{i}")
+            response = await client.post("/api/tickets/book", json={"ticket_id": ticket_id}, headers=headers)
+            assert response.status_code == 200
+        
+        rows = (await test_db.execute(select(Flight.flight_number, Flight.departure_date, Flight.id))).all()
+        flights = {(number, day): flight_id for number, day, flight_id in rows}
+        assert sorted(flights) == [("FE1", date(2026, 5, 1)), ("FE9", date(2026, 5, 1)), ("FE9", date(2026, 5, 2))]
+        links = dict((await test_db.execute(select(Ticket.id, Ticket.flight_id))).all())
+        assert links == {
+            1: flights["FE1", date(2026, 5, 1)], 2: flights["FE1", date(2026, 5, 1)],
+            3: ingested.id, 4: flights["FE9", date(2026, 5, 2)],
+        }
+        await test_db.refresh(ingested)
+        assert ingested.status == "scheduled"
+
+
 class TestTicketSearch:
     """Tests for ticket search endpoint."""
     
@@ -72,6 +180,334 @@ class TestTicketSearch:
         assert isinstance(response.json(), list)
 
 
+class TestSearchCoalescing:
+    """Tests for coalescing identical concurrent upstream searches."""
+    
+    @pytest.mark.asyncio
+    async def test_identical_searches_share_one_call(self, client: AsyncClient, monkeypatch):
+        """Test concurrent identical fetches make one upstream call and distinct ones do not merge."""
+        calls = []
+        
+        async def slow_fetch(origin, destination, departure_date, db):
+            calls.append((origin, destination, departure_date))
+            await asyncio.sleep(0.05)
+        
+        monkeypatch.setattr(tickets_controller, "fetch_and_cache_tickets", slow_fetch)
+        search = {"origin": "TLV", "destination": "JFK", "departure_date": "2026-05-01"}
+        responses = await asyncio.gather(
+            *(client.post("/api/tickets/fetch", json=search) for _ in range(5)),
+            client.post("/api/tickets/fetch", json={**search, "destination": "LHR"}),
+        )
+        
+        assert all(r.status_code == 200 for r in responses)
+        assert sorted(calls) == [("TLV", "JFK", "2026-05-01"), ("TLV", "LHR", "2026-05-01")]
+        assert not tickets_controller.ticket_search_flights.in_flight(("TLV", "JFK", "2026-05-01"))
+    
+    @pytest.mark.asyncio
+    async def test_upstream_errors_reach_every_caller(self, client: AsyncClient, monkeypatch):
+        """Test an upstream failure is returned to all coalesced callers with its status."""
+        async def failing_fetch(origin, destination, departure_date, db):
+            await asyncio.sleep(0.05)
+            raise HTTPException(status_code=504, detail="Flight search timed out. Please try again.")
+        
+        monkeypatch.setattr(tickets_controller, "fetch_and_cache_tickets", failing_fetch)
+        search = {"origin": "TLV", "destination": "JFK", "departure_date": "2026-05-01"}
+        responses = await asyncio.gather(*(client.post("/api/tickets/fetch", json=search) for _ in range(3)))
+        assert [r.status_code for r in responses] == [504, 504, 504]
+
+
+@pytest.fixture
+def skyscanner(monkeypatch):
+    """Live (non-demo) ticket search against a stubbed upstream; records each search."""
+    monkeypatch.setattr(settings, "DEMO_MODE", False)
+    monkeypatch.setattr(settings, "BOOKING_API_KEY", "test-key")
+    monkeypatch.setattr(settings, "GOOGLE_API_KEY", "test-key")
+    state = {"searches": [], "price": 300.0, "failing": set()}
+    
+    async def search_upstream_offers(origin, destination, departure_date):
+        state["searches"].append((origin, destination, departure_date))
+        if departure_date in state["failing"]:
+            raise HTTPException(status_code=504, detail="Flight search timed out. Please try again.")
+        departure = datetime.fromisoformat(f"{departure_date}T08:00:00")
+        return [{
+            "airline_name": "FlyEase", "flight_number": f"FE-{departure_date}", "origin": origin,
+            "destination": destination, "departure_time": departure, "arrival_time": departure,
+            "price": state["price"],
+        }]
+    
+    monkeypatch.setattr(tickets_controller, "search_upstream_offers", search_upstream_offers)
+    return state
+
+
+class TestStaleWhileRevalidate:
+    """Tests for the unified ticket search freshness model."""
+    
+    @pytest.mark.asyncio
+    async def test_miss_fresh_then_stale(self, client: AsyncClient, test_db, skyscanner):
+        """Test a route is fetched once, served from cache within TTL and refreshed in the background after."""
+        params = {"origin": "TLV", "destination": "JFK", "departure_date": "2026-05-01"}
+        body = (await client.get("/api/tickets/search", params=params)).json()
+        assert body["freshness"] == "miss"
+        assert [t["price"] for t in body["tickets"]] == [300.0]
+        
+        body = (await client.get("/api/tickets/search", params=params)).json()
+        assert body["freshness"] == "fresh"
+        assert len(skyscanner["searches"]) == 1
+        
+        await test_db.execute(update(TicketRouteFetch).values(last_fetched_at=datetime.utcnow() - timedelta(days=1)))
+        await test_db.commit()
+        skyscanner["price"] = 250.0
+        body = (await client.get("/api/tickets/search", params=params)).json()
+        assert body["freshness"] == "stale"
+        assert [t["price"] for t in body["tickets"]] == [300.0]
+        
+        await asyncio.gather(*tickets_controller._background_refreshes)
+        body = (await client.get("/api/tickets/search", params=params)).json()
+        assert body["freshness"] == "fresh"
+        assert [t["price"] for t in body["tickets"]] == [250.0]
+        assert len(skyscanner["searches"]) == 2
+    
+    @pytest.mark.asyncio
+    async def test_invalid_date(self, client: AsyncClient, skyscanner):
+        """Test a malformed date is rejected before any upstream call."""
+        response = await client.get(
+            "/api/tickets/search", params={"origin": "TLV", "destination": "JFK", "departure_date": "May 1"}
+        )
+        assert response.status_code == 400
+        assert skyscanner["searches"] == []
+
+
+class TestFlexibleDateSearch:
+    """Tests for the +/- N days search."""
+    
+    @pytest.mark.asyncio
+    async def test_fan_out_then_cache(self, client: AsyncClient, skyscanner):
+        """Test uncached days are searched upstream once and answered from the cache afterwards."""
+        center = date.today() + timedelta(days=30)
+        params = {"origin": "TLV", "destination": "JFK", "departure_date": center.isoformat(), "days": 3}
+        body = (await client.get("/api/tickets/search/flexible", params=params)).json()
+        assert [d["date"] for d in body["days"]] == [(center + timedelta(days=i)).isoformat() for i in range(-3, 4)]
+        assert {d["source"] for d in body["days"]} == {"upstream"}
+        assert body["upstream_searches"] == 7
+        assert body["cheapest"]["price"] == 300.0
+        
+        body = (await client.get("/api/tickets/search/flexible", params=params)).json()
+        assert {d["source"] for d in body["days"]} == {"cache"}
+        assert body["upstream_searches"] == 0
+        assert all(d["cheapest_price"] == 300.0 for d in body["days"])
+        assert len(skyscanner["searches"]) == 7
+    
+    @pytest.mark.asyncio
+    async def test_budget_and_failures(self, client: AsyncClient, skyscanner, monkeypatch):
+        """Test the upstream budget goes to the closest days and failed days are reported, not fatal."""
+        monkeypatch.setattr(settings, "FLEX_SEARCH_UPSTREAM_BUDGET", 3)
+        center = date.today() + timedelta(days=30)
+        skyscanner["failing"].add((center + timedelta(days=1)).isoformat())
+        params = {"origin": "TLV", "destination": "JFK", "departure_date": center.isoformat(), "days": 2}
+        body = (await client.get("/api/tickets/search/flexible", params=params)).json()
+        
+        assert [d["source"] for d in body["days"]] == ["skipped", "upstream", "upstream", "unavailable", "skipped"]
+        assert [d["cheapest_price"] for d in body["days"]] == [None, 300.0, 300.0, None, None]
+        
+        response = await client.get("/api/tickets/search/flexible", params={**params, "days": 30})
+        assert response.status_code == 422
+    
+    @pytest.mark.asyncio
+    async def test_day_joins_running_search(self, client: AsyncClient, skyscanner, monkeypatch):
+        """Test a flexible day already being searched by another request shares that upstream call."""
+        gate = asyncio.Event()
+        search_upstream_offers = tickets_controller.search_upstream_offers
+        
+        async def gated_search(*args):
+            await gate.wait()
+            return await search_upstream_offers(*args)
+        
+        monkeypatch.setattr(tickets_controller, "search_upstream_offers", gated_search)
+        center = (date.today() + timedelta(days=30)).isoformat()
+        params = {"origin": "TLV", "destination": "JFK", "departure_date": center}
+        single = asyncio.create_task(client.get("/api/tickets/search", params=params))
+        while not tickets_controller.ticket_search_flights.in_flight(("TLV", "JFK", center)):
+            await asyncio.sleep(0)
+        flexible = asyncio.create_task(client.get("/api/tickets/search/flexible", params={**params, "days": 0}))
+        await asyncio.sleep(0.05)
+        gate.set()
+        
+        assert (await single).json()["freshness"] == "miss"
+        body = (await flexible).json()
+        assert [d["source"] for d in body["days"]] == ["upstream"]
+        assert body["cheapest"]["price"] == 300.0
+        assert len(skyscanner["searches"]) == 1
+
+
+class TestFareCalendar:
+    """Tests for the per-route monthly fare calendar."""
+    
+    @pytest.mark.asyncio
+    async def test_daily_aggregates_and_invalidation(self, client: AsyncClient, test_db):
+        """Test per-day min/avg/count of unbooked offers, refreshed when new offers are cached."""
+        def offer(number, departure, price):
+            return {
+                "airline_name": "FlyEase", "flight_number": number, "origin": "TLV", "destination": "JFK",
+                "departure_time": departure, "arrival_time": departure, "price": price,
+            }
+        
+        await cache_ticket_offers(test_db, [
+            offer("FE1", datetime(2026, 5, 1, 8), 300.0),
+            offer("FE2", datetime(2026, 5, 1, 20), 200.0),
+            offer("FE3", datetime(2026, 5, 31, 23, 59), 150.0),
+            offer("FE4", datetime(2026, 6, 1, 0, 0), 10.0),
+        ])
+        test_db.add(Ticket(
+            airline_name="FlyEase", flight_number="FE5", origin="TLV", destination="JFK", user_id=1,
+            departure_time=datetime(2026, 5, 1, 9), arrival_time=datetime(2026, 5, 1, 9), price=1.0
+        ))
+        await test_db.commit()
+        
+        params = {"origin": "TLV", "destination": "JFK", "month": "2026-05"}
+        body = (await client.get("/api/tickets/calendar", params=params)).json()
+        assert len(body["days"]) == 31
+        assert body["days"][0] == {"date": "2026-05-01", "min_price": 200.0, "avg_price": 250.0, "offers": 2}
+        assert body["days"][1]["offers"] == 0 and body["days"][1]["min_price"] is None
+        assert body["days"][30]["min_price"] == 150.0
+        
+        await cache_ticket_offers(test_db, [offer("FE6", datetime(2026, 5, 2, 8), 99.0)])
+        body = (await client.get("/api/tickets/calendar", params=params)).json()
+        assert body["days"][1]["min_price"] == 99.0
+        
+        response = await client.get("/api/tickets/calendar", params={**params, "month": "May"})
+        assert response.status_code == 400
+
+
+class TestIdempotencyKeys:
+    """Tests for Idempotency-Key replay on booking and fetch."""
+    
+    @pytest.mark.asyncio
+    async def test_booking_retry_is_replayed(self, client: AsyncClient, test_db, signup):
+        """Test a retried booking returns the first response without booking again."""
+        for number in ("FE1", "FE2"):
+            test_db.add(Ticket(
+                airline_name="FlyEase", flight_number=number, origin="TLV", destination="JFK",
+                departure_time=datetime(2026, 5, 1, 8), arrival_time=datetime(2026, 5, 1, 20), price=300.0
+            ))
+        await test_db.commit()
+        _, headers = await signup("retrier")
+        headers["Idempotency-Key"] = "booking-1"
+        
+        first = await client.post("/api/tickets/book", json={"ticket_id": 1}, headers=headers)
+        retry = await client.post("/api/tickets/book", json={"ticket_id": 1}, headers=headers)
+        assert first.status_code == retry.status_code == 200
+        assert retry.json() == first.json()
+        assert retry.headers["Idempotent-Replayed"] == "true"
+        assert await test_db.scalar(select(func.count()).select_from(Luggage)) == 1
+        
+        reused = await client.post("/api/tickets/book", json={"ticket_id": 2}, headers=headers)
+        assert reused.status_code == 422
+    
+    @pytest.mark.asyncio
+    async def test_fetch_retry_skips_upstream_unless_it_failed(self, client: AsyncClient, monkeypatch):
+        """Test fetch retries are replayed, but an upstream failure leaves the key retryable."""
+        calls = []
+        
+        async def fetch(origin, destination, departure_date, db):
+            calls.append(departure_date)
+            if len(calls) == 1:
+                raise HTTPException(status_code=504, detail="Flight search timed out. Please try again.")
+        
+        monkeypatch.setattr(tickets_controller, "fetch_and_cache_tickets", fetch)
+        search = {"origin": "TLV", "destination": "JFK", "departure_date": "2026-05-01"}
+        headers = {"Idempotency-Key": "fetch-1"}
+        statuses = [
+            (await client.post("/api/tickets/fetch", json=search, headers=headers)).status_code
+            for _ in range(3)
+        ]
+        assert statuses == [504, 200, 200]
+        assert len(calls) == 2
+    
+    @pytest.mark.asyncio
+    async def test_retry_as_shared_call_finishes_is_replayed(self):
+        """Test a retry arriving the moment the key leaves the in-flight set replays instead of rerunning."""
+        store = IdempotencyStore(maxsize=10, ttl=60)
+        calls = []
+        retries = []
+        
+        async def book():
+            calls.append(1)
+            await asyncio.sleep(0)
+            return {"booked": len(calls)}
+        
+        def retry(_):
+            # Runs right after SingleFlight releases the key, before the first caller resumes
+            attempt = store.run("key", "fp", book)
+            try:
+                attempt.send(None)
+            except StopIteration as done:
+                retries.append(done.value)
+            else:
+                attempt.close()
+                retries.append(None)
+        
+        first = asyncio.ensure_future(store.run("key", "fp", book))
+        while not store._flights.in_flight("key"):
+            await asyncio.sleep(0)
+        store._flights._inflight["key"].add_done_callback(retry)
+        
+        assert await first == ({"booked": 1}, False)
+        assert retries == [({"booked": 1}, True)]
+        assert len(calls) == 1
+
+
+class TestTicketCaching:
+    """Tests for set-based caching of fetched ticket offers."""
+    
+    @pytest.mark.asyncio
+    async def test_offers_upserted_by_flight_departure(self, client: AsyncClient, test_db):
+        """Test re-caching refreshes unbooked prices, keeps booked ones and adds no duplicates."""
+        def itinerary(number, price, departure="2026-05-01T08:00:00Z"):
+            return {
+                "price": {"raw": price},
+                "legs": [{
+                    "carriers": {"marketing": [{"name": "FlyEase"}]},
+                    "segments": [{"flightNumber": number}],
+                    "origin": {"id": "TLV"},
+                    "destination": {"id": "JFK"},
+                    "departure": departure,
+                    "arrival": "2026-05-01T20:00:00Z",
+                }],
+            }
+        
+        offers = _parse_itineraries([itinerary("FE1", 300), itinerary("FE2", 400), itinerary("FE2", 450), {"legs": []}])
+        assert [(o["flight_number"], o["price"]) for o in offers] == [("FE1", 300), ("FE2", 400)]
+        assert offers[0]["departure_time"] == datetime(2026, 5, 1, 8)
+        await cache_ticket_offers(test_db, offers)
+        
+        booked = (await test_db.execute(select(Ticket).where(Ticket.flight_number == "FE2"))).scalar_one()
+        booked.user_id = 1
+        await test_db.commit()
+        
+        await cache_ticket_offers(test_db, _parse_itineraries([
+            itinerary("FE1", 250), itinerary("FE2", 500), itinerary("FE3", 600),
+        ]))
+        test_db.expire_all()
+        
+        result = await test_db.execute(select(Ticket.flight_number, Ticket.price).order_by(Ticket.flight_number))
+        assert result.all() == [("FE1", 250), ("FE2", 400), ("FE3", 600)]
+
+
+    @pytest.mark.asyncio
+    async def test_cached_search_day_boundaries(self, client: AsyncClient, test_db):
+        """Test cached search returns exactly the offers departing on the requested day."""
+        for number, departure in (("FE1", datetime(2026, 5, 1, 0, 0)), ("FE2", datetime(2026, 5, 1, 23, 59)),
+                                  ("FE3", datetime(2026, 5, 2, 0, 0)), ("FE4", datetime(2026, 4, 30, 23, 59))):
+            test_db.add(Ticket(
+                airline_name="FlyEase", flight_number=number, origin="TLV", destination="JFK",
+                departure_time=departure, arrival_time=departure, price=100.0
+            ))
+        await test_db.commit()
+        
+        tickets = await get_cached_tickets("TLV", "JFK", "2026-05-01", test_db)
+        assert [t["flight_number"] for t in tickets] == ["FE1", "FE2"]
+
+
 class TestUserTickets:
     """Tests for user's tickets."""
     
@@ -108,3 +544,150 @@ class TestUserTickets:
         assert "tickets" in data
         assert isinstance(data["tickets"], list)
 
+
+
+class TestGateEta:
+    """Tests for walk-time-to-gate ETAs."""
+    
+    @pytest.mark.asyncio
+    async def test_eta_for_upcoming_flight(self, client: AsyncClient, test_db, signup):
+        """Test ETA is computed from the user's location to the flight's gate."""
+        user_id, headers = await signup("traveller")
+        departure = datetime.utcnow() + timedelta(hours=3)
+        test_db.add_all([
+            Location(id=1, airport_code="TLV", name="Main Entrance", type="entrance", coordinates={"x": 0, "y": 0}),
+            Location(id=2, airport_code="TLV", name="Gate B2", type="gate", coordinates={"x": 800, "y": 0}),
+            Path(airport_code="TLV", source_id=1, destination_id=2, distance=800, congestion=1),
+            Flight(airline_name="FlyEase", flight_number="FE1", origin="TLV", destination="JFK",
+                   departure_time=departure, arrival_time=departure + timedelta(hours=11),
+                   status="Scheduled", gate="B2"),
+            Ticket(airline_name="FlyEase", flight_number="FE1", origin="TLV", destination="JFK",
+                   departure_time=departure, arrival_time=departure + timedelta(hours=11),
+                   price=500.0, user_id=user_id),
+        ])
+        await test_db.commit()
+        
+        response = await client.get("/api/my-tickets/eta", params={"location_id": 1}, headers=headers)
+        
+        assert response.status_code == 200
+        [eta] = response.json()["etas"]
+        assert eta["gate_location_id"] == 2
+        assert eta["walk_minutes"] == 10.0
+        assert eta["leave_now"] is False
+    
+    @pytest.mark.asyncio
+    async def test_eta_uses_the_tickets_own_day(self, client: AsyncClient, test_db, signup):
+        """Test a daily flight's tickets each get the gate of their own day, linked to the row or not."""
+        user_id, headers = await signup("commuter")
+        departures = [datetime.utcnow() + timedelta(days=days, hours=3) for days in range(3)]
+        gates = ["B2", "C3", "D4"]
+        test_db.add(Location(id=1, airport_code="TLV", name="Main Entrance", type="entrance", coordinates={"x": 0, "y": 0}))
+        for i, gate in enumerate(gates, start=2):
+            test_db.add_all([
+                Location(id=i, airport_code="TLV", name=f"Gate {gate}", type="gate", coordinates={"x": 800 * i, "y": 0}),
+                Path(airport_code="TLV", source_id=1, destination_id=i, distance=800 * i, congestion=1),
+            ])
+        flights = [
+            Flight(airline_name="FlyEase", flight_number="FE1", origin="TLV", destination="JFK",
+                   departure_time=departure, arrival_time=departure + timedelta(hours=11),
+                   status="Scheduled", gate=gate)
+            for departure, gate in zip(departures, gates)
+        ]
+        test_db.add_all(flights)
+        await test_db.commit()
+        
+        for day, flight_id in ((1, flights[1].id), (2, None)):
+            test_db.add(Ticket(airline_name="FlyEase", flight_number="FE1", origin="TLV", destination="JFK",
+                               departure_time=departures[day], arrival_time=departures[day] + timedelta(hours=11),
+                               price=500.0, user_id=user_id, flight_id=flight_id))
+        await test_db.commit()
+        
+        response = await client.get("/api/my-tickets/eta", params={"location_id": 1}, headers=headers)
+        
+        assert response.status_code == 200
+        assert [(eta["gate"], eta["gate_location_id"]) for eta in response.json()["etas"]] == [("C3", 3), ("D4", 4)]
+
+
+class TestLuggageScans:
+    """Tests for batched luggage scan ingestion."""
+    
+    @pytest.mark.asyncio
+    async def test_batch_updates_latest_status(self, client: AsyncClient, test_db, admin_headers):
+        """Test scans are logged, the newest scan wins and late scans do not roll a bag back."""
+        test_db.add_all([Luggage(weight=20.0, status="Checked-in", last_location="Unknown") for _ in range(2)])
+        await test_db.commit()
+        
+        def scan(luggage_id, status, location, minute):
+            return {"luggage_id": luggage_id, "status": status, "location": location,
+                    "scanned_at": f"2026-05-01T08:{minute:02d}:00Z", "scanner_id": "belt-1"}
+        
+        response = await client.post("/api/admin/luggage/scans", headers=admin_headers, json={"events": [
+            scan(1, "Loaded", "Aircraft", 30), scan(1, "Sorted", "Belt 3", 10),
+            scan(2, "Sorted", "Belt 4", 12), scan(999, "Sorted", "Belt 4", 12),
+        ]})
+        assert response.json() == {"accepted": 3, "rejected_luggage_ids": [999], "updated": 2}
+        
+        tracked = (await client.get("/api/luggage/track/1")).json()
+        assert (tracked["status"], tracked["last_location"]) == ("Loaded", "Aircraft")
+        
+        response = await client.post("/api/admin/luggage/scans", headers=admin_headers, json={"events": [
+            scan(1, "Sorted", "Belt 3", 20), scan(2, "Claimed", "Carousel 2", 50),
+        ]})
+        assert response.json()["updated"] == 1
+        assert (await client.get("/api/luggage/track/1")).json()["status"] == "Loaded"
+        assert (await client.get("/api/luggage/track/2")).json()["status"] == "Claimed"
+        assert await test_db.scalar(select(func.count()).select_from(LuggageEvent)) == 5
+    
+    @pytest.mark.asyncio
+    async def test_scans_require_admin(self, client: AsyncClient):
+        """Test scan ingestion is restricted to admins."""
+        response = await client.post("/api/admin/luggage/scans", json={"events": []})
+        assert response.status_code in (401, 403)
+
+
+class TestLuggageSubscriptions:
+    """Tests for cached luggage tracking and pushed scan updates."""
+    
+    @pytest.mark.asyncio
+    async def test_scan_pushed_and_written_through(self, client: AsyncClient, test_db, admin_headers, fake_websocket):
+        """Test subscribers get scan updates and tracking is served from the refreshed cache."""
+        test_db.add_all([Luggage(weight=20.0, status="Checked-in", last_location="Unknown") for _ in range(2)])
+        await test_db.commit()
+        passenger, other = fake_websocket(), fake_websocket()
+        await handle_client_command(passenger, json.dumps({"action": "subscribe", "topic": "luggage:1"}))
+        await handle_client_command(other, json.dumps({"action": "subscribe", "topic": "luggage:2"}))
+        
+        assert (await client.get("/api/luggage/track/1")).json()["status"] == "Checked-in"
+        # Served from memory: a direct DB write is not seen until a scan or the TTL refreshes it
+        await test_db.execute(update(Luggage).values(weight=99.0))
+        await test_db.commit()
+        assert (await client.get("/api/luggage/track/1")).json()["weight"] == 20.0
+        
+        await client.post("/api/admin/luggage/scans", headers=admin_headers, json={"events": [
+            {"luggage_id": 1, "status": "On carousel", "location": "Carousel 2", "scanned_at": "2026-05-01T10:00:00"},
+        ]})
+        
+        assert passenger.sent[1] == {
+            "type": "luggage_status", "luggage_id": 1, "status": "On carousel",
+            "last_location": "Carousel 2", "last_scanned_at": "2026-05-01T10:00:00",
+        }
+        assert len(other.sent) == 1
+        tracked = (await client.get("/api/luggage/track/1")).json()
+        assert (tracked["status"], tracked["last_location"]) == ("On carousel", "Carousel 2")
+    
+    @pytest.mark.asyncio
+    async def test_read_started_before_scan_is_not_cached(self):
+        """Test a tracking read that loaded the row before a scan was applied cannot cache the old status."""
+        cache = LuggageStatusCache(maxsize=10, ttl=60)
+        await cache.apply([{
+            "luggage_id": 1, "status": "Loaded", "last_location": "Aircraft",
+            "last_scanned_at": datetime(2026, 5, 1, 8, 30),
+        }])
+        
+        read = {"luggage_id": 1, "weight": 20.0, "status": "Checked-in", "last_location": "Unknown"}
+        cache.set(1, {**read, "last_scanned_at": None})
+        cache.set(1, {**read, "status": "Sorted", "last_scanned_at": "2026-05-01T08:10:00"})
+        assert cache.get(1) is None
+        
+        cache.set(1, {**read, "status": "Loaded", "last_scanned_at": "2026-05-01T08:30:00"})
+        assert cache.get(1)["status"] == "Loaded"
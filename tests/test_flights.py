@@ -0,0 +1,502 @@
+"""
+Tests for flight endpoints.
+Tests: AviationStack ingestion, flight tracking.
+"""
+import json
+from datetime import date, datetime, timedelta
+
+import pytest
+import httpx
+from httpx import AsyncClient
+from sqlalchemy import select
+
+from app.cache.flight_board import flight_board_registry
+from app.controllers import flight_controller
+from app.core import http_client
+from app.core.settings import settings
+from app.models.flight import Flight
+from app.models.messages import Message
+from app.models.ticket import Ticket
+from app.websocket.notifications import handle_client_command
+
+
+def _aviationstack_record(number: int, day: int = 1, status: str = "scheduled") -> dict:
+    return {
+        "flight_status": status,
+        "airline": {"name": "FlyEase"},
+        "flight": {"iata": f"FE{number}"},
+        "departure": {"airport": "Ben Gurion", "iata": "TLV", "scheduled": f"2026-01-{day:02d}T10:00:00+00:00", "terminal": "3", "gate": "B2"},
+        "arrival": {"airport": "John F Kennedy International", "iata": "JFK", "scheduled": f"2026-01-{day:02d}T21:00:00+00:00"},
+    }
+
+
+@pytest.fixture
+def aviationstack(monkeypatch):
+    """
+    Serve a fake AviationStack with 5 daily departures per airport, flown on
+    upstream["days"] days, through the shared client. Statuses are keyed by
+    (flight number, day of January).
+    """
+    upstream = {"requests": [], "status": {}, "days": 1}
+    
+    def handler(request: httpx.Request) -> httpx.Response:
+        params = request.url.params
+        upstream["requests"].append((params["dep_iata"], int(params["offset"])))
+        offset, limit = int(params["offset"]), int(params["limit"])
+        base = 100 if params["dep_iata"] == "TLV" else 200
+        departures = [(base + i, day) for day in range(1, upstream["days"] + 1) for i in range(5)]
+        data = [
+            _aviationstack_record(number, day, upstream["status"].get((number, day), "scheduled"))
+            for number, day in departures[offset:offset + limit]
+        ]
+        return httpx.Response(200, json={"pagination": {"total": len(departures)}, "data": data})
+    
+    monkeypatch.setattr(settings, "FLIGHTS_API_KEY", "test-key")
+    monkeypatch.setattr(settings, "FLIGHTS_API_PAGE_SIZE", 2)
+    monkeypatch.setattr(http_client, "_client", httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+    yield upstream
+    monkeypatch.setattr(http_client, "_client", None)
+
+
+class TestFlightIngestion:
+    """Tests for fetching live flights from AviationStack."""
+    
+    @pytest.mark.asyncio
+    async def test_fetch_pages_through_all_airports(self, client: AsyncClient, aviationstack):
+        """Test every page of every requested airport is fetched and saved."""
+        response = await client.post("/api/flights/fetch", params={"airports": ["TLV", "ETM"]})
+        
+        assert response.status_code == 200
+        assert sorted(aviationstack["requests"]) == [
+            ("ETM", 0), ("ETM", 2), ("ETM", 4), ("TLV", 0), ("TLV", 2), ("TLV", 4)
+        ]
+        
+        response = await client.get("/api/flights/track/FE203")
+        assert response.status_code == 200
+        assert response.json()["gate"] == "B2"
+        assert (response.json()["origin"], response.json()["destination"]) == ("TLV", "JFK")
+    
+    @pytest.mark.asyncio
+    async def test_refetch_only_writes_changed_flights(self, client: AsyncClient, aviationstack):
+        """Test a refresh reports inserted, updated and unchanged flights."""
+        response = await client.post("/api/flights/fetch")
+        assert response.json()["inserted"] == 5
+        
+        aviationstack["status"][101, 1] = "delayed"
+        response = await client.post("/api/flights/fetch")
+        data = response.json()
+        assert (data["inserted"], data["updated"], data["unchanged"]) == (0, 1, 4)
+        
+        response = await client.get("/api/flights/track/FE101")
+        assert response.json()["status"] == "delayed"
+    
+    @pytest.mark.asyncio
+    async def test_fetch_without_api_key(self, client: AsyncClient, monkeypatch):
+        """Test fetching without an AviationStack key fails cleanly."""
+        monkeypatch.setattr(settings, "FLIGHTS_API_KEY", None)
+        response = await client.post("/api/flights/fetch")
+        assert response.status_code == 503
+
+
+class TestFlightStatusPoller:
+    """Tests for the background flight status poller."""
+    
+    @pytest.mark.asyncio
+    async def test_poll_notifies_only_status_changes(self, test_db, aviationstack, monkeypatch, signup):
+        """Test ticket holders get a message and a broadcast only when status changes."""
+        broadcasts = []
+        
+        async def fake_broadcast(message: str):
+            broadcasts.append(message)
+        
+        monkeypatch.setattr(flight_controller, "broadcast_message", fake_broadcast)
+        
+        user_id, _ = await signup("passenger")
+        test_db.add(Ticket(
+            airline_name="FlyEase", flight_number="FE102", origin="TLV", destination="JFK",
+            departure_time=datetime(2026, 1, 1, 10), arrival_time=datetime(2026, 1, 1, 21),
+            price=400.0, user_id=user_id
+        ))
+        await test_db.commit()
+        
+        summary = await flight_controller.poll_flight_statuses(test_db, ["TLV"])
+        assert summary["inserted"] == 5
+        assert summary["status_changes"] == 0
+        
+        aviationstack["status"][102, 1] = "cancelled"
+        summary = await flight_controller.poll_flight_statuses(test_db, ["TLV"])
+        assert summary["status_changes"] == 1
+        assert broadcasts == ["Flight FE102 status changed to: cancelled"]
+        
+        messages = (await test_db.execute(select(Message.content))).scalars().all()
+        assert messages == ["Flight FE102 status changed to: cancelled"]
+    
+    @pytest.mark.asyncio
+    async def test_poll_keeps_each_day_of_a_flight_apart(self, test_db, aviationstack, monkeypatch, signup):
+        """Test status changes to two days of one flight number each reach that day's passengers."""
+        broadcasts = []
+        
+        async def fake_broadcast(message: str):
+            broadcasts.append(message)
+        
+        monkeypatch.setattr(flight_controller, "broadcast_message", fake_broadcast)
+        aviationstack["days"] = 2
+        passengers = {}
+        for day in (1, 2):
+            passengers[day], _ = await signup(f"passenger{day}")
+            test_db.add(Ticket(
+                airline_name="FlyEase", flight_number="FE102", origin="TLV", destination="JFK",
+                departure_time=datetime(2026, 1, day, 10), arrival_time=datetime(2026, 1, day, 21),
+                price=400.0, user_id=passengers[day]
+            ))
+        await test_db.commit()
+        
+        summary = await flight_controller.poll_flight_statuses(test_db, ["TLV"])
+        assert summary["inserted"] == 10
+        
+        aviationstack["status"][102, 1] = "cancelled"
+        aviationstack["status"][102, 2] = "delayed"
+        summary = await flight_controller.poll_flight_statuses(test_db, ["TLV"])
+        assert summary["status_changes"] == 2
+        assert len(broadcasts) == 2
+        
+        messages = (await test_db.execute(select(Message.user_id, Message.content))).all()
+        assert sorted(messages) == [
+            (passengers[1], "Flight FE102 status changed to: cancelled"),
+            (passengers[2], "Flight FE102 status changed to: delayed"),
+        ]
+
+
+class TestFlightListing:
+    """Tests for the filtered, paginated flight listing."""
+    
+    @pytest.mark.asyncio
+    async def test_keyset_pagination_with_filters(self, client: AsyncClient, test_db):
+        """Test pages follow departure order and filters apply across pages."""
+        start = datetime(2026, 3, 1, 8)
+        for i in range(5):
+            test_db.add(Flight(
+                airline_name="FlyEase", flight_number=f"FE{i}", origin="TLV",
+                destination="JFK" if i % 2 == 0 else "LHR",
+                departure_time=start + timedelta(hours=i), arrival_time=start + timedelta(hours=i + 10),
+                status="scheduled"
+            ))
+        await test_db.commit()
+        
+        response = await client.get("/api/flights", params={"destination": "JFK", "limit": 2})
+        page = response.json()
+        assert [f["flight_number"] for f in page["flights"]] == ["FE0", "FE2"]
+        
+        response = await client.get(
+            "/api/flights", params={"destination": "JFK", "limit": 2, "cursor": page["next_cursor"]}
+        )
+        page = response.json()
+        assert [f["flight_number"] for f in page["flights"]] == ["FE4"]
+        assert page["next_cursor"] is None
+        
+        response = await client.get("/api/flights", params={"departure_from": "2026-03-01T10:00:00"})
+        assert [f["flight_number"] for f in response.json()["flights"]] == ["FE2", "FE3", "FE4"]
+    
+    @pytest.mark.asyncio
+    async def test_invalid_cursor(self, client: AsyncClient):
+        """Test a malformed cursor is rejected."""
+        response = await client.get("/api/flights", params={"cursor": "not-a-cursor"})
+        assert response.status_code == 400
+
+
+class TestFlightTracking:
+    """Tests for the flight tracking cache."""
+    
+    @pytest.mark.asyncio
+    async def test_admin_update_invalidates_tracking_cache(self, client: AsyncClient, test_db, admin_headers):
+        """Test a cached tracking response is refreshed right after an admin status change."""
+        test_db.add(Flight(
+            airline_name="FlyEase", flight_number="FE900", origin="TLV", destination="JFK",
+            departure_time=datetime(2026, 5, 1, 9), arrival_time=datetime(2026, 5, 1, 20),
+            status="scheduled"
+        ))
+        await test_db.commit()
+        
+        response = await client.get("/api/flights/track/FE900")
+        assert response.json()["status"] == "scheduled"
+        
+        response = await client.put("/api/admin/flights/FE900", json={"status": "boarding"}, headers=admin_headers)
+        assert response.status_code == 200
+        
+        response = await client.get("/api/flights/track/FE900")
+        assert response.json()["status"] == "boarding"
+    
+    @pytest.mark.asyncio
+    async def test_tracks_the_next_departure_of_a_daily_flight(self, client: AsyncClient, test_db):
+        """Test a flight number flown every day tracks its next departure, not yesterday's."""
+        now = datetime.utcnow()
+        test_db.add_all([
+            Flight(airline_name="FlyEase", flight_number="FE901", origin="TLV", destination="JFK",
+                   departure_time=now + offset, arrival_time=now + offset + timedelta(hours=11), status=status)
+            for offset, status in ((timedelta(days=-1), "landed"), (timedelta(hours=3), "scheduled"),
+                                   (timedelta(days=1, hours=3), "scheduled"))
+        ])
+        await test_db.commit()
+        
+        response = await client.get("/api/flights/track/FE901")
+        assert response.json()["departure_time"] == (now + timedelta(hours=3)).isoformat()
+
+
+class TestFlightNotifications:
+    """Tests for messaging ticket holders about flight status changes."""
+    
+    @pytest.mark.asyncio
+    async def test_unbooked_offers_get_no_messages(self, client: AsyncClient, test_db, admin_headers):
+        """Test a status change messages the flight's passengers only, not cached offers nobody booked."""
+        departure = datetime(2026, 5, 1, 9)
+        test_db.add(Flight(airline_name="FlyEase", flight_number="FE1", origin="TLV", destination="JFK",
+                           departure_time=departure, arrival_time=datetime(2026, 5, 1, 20), status="scheduled"))
+        test_db.add(Ticket(airline_name="FlyEase", flight_number="FE1", origin="TLV", destination="JFK",
+                           departure_time=departure, arrival_time=datetime(2026, 5, 1, 20), price=300.0))
+        await test_db.commit()
+        
+        response = await client.put("/api/admin/flights/FE1", json={"status": "delayed"}, headers=admin_headers)
+        assert response.status_code == 200
+        assert (await test_db.execute(select(Message.user_id, Message.content))).all() == []
+    
+    @pytest.mark.asyncio
+    async def test_update_messages_only_that_days_passengers(self, client: AsyncClient, test_db, admin_headers, signup):
+        """Test an admin update of a daily flight messages that day's passengers only, not other days'."""
+        tomorrow = (datetime.utcnow() + timedelta(days=1)).replace(hour=9, minute=0, second=0, microsecond=0)
+        departures = [tomorrow + timedelta(days=days) for days in range(3)]
+        flights = [
+            Flight(airline_name="FlyEase", flight_number="FE1", origin="TLV", destination="JFK",
+                   departure_time=departure, arrival_time=departure + timedelta(hours=11), status="scheduled")
+            for departure in departures
+        ]
+        test_db.add_all(flights)
+        await test_db.commit()
+        flight_ids = [flight.id for flight in flights]
+        
+        passengers = []
+        for i, (day, linked) in enumerate(((0, False), (1, True), (2, True))):
+            user_id, _ = await signup(f"flyer{i}")
+            passengers.append(user_id)
+            test_db.add(Ticket(airline_name="FlyEase", flight_number="FE1", origin="TLV", destination="JFK",
+                               departure_time=departures[day], arrival_time=departures[day] + timedelta(hours=11),
+                               price=300.0, user_id=user_id, flight_id=flight_ids[day] if linked else None))
+        await test_db.commit()
+        
+        response = await client.put("/api/admin/flights/FE1", json={"status": "delayed"}, headers=admin_headers)
+        assert response.status_code == 200
+        messaged = (await test_db.execute(select(Message.user_id))).scalars().all()
+        assert messaged == passengers[:1]
+
+
+class TestFlightBoard:
+    """Tests for the departures/arrivals board."""
+    
+    @pytest.mark.asyncio
+    async def test_board_etag_and_incremental_patch(self, client: AsyncClient, test_db, admin_headers):
+        """Test the board honours If-None-Match and reflects admin updates without a rebuild."""
+        soon = datetime.utcnow() + timedelta(hours=2)
+        test_db.add_all([
+            Flight(airline_name="FlyEase", flight_number="FE10", origin="TLV", destination="JFK",
+                   departure_time=soon, arrival_time=soon + timedelta(hours=11), status="scheduled"),
+            Flight(airline_name="FlyEase", flight_number="FE11", origin="LHR", destination="TLV",
+                   departure_time=soon - timedelta(hours=4), arrival_time=soon, status="en-route"),
+            Flight(airline_name="FlyEase", flight_number="FE12", origin="TLV", destination="JFK",
+                   departure_time=soon + timedelta(days=3), arrival_time=soon + timedelta(days=3, hours=11),
+                   status="scheduled"),
+        ])
+        await test_db.commit()
+        
+        response = await client.get("/api/flights/board/TLV")
+        assert response.status_code == 200
+        board = response.json()
+        assert [f["flight_number"] for f in board["departures"]] == ["FE10"]
+        assert [f["flight_number"] for f in board["arrivals"]] == ["FE11"]
+        etag = response.headers["etag"]
+        
+        response = await client.get("/api/flights/board/TLV", headers={"If-None-Match": etag})
+        assert response.status_code == 304
+        
+        await client.put("/api/admin/flights/FE10", json={"status": "boarding", "gate": "C4"}, headers=admin_headers)
+        
+        response = await client.get("/api/flights/board/TLV", headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        [departure] = response.json()["departures"]
+        assert (departure["status"], departure["gate"]) == ("boarding", "C4")
+    
+    @pytest.mark.asyncio
+    async def test_patch_moves_flight_between_boards(self, client: AsyncClient, test_db):
+        """Test a flight whose origin changes leaves its old board and joins the new one."""
+        soon = datetime.utcnow() + timedelta(hours=2)
+        test_db.add(Flight(airline_name="FlyEase", flight_number="FE30", origin="TLV", destination="JFK",
+                           departure_time=soon, arrival_time=soon + timedelta(hours=11), status="scheduled"))
+        await test_db.commit()
+        
+        tlv = await flight_board_registry.get(test_db, "TLV")
+        ath = await flight_board_registry.get(test_db, "ATH")
+        key = ("FE30", soon.date())
+        assert key in tlv.departures and not ath.departures
+        
+        await flight_board_registry.apply([{
+            "flight_number": "FE30", "departure_date": soon.date(), "airline_name": "FlyEase",
+            "origin": "ATH", "destination": "JFK", "departure_time": soon,
+            "arrival_time": soon + timedelta(hours=11), "status": "scheduled", "gate": None,
+        }])
+        
+        assert key not in tlv.departures
+        assert key in ath.departures
+    
+    @pytest.mark.asyncio
+    async def test_same_flight_number_twice_on_board(self, client: AsyncClient, test_db):
+        """Test yesterday's delayed departure and today's one of a flight number are separate board entries."""
+        now = datetime.utcnow()
+        today, yesterday = now.date(), now.date() - timedelta(days=1)
+        test_db.add_all([
+            Flight(airline_name="FlyEase", flight_number="FE31", origin="TLV", destination="JFK",
+                   departure_date=day, departure_time=departure, arrival_time=departure + timedelta(hours=11),
+                   status=status)
+            for day, departure, status in ((yesterday, now + timedelta(hours=1), "delayed"),
+                                           (today, now + timedelta(hours=3), "scheduled"))
+        ])
+        await test_db.commit()
+        
+        board = await flight_board_registry.get(test_db, "TLV")
+        assert set(board.departures) == {("FE31", yesterday), ("FE31", today)}
+        
+        await flight_board_registry.apply([{
+            "flight_number": "FE31", "departure_date": yesterday, "airline_name": "FlyEase",
+            "origin": "TLV", "destination": "JFK", "departure_time": now + timedelta(hours=1),
+            "arrival_time": now + timedelta(hours=12), "status": "boarding", "gate": "B4",
+        }])
+        
+        assert board.departures["FE31", yesterday]["status"] == "boarding"
+        assert board.departures["FE31", today]["status"] == "scheduled"
+        statuses = [(f["departure_date"], f["status"]) for f in json.loads(board.snapshot()[1])["departures"]]
+        assert statuses == [(yesterday.isoformat(), "boarding"), (today.isoformat(), "scheduled")]
+
+
+class TestBoardSubscriptions:
+    """Tests for pushing board updates to subscribed WebSocket clients."""
+    
+    @pytest.mark.asyncio
+    async def test_board_update_pushed_to_subscribers_only(self, fake_websocket):
+        """Test a flight write reaches board subscribers of its airports only."""
+        display, other = fake_websocket(), fake_websocket()
+        await handle_client_command(display, json.dumps({"action": "subscribe", "topic": "board:TLV"}))
+        await handle_client_command(other, json.dumps({"action": "subscribe", "topic": "board:ATH"}))
+        
+        await flight_board_registry.apply([{
+            "flight_number": "FE20", "departure_date": date(2026, 1, 1), "airline_name": "FlyEase",
+            "origin": "TLV", "destination": "JFK",
+            "departure_time": datetime(2026, 1, 1, 10), "arrival_time": datetime(2026, 1, 1, 21),
+            "status": "delayed", "gate": "A1",
+        }])
+        
+        assert display.sent[0] == {"subscribed": "board:TLV"}
+        assert display.sent[1]["type"] == "board_update"
+        assert display.sent[1]["departures"][0]["status"] == "delayed"
+        assert len(other.sent) == 1
+
+
+class TestExport:
+    """Tests for the streaming flight/ticket exports."""
+    
+    @pytest.mark.asyncio
+    async def test_export_flights_ndjson_and_csv(self, client: AsyncClient, test_db, admin_headers):
+        """Test every flight is streamed in both formats."""
+        for i in range(3):
+            test_db.add(Flight(
+                airline_name="FlyEase", flight_number=f"FE{i}", origin="TLV", destination="JFK",
+                departure_time=datetime(2026, 3, 1, 8 + i), arrival_time=datetime(2026, 3, 1, 20 + i),
+                status="scheduled"
+            ))
+        await test_db.commit()
+        
+        response = await client.get("/api/admin/export/flights", headers=admin_headers)
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        rows = [json.loads(line) for line in response.text.splitlines()]
+        assert [row["flight_number"] for row in rows] == ["FE0", "FE1", "FE2"]
+        assert rows[0]["departure_time"] == "2026-03-01T08:00:00"
+        
+        response = await client.get("/api/admin/export/flights", params={"format": "csv"}, headers=admin_headers)
+        lines = response.text.splitlines()
+        assert lines[0].startswith("id,airline_name,flight_number")
+        assert len(lines) == 4
+    
+    @pytest.mark.asyncio
+    async def test_export_requires_admin_and_known_format(self, client: AsyncClient, admin_headers):
+        """Test exports are admin-only and reject unknown formats."""
+        response = await client.get("/api/admin/export/tickets")
+        assert response.status_code in (401, 403)
+        
+        response = await client.get("/api/admin/export/tickets", params={"format": "xml"}, headers=admin_headers)
+        assert response.status_code == 400
+
+
+class TestChangeFeed:
+    """Tests for the flight and message delta-sync feeds."""
+    
+    @pytest.mark.asyncio
+    async def test_flight_changes_since_cursor(self, client: AsyncClient, test_db, monkeypatch):
+        """Test the feed pages through changes and picks up later updates."""
+        monkeypatch.setattr(settings, "CHANGE_FEED_SETTLE_SECONDS", 0)
+        flights = [
+            Flight(
+                airline_name="FlyEase", flight_number=f"FE{i}", origin="TLV", destination="JFK",
+                departure_time=datetime(2026, 3, 1, 8 + i), arrival_time=datetime(2026, 3, 1, 20 + i),
+                status="scheduled"
+            )
+            for i in range(3)
+        ]
+        test_db.add_all(flights)
+        await test_db.commit()
+        
+        page = (await client.get("/api/flights/changes", params={"limit": 2})).json()
+        assert len(page["changes"]) == 2 and page["has_more"]
+        page = (await client.get("/api/flights/changes", params={"cursor": page["cursor"]})).json()
+        assert len(page["changes"]) == 1 and not page["has_more"]
+        cursor = page["cursor"]
+        
+        page = (await client.get("/api/flights/changes", params={"cursor": cursor})).json()
+        assert page["changes"] == [] and page["cursor"] == cursor
+        
+        flights[0].status = "delayed"
+        await test_db.commit()
+        page = (await client.get("/api/flights/changes", params={"cursor": cursor})).json()
+        assert [(f["flight_number"], f["status"]) for f in page["changes"]] == [("FE0", "delayed")]
+    
+    @pytest.mark.asyncio
+    async def test_message_changes_are_per_user(self, client: AsyncClient, test_db, monkeypatch, signup):
+        """Test the message feed only returns the caller's messages, including read-status changes."""
+        monkeypatch.setattr(settings, "CHANGE_FEED_SETTLE_SECONDS", 0)
+        user_id, headers = await signup("syncer")
+        test_db.add_all([
+            Message(user_id=user_id, content="Gate changed", status="unread"),
+            Message(user_id=user_id + 1, content="Not yours", status="unread"),
+        ])
+        await test_db.commit()
+        
+        page = (await client.get("/api/messages/changes", headers=headers)).json()
+        assert [m["content"] for m in page["changes"]] == ["Gate changed"]
+        
+        await client.put(f"/api/messages/{page['changes'][0]['id']}", headers=headers)
+        page = (await client.get("/api/messages/changes", params={"cursor": page["cursor"]}, headers=headers)).json()
+        assert [m["status"] for m in page["changes"]] == ["read"]
+    
+    @pytest.mark.asyncio
+    async def test_unsettled_upserts_are_held_back(self, client: AsyncClient, test_db, monkeypatch):
+        """Test ingested flights stay out of the feed until the settle window has passed by the DB clock."""
+        flight = {
+            "airline_name": "FlyEase", "flight_number": "FE50", "origin": "TLV", "destination": "JFK",
+            "departure_time": datetime(2026, 3, 1, 8), "arrival_time": datetime(2026, 3, 1, 20),
+            "status": "scheduled", "terminal": "3", "gate": "B2",
+        }
+        await flight_controller.upsert_flights(test_db, [flight])
+        
+        monkeypatch.setattr(settings, "CHANGE_FEED_SETTLE_SECONDS", 60)
+        page = (await client.get("/api/flights/changes")).json()
+        assert page["changes"] == [] and page["cursor"] is None
+        
+        monkeypatch.setattr(settings, "CHANGE_FEED_SETTLE_SECONDS", 0)
+        page = (await client.get("/api/flights/changes")).json()
+        assert [f["flight_number"] for f in page["changes"]] == ["FE50"]
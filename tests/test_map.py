@@ -5,6 +5,11 @@ Tests: get map data, calculate shortest path.
 import pytest
 from httpx import AsyncClient
 
+from app.cache.map_graph import map_graph_cache
+from app.cache.wait_times import wait_time_estimator
+from app.models.location import Location
+from app.models.path import Path
+
 
 class TestMapEndpoints:
     """Tests for map data endpoints."""
@@ -67,3 +72,157 @@ class TestMapNavigation:
         
         # Should return congestion level info
         assert "level" in data or "paths" in data
+
+
+class TestAirportPartitions:
+    """Tests for per-airport map scoping and the graph cache."""
+    
+    @pytest.mark.asyncio
+    async def test_navigation_is_scoped_to_airport(self, client: AsyncClient, admin_headers):
+        """Test a route in one airport is not visible from another."""
+        ids = []
+        for name, x in (("Gate 1", 0), ("Gate 2", 10)):
+            response = await client.post(
+                "/api/admin/map/location",
+                json={"name": name, "type": "gate", "airport_code": "JFK", "coordinates": {"x": x, "y": 0}},
+                headers=admin_headers
+            )
+            ids.append(response.json()["id"])
+        await client.post(
+            "/api/admin/map/path",
+            json={"source_id": ids[0], "destination_id": ids[1], "distance": 10},
+            headers=admin_headers
+        )
+        
+        response = await client.post(
+            "/api/map/navigate",
+            json={"source_id": ids[0], "destination_id": ids[1], "airport_code": "JFK"}
+        )
+        assert response.json() == {"path": ids, "total_distance": 10}
+        
+        # Default airport has no such locations
+        response = await client.post(
+            "/api/map/navigate",
+            json={"source_id": ids[0], "destination_id": ids[1]}
+        )
+        assert "error" in response.json()
+        
+        response = await client.get("/api/map", params={"airport_code": "JFK"})
+        assert len(response.json()["locations"]) == 2
+    
+    @pytest.mark.asyncio
+    async def test_map_edit_invalidates_cached_graph(self, client: AsyncClient, admin_headers):
+        """Test adding a path is reflected in navigation after the graph was cached."""
+        ids = []
+        for name, x in (("A", 0), ("B", 5)):
+            response = await client.post(
+                "/api/admin/map/location",
+                json={"name": name, "type": "hall", "coordinates": {"x": x, "y": 0}},
+                headers=admin_headers
+            )
+            ids.append(response.json()["id"])
+        
+        response = await client.post("/api/map/navigate", json={"source_id": ids[0], "destination_id": ids[1]})
+        assert "error" in response.json()
+        
+        await client.post(
+            "/api/admin/map/path",
+            json={"source_id": ids[0], "destination_id": ids[1], "distance": 5},
+            headers=admin_headers
+        )
+        response = await client.post("/api/map/navigate", json={"source_id": ids[0], "destination_id": ids[1]})
+        assert response.json()["path"] == ids
+
+
+class TestLocationSearch:
+    """Tests for the location typeahead endpoint."""
+    
+    @pytest.mark.asyncio
+    async def test_search_by_prefix_and_typo(self, client: AsyncClient, admin_headers):
+        """Test prefix, multi-word and misspelled queries find the right locations."""
+        for name, type_, category in (
+            ("Gate B2", "gate", "international"),
+            ("Gate A1", "gate", "departure"),
+            ("Coffee Shop", "restaurant", "food"),
+        ):
+            await client.post(
+                "/api/admin/map/location",
+                json={"name": name, "type": type_, "category": category, "coordinates": {"x": 0, "y": 0}},
+                headers=admin_headers
+            )
+        
+        response = await client.get("/api/map/search", params={"q": "gate b"})
+        assert response.status_code == 200
+        assert [r["name"] for r in response.json()["results"]] == ["Gate B2"]
+        
+        response = await client.get("/api/map/search", params={"q": "food"})
+        assert [r["name"] for r in response.json()["results"]] == ["Coffee Shop"]
+        
+        response = await client.get("/api/map/search", params={"q": "cofee"})
+        assert [r["name"] for r in response.json()["results"]] == ["Coffee Shop"]
+
+
+class TestCongestionHeatmap:
+    """Tests for the congestion heatmap endpoint."""
+    
+    @pytest.mark.asyncio
+    async def test_heatmap_bins_edges_by_cell(self, client: AsyncClient, test_db):
+        """Test edges are averaged into the grid cell containing their midpoint."""
+        test_db.add_all([
+            Location(id=1, airport_code="TLV", name="A", type="hall", coordinates={"x": 0, "y": 0}),
+            Location(id=2, airport_code="TLV", name="B", type="hall", coordinates={"x": 20, "y": 0}),
+            Location(id=3, airport_code="TLV", name="C", type="hall", coordinates={"x": 220, "y": 0}),
+            Path(id=1, airport_code="TLV", source_id=1, destination_id=2, distance=20, congestion=2),
+            Path(id=2, airport_code="TLV", source_id=1, destination_id=2, distance=20, congestion=4),
+            Path(id=3, airport_code="TLV", source_id=2, destination_id=3, distance=200, congestion=9),
+        ])
+        await test_db.commit()
+        
+        response = await client.get("/api/map/congestion/heatmap", params={"cell_size": 100})
+        
+        assert response.status_code == 200
+        data = response.json()
+        assert data["width"] == 2
+        cells = {(c["x"], c["y"]): c for c in data["cells"]}
+        assert cells[(0, 0)]["avg_congestion"] == 3.0
+        assert cells[(0, 0)]["edges"] == 2
+        assert cells[(1, 0)]["max_congestion"] == 9
+
+
+class TestWaitTimes:
+    """Tests for precomputed checkpoint wait times."""
+    
+    @pytest.mark.asyncio
+    async def test_wait_times_served_after_refresh(self, client: AsyncClient, test_db):
+        """Test estimates appear only after the background refresh and grow with congestion."""
+        test_db.add_all([
+            Location(id=1, airport_code="TLV", name="Entrance", type="entrance", coordinates={"x": 0, "y": 0}),
+            Location(id=2, airport_code="TLV", name="Security North", type="security", coordinates={"x": 10, "y": 0}),
+            Location(id=3, airport_code="TLV", name="Security South", type="security", coordinates={"x": 0, "y": 10}),
+            Path(airport_code="TLV", source_id=1, destination_id=2, distance=10, congestion=9),
+            Path(airport_code="TLV", source_id=1, destination_id=3, distance=10, congestion=1),
+        ])
+        await test_db.commit()
+        
+        response = await client.get("/api/map/wait-times")
+        assert response.json()["checkpoints"] == []
+        
+        await wait_time_estimator.refresh(test_db)
+        
+        response = await client.get("/api/map/wait-times")
+        checkpoints = {c["name"]: c for c in response.json()["checkpoints"]}
+        assert checkpoints["Security North"]["level"] == "High"
+        assert checkpoints["Security South"]["level"] == "Low"
+        assert checkpoints["Security North"]["wait_minutes"] > checkpoints["Security South"]["wait_minutes"]
+    
+    @pytest.mark.asyncio
+    async def test_refresh_does_not_promote_cached_partitions(self, client: AsyncClient, test_db):
+        """Test the periodic refresh reads hot airports without refreshing their LRU position."""
+        await map_graph_cache.get(test_db, "ZZZ")
+        await map_graph_cache.get(test_db, "AAA")
+        await wait_time_estimator.refresh(test_db)
+        
+        assert wait_time_estimator.get("AAA")["computed_at"] is not None
+        assert wait_time_estimator.get("ZZZ")["computed_at"] is not None
+        # ZZZ was used least recently before the refresh and still is
+        assert map_graph_cache._partitions.popitem()[0] == ("ZZZ", None)